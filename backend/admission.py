@@ -0,0 +1,274 @@
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from backend.metrics import admission_rejections, admission_queue_depth, cancelled_requests
+from backend.tracing import set_attributes
+
+# Priority classes, lower runs first
+PRIORITIES = {"voice": 0, "text": 1, "batch": 2}
+
+# Per-client token bucket (requests per second and burst); ADMISSION_RATE=0 turns rate limiting off
+ADMISSION_RATE = float(os.getenv("ADMISSION_RATE", "5"))
+ADMISSION_BURST = float(os.getenv("ADMISSION_BURST", "20"))
+ADMISSION_MAX_CLIENTS = int(os.getenv("ADMISSION_MAX_CLIENTS", "10000"))  # buckets kept in memory
+
+# Whole-pipeline concurrency and waiting room
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", "16"))
+ADMISSION_QUEUE_LIMIT = int(os.getenv("ADMISSION_QUEUE_LIMIT", "64"))
+
+# Per-stage "concurrency:queue limit"; the local models are CPU-bound and use every core, so one
+# at a time by default. With TRANSLATOR_REPLICAS > 0 the default translate concurrency is one per replica.
+ADMISSION_STAGE_LIMITS = os.getenv(
+    "ADMISSION_STAGE_LIMITS", "translate=1:32,summarize=1:32,fetch=16:128,llm=16:128,tts=2:32"
+)
+TRANSLATOR_REPLICAS = int(os.getenv("TRANSLATOR_REPLICAS", "0"))  # same setting as backend.translator_pool
+
+# Deadline per class when the client does not send X-Deadline-Ms (seconds, 0 = none)
+DEFAULT_DEADLINES = {
+    "voice": float(os.getenv("ADMISSION_VOICE_DEADLINE", "10")),
+    "text": float(os.getenv("ADMISSION_TEXT_DEADLINE", "30")),
+    "batch": 0.0,
+}
+
+# Pipeline stage → gate
+STAGE_GATES = {"translate_in": "translate", "translate_out": "translate"}
+
+
+class Overloaded(Exception):
+    """The request cannot be served in time; retry after retry_after seconds (HTTP 503)"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class RateLimited(Overloaded):
+    """The client is over its request rate (HTTP 429)"""
+
+
+class RequestCancelled(Exception):
+    """The client went away; remaining work is skipped"""
+
+
+class Ticket:
+    """
+    Admission state of one request: priority class, deadline and cancellation flag.
+    The deadline only bounds time spent waiting in gate queues; once a stage runs it finishes.
+    """
+
+    def __init__(self, priority="text", deadline=None):
+        self.priority_class = priority
+        self.priority = PRIORITIES[priority]
+        if deadline is None:
+            deadline = DEFAULT_DEADLINES[priority]
+        self.deadline = time.monotonic() + deadline if deadline else None
+        self.cancelled = threading.Event()
+
+    def remaining(self):
+        return math.inf if self.deadline is None else self.deadline - time.monotonic()
+
+    def cancel(self):
+        if not self.cancelled.is_set():
+            self.cancelled.set()
+            cancelled_requests.inc(priority=self.priority_class)
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise RequestCancelled("Request cancelled")
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Take one token; returns 0 on success, else seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Token bucket per client key; the least recently seen clients are forgotten first"""
+
+    def __init__(self, rate=ADMISSION_RATE, burst=ADMISSION_BURST, max_clients=ADMISSION_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def check(self, client, priority_class="text"):
+        if self.rate <= 0:
+            return
+        with self.lock:
+            bucket = self.buckets.pop(client, None) or TokenBucket(self.rate, self.burst)
+            self.buckets[client] = bucket
+            if len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+            wait = bucket.take()
+        if wait:
+            admission_rejections.inc(reason="rate_limited", priority=priority_class)
+            raise RateLimited("Too many requests", wait)
+
+
+class PriorityGate:
+    """
+    Bounded concurrency with a bounded waiting queue served in priority order (FIFO within
+    a class). Keeps a moving average of how long a slot is held to estimate queue waits,
+    and rejects up front when the estimate is past the ticket's deadline.
+    """
+
+    def __init__(self, name, concurrency, queue_limit, initial_seconds=1.0):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_limit = queue_limit
+        self.condition = threading.Condition()
+        self.active = 0
+        self.waiting = []  # heap of (priority, sequence)
+        self.sequence = itertools.count()
+        self.average_seconds = initial_seconds
+        admission_queue_depth.set_function(self.queue_depth, gate=name)
+
+    def queue_depth(self):
+        return len(self.waiting)
+
+    def _estimate(self, priority):
+        # Slots free up every average / concurrency seconds; wait for everyone ahead plus this one
+        ahead = sum(1 for waiting_priority, _ in self.waiting if waiting_priority <= priority)
+        if self.active < self.concurrency and ahead == 0:
+            return 0.0
+        return (ahead + 1) * self.average_seconds / self.concurrency
+
+    def estimate_wait(self, priority=PRIORITIES["text"]):
+        with self.condition:
+            return self._estimate(priority)
+
+    def check_admission(self, ticket, expected_seconds=0.0, shed=True):
+        """Raise Overloaded if the ticket would wait in a full queue or finish past its deadline"""
+        with self.condition:
+            self._check(ticket, expected_seconds, shed)
+
+    def _check(self, ticket, expected_seconds, shed):
+        if not shed:
+            return
+        wait = self._estimate(ticket.priority)
+        if wait and len(self.waiting) >= self.queue_limit:
+            admission_rejections.inc(reason="queue_full", priority=ticket.priority_class)
+            raise Overloaded(f"{self.name} queue is full", wait)
+        if wait + expected_seconds > ticket.remaining():
+            admission_rejections.inc(reason="deadline", priority=ticket.priority_class)
+            raise Overloaded(f"Estimated {self.name} wait {wait:.1f}s exceeds the deadline", wait)
+
+    @contextmanager
+    def slot(self, ticket, shed=True):
+        """Hold one slot; shed=False waits in line even when the queue is over its limit (batch)"""
+        waited = self._acquire(ticket, shed)
+        set_attributes(**{f"admission.{self.name}.wait_ms": round(waited * 1000, 1)})
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - start_time)
+
+    def _acquire(self, ticket, shed):
+        start_time = time.perf_counter()
+        with self.condition:
+            if self.active < self.concurrency and not self.waiting:
+                self.active += 1
+                return 0.0
+            self._check(ticket, 0.0, shed)
+            entry = (ticket.priority, next(self.sequence))
+            heapq.heappush(self.waiting, entry)
+            try:
+                while not (self.active < self.concurrency and self.waiting[0] == entry):
+                    ticket.check()
+                    if ticket.remaining() <= 0:
+                        admission_rejections.inc(reason="deadline", priority=ticket.priority_class)
+                        raise Overloaded(f"Deadline passed waiting for {self.name}", self._estimate(ticket.priority))
+                    self.condition.wait(min(0.1, max(0.001, ticket.remaining())))
+            except BaseException:
+                self.waiting.remove(entry)
+                heapq.heapify(self.waiting)
+                self.condition.notify_all()
+                raise
+            heapq.heappop(self.waiting)
+            self.active += 1
+            self.condition.notify_all()  # the next in line may fit in another free slot
+        return time.perf_counter() - start_time
+
+    def _release(self, seconds):
+        with self.condition:
+            self.active -= 1
+            self.average_seconds = 0.8 * self.average_seconds + 0.2 * seconds
+            self.condition.notify_all()
+
+
+def parse_stage_limits(spec):
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, values = item.partition("=")
+        concurrency, _, queue_limit = values.partition(":")
+        limits[name.strip()] = (int(concurrency), int(queue_limit or 32))
+    return limits
+
+def stage_limits():
+    limits = parse_stage_limits(ADMISSION_STAGE_LIMITS)
+    # Replica processes translate in parallel; an explicit ADMISSION_STAGE_LIMITS still wins
+    if TRANSLATOR_REPLICAS > 0 and "translate" in limits and "ADMISSION_STAGE_LIMITS" not in os.environ:
+        limits["translate"] = (TRANSLATOR_REPLICAS, limits["translate"][1])
+    return limits
+
+
+# === Shared instances ===
+rate_limiter = RateLimiter()
+pipeline_gate = PriorityGate("pipeline", ADMISSION_CONCURRENCY, ADMISSION_QUEUE_LIMIT, initial_seconds=2.0)
+stage_gates = {
+    name: PriorityGate(name, concurrency, queue_limit)
+    for name, (concurrency, queue_limit) in stage_limits().items()
+}
+
+
+def get_stage_gate(stage):
+    return stage_gates.get(STAGE_GATES.get(stage, stage))
+
+
+def admit(client, priority="text", deadline=None):
+    """Rate-limit the client and check the pipeline queue; returns the request's Ticket or raises Overloaded"""
+    ticket = Ticket(priority, deadline)
+    rate_limiter.check(client, priority)
+    pipeline_gate.check_admission(ticket, expected_seconds=pipeline_gate.average_seconds)
+    return ticket
+
+
+def run_admitted(ticket, function, /, *args, **kwargs):
+    """Run function in a pipeline slot (call from a worker thread, never the event loop)"""
+    with pipeline_gate.slot(ticket):
+        ticket.check()
+        return function(*args, **kwargs)
+
+
+@contextmanager
+def stage_slot(stage, ticket, shed=True):
+    """Gate one stage for a ticket; stages without a gate (or calls without a ticket) run directly"""
+    gate = get_stage_gate(stage)
+    if ticket is not None:
+        ticket.check()
+    if gate is None or ticket is None:
+        yield
+        return
+    with gate.slot(ticket, shed):
+        yield
@@ -1,6 +1,11 @@
 import os
 import requests
 
+# Upstream base URLs, overridable so benchmarks can run against local fake services
+GNEWS_BASE_URL = os.getenv("GNEWS_BASE_URL", "https://gnews.io/api/v4")
+OPENWEATHERMAP_BASE_URL = os.getenv("OPENWEATHERMAP_BASE_URL", "http://api.openweathermap.org/data/2.5")
+TIMEZONEDB_BASE_URL = os.getenv("TIMEZONEDB_BASE_URL", "http://api.timezonedb.com/v2.1")
+
 # === City Extraction Function ===
 def extract_city_name(prompt):
     known_cities = [
@@ -35,7 +40,7 @@ class APIUtilities:
             return ["❌ GNews API key not found."]
         
         query = extract_city_name(prompt) or prompt
-        url = f"https://gnews.io/api/v4/search?q={query}&lang={lang}&max={max_results}&apikey={self.gnews_key}"
+        url = f"{GNEWS_BASE_URL}/search?q={query}&lang={lang}&max={max_results}&apikey={self.gnews_key}"
         try:
             response = requests.get(url, timeout=10)
             data = response.json()
@@ -48,7 +53,7 @@ class APIUtilities:
             return {"error": "❌ OpenWeatherMap API key not found."}
         
         city = extract_city_name(prompt) or "Delhi"
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={self.weather_key}&units=metric"
+        url = f"{OPENWEATHERMAP_BASE_URL}/weather?q={city}&appid={self.weather_key}&units=metric"
         try:
             return requests.get(url, timeout=10).json()
         except requests.exceptions.RequestException as e:
@@ -66,7 +71,7 @@ class APIUtilities:
             "Srinagar": "Asia/Kolkata", "Guwahati": "Asia/Kolkata"
         }
         timezone = city_timezone_map.get(city, "Asia/Kolkata")
-        url = f"http://api.timezonedb.com/v2.1/get-time-zone?key={self.timezonedb_key}&format=json&by=zone&zone={timezone}"
+        url = f"{TIMEZONEDB_BASE_URL}/get-time-zone?key={self.timezonedb_key}&format=json&by=zone&zone={timezone}"
         try:
             return requests.get(url, timeout=10).json()
         except requests.exceptions.RequestException as e:
@@ -0,0 +1,310 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.translator import get_translator_instance
+from backend.translator_pool import TRANSLATOR_POOL_TIMEOUT
+from backend.pipeline import (
+    route_intent, fetch_key, api_data_prompt, coalesced_fetch, coalesced_summarize, coalesced_llm
+)
+from backend.prompt_optimizer import fits_token_budget
+from backend.metrics import batch_items_total
+from backend.admission import Ticket, RequestCancelled, stage_slot
+from backend.tracing import span
+
+# Batch configuration
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "2"))  # jobs processed at the same time
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "64"))  # items answered together; results stream per chunk
+BATCH_TRANSLATE_SIZE = int(os.getenv("BATCH_TRANSLATE_SIZE", "16"))  # texts per generate() call
+BATCH_IO_CONCURRENCY = int(os.getenv("BATCH_IO_CONCURRENCY", "8"))  # parallel API fetches and Gemini calls
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "10000"))
+BATCH_JOB_TTL_SECONDS = int(os.getenv("BATCH_JOB_TTL_SECONDS", "3600"))  # finished jobs are kept this long
+
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+
+def group_by(items, key):
+    groups = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return groups
+
+
+def translate_texts(texts, source_lang, target_lang):
+    """Translate one language pair in padded batches, spread over the replica pool when it runs"""
+    translator = get_translator_instance()
+    if translator.pool is None:
+        return translator.translate_batch(texts, source_lang, target_lang, BATCH_TRANSLATE_SIZE)
+    chunks = [texts[i:i + BATCH_TRANSLATE_SIZE] for i in range(0, len(texts), BATCH_TRANSLATE_SIZE)]
+    futures = [translator.pool.submit(chunk, source_lang, target_lang) for chunk in chunks]
+    return [text for future in futures for text in future.result(timeout=TRANSLATOR_POOL_TIMEOUT)]
+
+
+def gated(stage, ticket, function, *args):
+    # Batch work queues behind voice and text at the stage gate, and is never shed (the coalesced
+    # fetch, summarize and LLM calls take their gates themselves, with shed=False)
+    with stage_slot(stage, ticket, shed=False):
+        return function(*args)
+
+
+class BatchAnswerer:
+    """
+    Answers a list of chat items stage by stage instead of one pipeline run each:
+    translation is batched per language pair, each distinct upstream fetch runs once per
+    intent and key (city, word, ...), and identical Gemini prompts are sent once.
+    Items have "text" and optionally "id" and "language"; no session history is used.
+    Every stage goes through the admission stage gates with the job's (batch priority) ticket.
+    """
+
+    def __init__(self, io_executor):
+        self.io_executor = io_executor
+
+    def answer(self, items, offset=0, ticket=None):
+        ticket = ticket or Ticket("batch")
+        translator = get_translator_instance()
+        results = [{
+            "index": offset + i,
+            "id": item.get("id"),
+            "input": item["text"],
+            "source_lang": item.get("language"),
+            "intent": None,
+            "response": None,
+            "keywords": [],
+            "error": None,
+        } for i, item in enumerate(items)]
+        pending = [r for r in results if self._check_input(r, translator)]
+
+        with span("batch.translate_in", {"batch.size": len(pending)}):
+            self._translate(pending, "input", "english_prompt", ticket, to_english=True)
+        pending = [r for r in pending if r["error"] is None]
+
+        with span("batch.fetch", {"batch.size": len(pending)}):
+            llm_prompts = self._fetch(pending, ticket)
+        with span("batch.llm", {"batch.size": len(llm_prompts)}):
+            self._ask_llm(pending, llm_prompts, ticket)
+        pending = [r for r in pending if r["error"] is None]
+
+        with span("batch.translate_out", {"batch.size": len(pending)}):
+            self._translate(pending, "english_response", "response", ticket, to_english=False)
+
+        for result in results:
+            result.pop("english_prompt", None)
+            result.pop("english_response", None)
+            batch_items_total.inc(status="error" if result["error"] else "ok")
+        return results
+
+    def _check_input(self, result, translator):
+        if not result["input"].strip():
+            result["response"] = "Please provide a message."
+            return False
+        try:
+            if result["source_lang"] not in translator.lang_detect_map:
+                result["source_lang"] = translator.detect_lang_code(result["input"])
+        except Exception as e:
+            result["error"] = f"Language detection failed: {e}"
+            return False
+        if result["source_lang"] not in translator.lang_detect_map:
+            result["error"] = f"Unsupported language '{result['source_lang']}'"
+            return False
+        return True
+
+    def _translate(self, results, source_field, target_field, ticket, to_english):
+        nllb_codes = get_translator_instance().lang_detect_map
+        for lang, group in group_by(results, lambda r: r["source_lang"]).items():
+            texts = [r[source_field] for r in group]
+            if lang == "en":
+                translations = texts
+            else:
+                if to_english:
+                    source_lang, target_lang = nllb_codes[lang], "eng_Latn"
+                else:
+                    source_lang, target_lang = "eng_Latn", nllb_codes[lang]
+                try:
+                    translations = gated("translate_in", ticket, translate_texts, texts, source_lang, target_lang)
+                except RequestCancelled:
+                    raise
+                except Exception as e:
+                    for r in group:
+                        r["error"] = f"Translation failed: {e}"
+                    continue
+            for r, text in zip(group, translations):
+                r[target_field] = text
+
+    def _fetch(self, results, ticket):
+        """Route every item, fetch each distinct (intent, key) once; returns item index → LLM prompt"""
+        llm_prompts = {}
+        routed = []
+        for r in results:
+            r["intent"] = route_intent(r["english_prompt"])
+            if r["intent"]:
+                routed.append(r)
+            else:
+                llm_prompts[r["index"]] = self._plain_prompt(r, ticket)
+
+        groups = group_by(routed, lambda r: (r["intent"], fetch_key(r["intent"], r["english_prompt"])))
+        futures = {
+            key: self.io_executor.submit(coalesced_fetch, key[0], group[0]["english_prompt"], ticket, False)
+            for key, group in groups.items()
+        }
+        for key, group in groups.items():
+            try:
+                data = futures[key].result()
+            except RequestCancelled:
+                raise
+            except Exception as e:
+                print("API fetch failed:", e)
+                data = None
+            for r in group:
+                if not data:
+                    r["intent"] = None  # fall through to a plain LLM answer, like the pipeline
+                    llm_prompts[r["index"]] = self._plain_prompt(r, ticket)
+                    continue
+                summary_prompt = api_data_prompt(r["intent"], r["english_prompt"], data)
+                if summary_prompt is None:
+                    r["english_response"] = str(data)
+                else:
+                    llm_prompts[r["index"]] = summary_prompt
+        return llm_prompts
+
+    @staticmethod
+    def _plain_prompt(result, ticket):
+        prompt = result["english_prompt"]
+        if not fits_token_budget(prompt):
+            prompt, result["keywords"] = coalesced_summarize(prompt, ticket, shed=False)
+        return prompt
+
+    def _ask_llm(self, results, llm_prompts, ticket):
+        # Identical prompts (common in stored question sets) are sent once, and join identical live
+        # calls in flight; an empty history keeps every call stateless instead of using the shared chat
+        answers = {prompt: self.io_executor.submit(coalesced_llm, prompt, [], ticket, False)
+                   for prompt in set(llm_prompts.values())}
+        for r in results:
+            prompt = llm_prompts.get(r["index"])
+            if prompt is not None:
+                try:
+                    r["english_response"] = answers[prompt].result()
+                except RequestCancelled:
+                    raise
+                except Exception as e:
+                    r["error"] = f"LLM request failed: {e}"
+                    continue
+            r["english_response"] = r["english_response"].replace('*', '')
+
+
+class BatchJob:
+    def __init__(self, items):
+        self.id = uuid.uuid4().hex
+        self.items = items
+        self.status = "queued"
+        self.results = []
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.ticket = Ticket("batch")
+        self.updated = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def info(self):
+        with self.updated:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "items": len(self.items),
+                "completed": len(self.results),
+                "errors": sum(1 for r in self.results if r["error"]),
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+    def wait_for_results(self, start=0, timeout=None):
+        """Results from index start on, waiting up to timeout for new ones; returns (results, finished)"""
+        with self.updated:
+            if len(self.results) <= start and not self.finished:
+                self.updated.wait(timeout)
+            return self.results[start:], self.finished
+
+    def _set_status(self, status, error=None):
+        with self.updated:
+            self.status = status
+            self.error = error
+            if status == "running":
+                self.started_at = time.time()
+            elif status in FINISHED_STATUSES:
+                self.finished_at = time.time()
+            self.updated.notify_all()
+
+
+class BatchJobQueue:
+    """Runs batch jobs on a small worker pool; results become available chunk by chunk"""
+
+    def __init__(self, workers=BATCH_WORKERS, chunk_size=BATCH_CHUNK_SIZE, io_concurrency=BATCH_IO_CONCURRENCY):
+        self.chunk_size = chunk_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-job")
+        self.answerer = BatchAnswerer(ThreadPoolExecutor(max_workers=io_concurrency, thread_name_prefix="batch-io"))
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, items):
+        if len(items) > BATCH_MAX_ITEMS:
+            raise ValueError(f"❌ A batch may have at most {BATCH_MAX_ITEMS} items, got {len(items)}")
+        self._expire()
+        job = BatchJob(items)
+        with self.lock:
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.ticket.cancel()
+            if job.status == "queued":
+                job._set_status("cancelled")
+        return job
+
+    def _run(self, job):
+        if job.ticket.cancelled.is_set():
+            return
+        job._set_status("running")
+        print(f"📦 Batch job {job.id}: {len(job.items)} items")
+        try:
+            for start in range(0, len(job.items), self.chunk_size):
+                results = self.answerer.answer(job.items[start:start + self.chunk_size], start, job.ticket)
+                with job.updated:
+                    job.results.extend(results)
+                    job.updated.notify_all()
+            job._set_status("done")
+            print(f"✅ Batch job {job.id} done")
+        except RequestCancelled:
+            job._set_status("cancelled")
+        except Exception as e:
+            print(f"❌ Batch job {job.id} failed: {e}")
+            job._set_status("failed", str(e))
+
+    def _expire(self):
+        cutoff = time.time() - BATCH_JOB_TTL_SECONDS
+        with self.lock:
+            for job_id in [j.id for j in self.jobs.values() if j.finished and j.finished_at < cutoff]:
+                del self.jobs[job_id]
+
+
+# === Shared instance ===
+batch_queue = None
+
+def get_batch_queue():
+    global batch_queue
+    if batch_queue is None:
+        batch_queue = BatchJobQueue()
+    return batch_queue
@@ -0,0 +1,75 @@
+import os
+
+# === DECODING PRESETS (cheapest first) ===
+
+DECODING_PRESETS = {
+    "greedy": {"beam_size": 1, "best_of": 1, "temperature": 0.0},
+    "fast": {"beam_size": 2, "best_of": 2, "temperature": (0.0, 0.4, 0.8)},
+    "balanced": {"beam_size": 5, "best_of": 5, "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)},
+    "accurate": {"beam_size": 10, "best_of": 5, "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)},
+}
+PRESET_ORDER = ["greedy", "fast", "balanced", "accurate"]
+
+WHISPER_DECODING_POLICY = os.getenv("WHISPER_DECODING_POLICY", "adaptive")
+
+
+class DecodingPolicy:
+    """
+    Picks Whisper decoding options from the chunk length and the current queue depth.
+    Short commands get a small beam, long dictation a wide one; under load every
+    request drops one preset, and past the overload depth everything decodes greedily.
+    """
+
+    def __init__(self, mode=WHISPER_DECODING_POLICY, short_chunk_seconds=3.0, long_chunk_seconds=12.0,
+                 busy_queue_depth=2, overload_queue_depth=4):
+        if mode != "adaptive" and mode not in DECODING_PRESETS:
+            raise ValueError(f"❌ Unknown decoding policy: {mode}")
+        self.mode = mode
+        self.short_chunk_seconds = short_chunk_seconds
+        self.long_chunk_seconds = long_chunk_seconds
+        self.busy_queue_depth = busy_queue_depth
+        self.overload_queue_depth = overload_queue_depth
+
+    def choose_preset(self, audio_seconds, queue_depth=0):
+        if self.mode != "adaptive":
+            return self.mode
+        if queue_depth >= self.overload_queue_depth:
+            return "greedy"
+
+        if audio_seconds <= self.short_chunk_seconds:
+            preset = "fast"
+        elif audio_seconds < self.long_chunk_seconds:
+            preset = "balanced"
+        else:
+            preset = "accurate"
+
+        if queue_depth >= self.busy_queue_depth:
+            preset = PRESET_ORDER[max(0, PRESET_ORDER.index(preset) - 1)]
+        return preset
+
+    def vad_parameters(self, audio_seconds, queue_depth=0):
+        # Short commands end quickly, so split on shorter pauses; under load drop more borderline audio
+        params = {
+            "threshold": 0.6 if queue_depth >= self.busy_queue_depth else 0.5,
+            "min_silence_duration_ms": 300 if audio_seconds <= self.short_chunk_seconds else 1000,
+        }
+        return params
+
+    def options(self, audio_seconds, queue_depth=0):
+        """Keyword arguments for WhisperModel.transcribe / BatchedInferencePipeline.transcribe"""
+        preset = self.choose_preset(audio_seconds, queue_depth)
+        options = dict(DECODING_PRESETS[preset])
+        options["vad_filter"] = True
+        options["vad_parameters"] = self.vad_parameters(audio_seconds, queue_depth)
+        return options
+
+
+# === Shared instance ===
+decoding_policy = DecodingPolicy()
+
+def get_decoding_policy():
+    return decoding_policy
+
+def set_decoding_policy(policy):
+    global decoding_policy
+    decoding_policy = policy
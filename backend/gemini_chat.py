@@ -1,4 +1,5 @@
 import os
+import threading
 import google.generativeai as genai
 
 class GeminiChat:
@@ -8,14 +9,28 @@ class GeminiChat:
         if not api_key:
             raise ValueError("❌ GEMINI_API_KEY not found in environment variables.")
 
-        genai.configure(api_key=api_key)
+        # GEMINI_API_ENDPOINT points the client at another host (e.g. the benchmark's fake server)
+        api_endpoint = os.getenv("GEMINI_API_ENDPOINT")
+        if api_endpoint:
+            genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": api_endpoint})
+        else:
+            genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel(model_name)
         self.chat = self.model.start_chat(history=[])
         print("✅ Gemini model initialized.")
 
-    def send(self, message: str) -> str:
-        # Sends a message to the Gemini model and returns the response
-        response = self.chat.send_message(message)
+    def send(self, message: str, history: list = None) -> str:
+        # Sends a message to the Gemini model and returns the response.
+        # With history (a list of (user, model) pairs) the call is stateless and the shared chat is untouched.
+        if history is None:
+            response = self.chat.send_message(message)
+        else:
+            contents = []
+            for user_text, model_text in history:
+                contents.append({"role": "user", "parts": [user_text]})
+                contents.append({"role": "model", "parts": [model_text]})
+            contents.append({"role": "user", "parts": [message]})
+            response = self.model.generate_content(contents)
         return response.text.strip()
 
     def reset_chat(self):
@@ -24,13 +39,16 @@ class GeminiChat:
 
 # === Function for use in main.py ===
 gemini_instance = None
+gemini_init_lock = threading.Lock()
 
-def get_gemini_response(prompt: str) -> str:
-    # Returns the response from the Gemini model
+def get_gemini_response(prompt: str, history: list = None) -> str:
+    # Returns the response from the Gemini model (history: per-session (user, model) turns)
     global gemini_instance
     if gemini_instance is None:
-        gemini_instance = GeminiChat()
-    return gemini_instance.send(prompt)
+        with gemini_init_lock:  # batch jobs call this from many threads at once
+            if gemini_instance is None:
+                gemini_instance = GeminiChat()
+    return gemini_instance.send(prompt, history)
 
 # === Optional CLI test ===
 if __name__ == "__main__":
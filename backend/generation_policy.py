@@ -0,0 +1,99 @@
+import math
+import os
+
+# === GENERATION PRESETS (cheapest first) ===
+
+GENERATION_PRESETS = {
+    "greedy": {"num_beams": 1},
+    "fast": {"num_beams": 2},
+    "balanced": {"num_beams": 4},
+}
+PRESET_ORDER = ["greedy", "fast", "balanced"]
+
+# "fixed" is the old behaviour: max_length=256 and the checkpoint's own beam setting
+NLLB_GENERATION_POLICY = os.getenv("NLLB_GENERATION_POLICY", "adaptive")
+
+# Rough NLLB token counts of the same sentence relative to English; output length is estimated
+# as input tokens × target ratio / source ratio (bench_generation_policy prints observed ratios)
+EXPANSION_RATIOS = {
+    "eng_Latn": 1.0,
+    "asm_Beng": 1.5,
+    "ben_Beng": 1.4,
+    "guj_Gujr": 1.4,
+    "hin_Deva": 1.3,
+    "kan_Knda": 1.6,
+    "mal_Mlym": 1.7,
+    "mar_Deva": 1.4,
+    "npi_Deva": 1.4,
+    "pan_Guru": 1.3,
+    "san_Deva": 1.8,
+    "snd_Arab": 1.3,
+    "tam_Taml": 1.6,
+    "tel_Telu": 1.5,
+    "urd_Arab": 1.2,
+}
+DEFAULT_EXPANSION_RATIO = 1.5
+
+# NLLB's decoder has 1024 positions; the decoder start and target language tokens take two
+MAX_NEW_TOKENS = 1022
+
+
+class GenerationPolicy:
+    """
+    Picks NLLB generate() options for a batch from its input length, language pair and the
+    translate queue depth. max_new_tokens follows the expected output length with some slack,
+    so "hi" stops early and a paragraph is not cut at 256 tokens. Short inputs get a small beam,
+    longer ones a wider one; under load every request drops one preset, and past the overload
+    depth everything decodes greedily.
+    """
+
+    def __init__(self, mode=NLLB_GENERATION_POLICY, length_slack=1.5, extra_tokens=10, short_input_tokens=24,
+                 busy_queue_depth=2, overload_queue_depth=4, early_stopping=True):
+        if mode not in ("adaptive", "fixed") and mode not in GENERATION_PRESETS:
+            raise ValueError(f"❌ Unknown generation policy: {mode}")
+        self.mode = mode
+        self.length_slack = length_slack
+        self.extra_tokens = extra_tokens
+        self.short_input_tokens = short_input_tokens
+        self.busy_queue_depth = busy_queue_depth
+        self.overload_queue_depth = overload_queue_depth
+        self.early_stopping = early_stopping
+
+    def choose_preset(self, input_tokens, queue_depth=0):
+        if self.mode != "adaptive":
+            return self.mode
+        if queue_depth >= self.overload_queue_depth:
+            return "greedy"
+
+        preset = "fast" if input_tokens <= self.short_input_tokens else "balanced"
+        if queue_depth >= self.busy_queue_depth:
+            preset = PRESET_ORDER[max(0, PRESET_ORDER.index(preset) - 1)]
+        return preset
+
+    def max_new_tokens(self, input_tokens, source_lang, target_lang):
+        ratio = (EXPANSION_RATIOS.get(target_lang, DEFAULT_EXPANSION_RATIO)
+                 / EXPANSION_RATIOS.get(source_lang, DEFAULT_EXPANSION_RATIO))
+        expected = math.ceil(input_tokens * ratio * self.length_slack) + self.extra_tokens
+        return min(MAX_NEW_TOKENS, expected)
+
+    def options(self, input_tokens, source_lang, target_lang, queue_depth=0):
+        """Keyword arguments for model.generate; input_tokens is the longest text in the batch"""
+        preset = self.choose_preset(input_tokens, queue_depth)
+        if preset == "fixed":
+            return {"max_length": 256}
+        options = dict(GENERATION_PRESETS[preset])
+        options["max_new_tokens"] = self.max_new_tokens(input_tokens, source_lang, target_lang)
+        if options["num_beams"] > 1:
+            options["early_stopping"] = self.early_stopping  # stop once every beam has finished
+        return options
+
+
+# === Shared instance ===
+generation_policy = GenerationPolicy()
+
+def get_generation_policy():
+    return generation_policy
+
+def set_generation_policy(policy):
+    global generation_policy
+    generation_policy = policy
@@ -0,0 +1,223 @@
+import bisect
+import threading
+
+# Default latency buckets (seconds), from fast local stages up to slow LLM / TTS calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class: a named metric family with optional labels, safe to update from any thread"""
+    metric_type = "untyped"
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.values = {}
+        self.functions = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def set_function(self, function, **labels):
+        """Compute the value only when /metrics is scraped (counters: a running total kept elsewhere)"""
+        self.functions[self._key(labels)] = function
+
+    def render(self):
+        for key, function in list(self.functions.items()):
+            try:
+                value = function()
+            except Exception:
+                continue
+            with self.lock:
+                self.values[key] = value
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # per-bucket (non-cumulative) counts, sum, count
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self.lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self.values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ("le", _format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, label_names=()):
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names=()):
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self.lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# === Shared registry and the application's metrics ===
+registry = MetricsRegistry()
+
+stage_duration = registry.histogram(
+    "promptbridge_stage_duration_seconds", "Time spent in each pipeline stage", ["stage"]
+)
+model_events = registry.counter(
+    "promptbridge_model_events_total", "Model load and unload events", ["model", "event"]
+)
+models_loaded = registry.gauge(
+    "promptbridge_model_loaded", "Whether a model is currently loaded (1) or not (0)", ["model"]
+)
+cache_hit_ratio = registry.gauge(
+    "promptbridge_cache_hit_ratio", "Hit ratio of each cache since process start", ["cache"]
+)
+cache_lookups = registry.counter(
+    "promptbridge_cache_lookups_total", "Lookups served by each cache", ["cache", "result"]
+)
+requests_in_flight = registry.gauge(
+    "promptbridge_requests_in_flight", "HTTP requests currently being processed", ["path"]
+)
+requests_total = registry.counter(
+    "promptbridge_requests_total", "HTTP requests completed", ["path", "status"]
+)
+batch_items_total = registry.counter(
+    "promptbridge_batch_items_total", "Batch chat items completed", ["status"]
+)
+singleflight_calls = registry.counter(
+    "promptbridge_singleflight_calls_total", "Calls made through a stage's request coalescing", ["stage"]
+)
+coalesced_calls = registry.counter(
+    "promptbridge_coalesced_calls_total", "Calls that joined an identical call already in flight", ["stage"]
+)
+admission_rejections = registry.counter(
+    "promptbridge_admission_rejections_total", "Requests refused by admission control", ["reason", "priority"]
+)
+admission_queue_depth = registry.gauge(
+    "promptbridge_admission_queue_depth", "Requests waiting at each admission gate", ["gate"]
+)
+cancelled_requests = registry.counter(
+    "promptbridge_cancelled_requests_total", "Requests cancelled after the client disconnected", ["priority"]
+)
+speculative_prefetches = registry.counter(
+    "promptbridge_speculative_prefetches_total", "Fetches started from the source-language text, by outcome",
+    ["intent", "outcome"]
+)
+
+# Pipeline stage names → metric stage label
+STAGE_LABELS = {"translate_in": "translate", "translate_out": "translate", "tts": "synthesize"}
+
+
+def observe_stage(stage, seconds):
+    stage_duration.observe(seconds, stage=STAGE_LABELS.get(stage, stage))
+
+def pipeline_stage_hook(stage, seconds, context):
+    """PromptPipeline hook that records every stage duration"""
+    observe_stage(stage, seconds)
+
+def record_model_event(model, event):
+    model_events.inc(model=model, event=event)
+    models_loaded.set(1 if event == "load" else 0, model=model)
+
+def register_cache(name, cache):
+    """Expose a cache with hits / misses attributes (read only at scrape time)"""
+    cache_hit_ratio.set_function(lambda: cache.hits / max(1, cache.hits + cache.misses), cache=name)
+    cache_lookups.set_function(lambda: cache.hits, cache=name, result="hit")
+    cache_lookups.set_function(lambda: cache.misses, cache=name, result="miss")
+
+def render_metrics():
+    return registry.render()
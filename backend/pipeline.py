@@ -0,0 +1,316 @@
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from backend.translator import get_translator_instance, translate_to_user_lang
+from backend.prompt_optimizer import get_optimized_prompt_and_keywords, fits_token_budget
+from backend.gemini_chat import get_gemini_response
+from backend.api_utilities import (
+    fetch_weather, fetch_news, fetch_time,
+    fetch_quote, fetch_fun_fact, fetch_definition, extract_city_name
+)
+from backend.text_to_speech import synthesize
+from backend.tracing import span
+from backend.admission import stage_slot, RequestCancelled, Overloaded
+from backend.prefetch import start_prefetch, take_prefetch, discard_prefetch
+from backend.singleflight import (
+    normalize_text, history_key, translate_flight, fetch_flight, summarize_flight, llm_flight
+)
+
+# Stage names in execution order; hooks receive one of these
+STAGES = ["detect", "translate_in", "route", "fetch", "summarize", "llm", "translate_out", "tts"]
+
+# === ROUTING ===
+
+def route_intent(prompt: str):
+    """Return the API intent for an English prompt, or None for a plain LLM answer"""
+    lower_prompt = prompt.lower()
+    if "weather" in lower_prompt:
+        return "weather"
+    elif "news" in lower_prompt:
+        return "news"
+    elif "time" in lower_prompt:
+        return "time"
+    elif "quote" in lower_prompt:
+        return "quote"
+    elif "fun fact" in lower_prompt or "fact" in lower_prompt:
+        return "fact"
+    elif "define" in lower_prompt or "definition" in lower_prompt:
+        return "define"
+    return None
+
+def fetch_intent_data(intent: str, prompt: str):
+    """Call the upstream API behind an intent"""
+    if intent == "weather":
+        return fetch_weather(prompt)
+    elif intent == "news":
+        return fetch_news(prompt)
+    elif intent == "time":
+        return fetch_time()
+    elif intent == "quote":
+        return fetch_quote()
+    elif intent == "fact":
+        return fetch_fun_fact()
+    elif intent == "define":
+        return fetch_definition(prompt.lower().split()[-1])
+    return None
+
+def fetch_key(intent: str, prompt: str):
+    """What an intent's upstream call actually depends on; prompts with equal keys get the same data"""
+    if intent == "weather":
+        return extract_city_name(prompt)
+    elif intent == "news":
+        return extract_city_name(prompt) or prompt.lower().strip()
+    elif intent == "define":
+        return prompt.lower().split()[-1]
+    return None  # time, quotes and facts do not depend on the prompt
+
+def api_data_prompt(intent: str, prompt: str, data):
+    """Gemini prompt that summarizes API data, or None when the data is returned as-is"""
+    if intent == "weather":
+        return f"Summarize the following weather update: {data}"
+    elif intent == "news":
+        return f"Summarize the following news in 3-4 bullet points: {data}"
+    elif intent == "time":
+        return f"Summarize the following time and timezone info: {data}"
+    elif intent == "define":
+        word = prompt.lower().split()[-1]
+        return f"Explain the definition of '{word}' in simple words: {data}"
+    return None  # quotes and facts are returned directly
+
+
+# === COALESCED STAGE CALLS ===
+# Concurrent identical work (e.g. hundreds of users asking about the same breaking news)
+# runs once; keys are the normalized stage inputs. Only the caller that runs the work takes
+# the stage's admission gate, so callers joining it never hold a slot while they wait.
+
+def run_in_slot(stage, ticket, shed, function, *args):
+    try:
+        with stage_slot(stage, ticket, shed):
+            return function(*args)
+    except (RequestCancelled, Overloaded) as e:
+        e.ticket = ticket  # whose admission failed, see coalesced()
+        raise
+
+def coalesced(flight, key, stage, ticket, shed, function, *args):
+    """flight.do(key, ...) with the stage gate taken by whichever caller runs the function"""
+    while True:
+        try:
+            return flight.do(key, run_in_slot, stage, ticket, shed, function, *args, ticket=ticket)
+        except (RequestCancelled, Overloaded) as e:
+            if getattr(e, "ticket", None) is ticket:
+                raise
+            # The call we joined was cancelled or shed for its own request; run it for ours
+            if ticket is not None:
+                ticket.check()
+
+def coalesced_translate_to_english(text: str, source_lang: str, ticket=None, shed=True):
+    text = normalize_text(text)
+    return coalesced(translate_flight, ("to_en", source_lang, text), "translate_in", ticket, shed,
+                     get_translator_instance().translate_to_english, text, source_lang)
+
+def coalesced_translate_from_english(text: str, target_lang: str, ticket=None, shed=True):
+    text = normalize_text(text)
+    return coalesced(translate_flight, ("from_en", target_lang, text), "translate_out", ticket, shed,
+                     translate_to_user_lang, text, target_lang)
+
+def coalesced_fetch(intent: str, prompt: str, ticket=None, shed=True):
+    return coalesced(fetch_flight, (intent, fetch_key(intent, prompt)), "fetch", ticket, shed,
+                     fetch_intent_data, intent, prompt)
+
+def speculative_fetch(intent: str, prompt: str, ticket=None):
+    # Runs on the prefetch executor while the prompt is being translated
+    return coalesced_fetch(intent, prompt, ticket)
+
+def coalesced_summarize(prompt: str, ticket=None, shed=True):
+    prompt = normalize_text(prompt)
+    return coalesced(summarize_flight, prompt, "summarize", ticket, shed, get_optimized_prompt_and_keywords, prompt)
+
+def coalesced_llm(prompt: str, history: list = None, ticket=None, shed=True):
+    prompt = normalize_text(prompt)
+    return coalesced(llm_flight, (prompt, history_key(history)), "llm", ticket, shed,
+                     get_gemini_response, prompt, history)
+
+
+class PromptPipeline:
+    """
+    Staged chat pipeline shared by the FastAPI and Streamlit front-ends:
+    detect → translate_in → route → fetch → (summarize) → llm → translate_out → tts.
+    Hooks registered with add_hook are called as hook(stage, seconds, context) after every stage.
+    With an admission ticket every stage first checks for cancellation; the expensive ones wait
+    for their stage gate (inside the coalesced calls, so only the caller doing the work waits).
+    """
+
+    def __init__(self):
+        self.hooks = []
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        if hook in self.hooks:
+            self.hooks.remove(hook)
+
+    @contextmanager
+    def stage(self, name, context):
+        start_time = time.perf_counter()
+        try:
+            with span(f"pipeline.{name}", self._span_attributes(context)):
+                if context["ticket"] is not None:
+                    context["ticket"].check()
+                yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            context["timings"][name] = context["timings"].get(name, 0.0) + elapsed
+            for hook in self.hooks:
+                try:
+                    hook(name, elapsed, context)
+                except Exception as e:
+                    print(f"⚠️ Pipeline hook failed on {name}: {e}")
+
+    @staticmethod
+    def _span_attributes(context):
+        source_lang = context["source_lang"]
+        return {
+            "prompt.length": len(context["input"]),
+            "lang.pair": f"{source_lang}->en->{source_lang}" if source_lang else None,
+            "intent": context["intent"],
+        }
+
+    def run(self, user_input: str, source_lang: str = None, speak_response: bool = False, history: list = None,
+            ticket=None) -> dict:
+        """
+        Process one message. Returns the context dict with at least
+        "response", "keywords", "source_lang", "intent", "audio" and per-stage "timings" (seconds).
+        history: earlier English (prompt, response) turns of this client's session, for the LLM.
+        ticket: admission Ticket (priority, deadline, cancellation); raises RequestCancelled between stages.
+        """
+        with span("pipeline.run") as run_span:
+            context = self._run(user_input, source_lang, speak_response, history, ticket)
+            run_span.set_attributes(self._span_attributes(context))
+            run_span.set_attribute("keywords.count", len(context["keywords"]))
+        return context
+
+    def _run(self, user_input: str, source_lang: str, speak_response: bool, history: list, ticket) -> dict:
+        context = {
+            "input": user_input,
+            "source_lang": source_lang,
+            "history": history,
+            "ticket": ticket,
+            "prefetch": None,
+            "english_prompt": None,
+            "english_response": None,
+            "intent": None,
+            "response": None,
+            "keywords": [],
+            "audio": None,
+            "timings": {},
+        }
+        if not user_input.strip():
+            context["response"] = "Please provide a message."
+            return context
+
+        translator = get_translator_instance()
+        with self.stage("detect", context):
+            # A known language (request field or Whisper hint) skips langdetect
+            if context["source_lang"] not in translator.lang_detect_map:
+                context["source_lang"] = translator.detect_lang_code(user_input)
+        source_lang = context["source_lang"]
+
+        # Non-English prompts: guess the intent from the source text and fetch while NLLB translates
+        if source_lang != "en":
+            context["prefetch"] = start_prefetch(user_input, partial(speculative_fetch, ticket=ticket))
+
+        try:
+            # Skip translation if input is in English
+            with self.stage("translate_in", context):
+                if source_lang == "en":
+                    english_prompt = user_input
+                else:
+                    english_prompt = coalesced_translate_to_english(user_input, source_lang, ticket)
+            context["english_prompt"] = english_prompt
+
+            english_response = self._answer(english_prompt, context)
+        finally:
+            # Still set if the request failed before _answer used or discarded it
+            discard_prefetch(context["prefetch"])
+            context["prefetch"] = None
+
+        # Remove any '*' symbols (markdown emphasis) from response
+        english_response = english_response.replace('*', '')
+        context["english_response"] = english_response
+        with self.stage("translate_out", context):
+            if source_lang == "en":
+                final_response = english_response
+            else:
+                final_response = coalesced_translate_from_english(english_response, source_lang, ticket)
+        context["response"] = final_response
+
+        if speak_response:
+            with self.stage("tts", context), stage_slot("tts", ticket):
+                try:
+                    context["audio"] = synthesize(final_response, source_lang)
+                except ValueError as e:
+                    print(f"❌ {e}")
+        return context
+
+    def _answer(self, english_prompt: str, context: dict) -> str:
+        with self.stage("route", context):
+            intent = route_intent(english_prompt)
+        context["intent"] = intent
+        if not intent:
+            discard_prefetch(context["prefetch"])
+            context["prefetch"] = None
+
+        if intent:
+            try:
+                with self.stage("fetch", context):
+                    # A speculative fetch is used only if the English routing agrees with it
+                    data = take_prefetch(context["prefetch"], intent, fetch_key(intent, english_prompt))
+                    context["prefetch"] = None
+                    data = data or coalesced_fetch(intent, english_prompt, context["ticket"])
+                if data:
+                    summary_prompt = api_data_prompt(intent, english_prompt, data)
+                    if summary_prompt is None:
+                        return str(data)
+                    with self.stage("llm", context):
+                        return coalesced_llm(summary_prompt, context["history"], context["ticket"])
+            except (RequestCancelled, Overloaded):
+                raise
+            except Exception as e:
+                print("API fetch or summary failed:", e)
+            context["intent"] = None  # fall through to a plain LLM answer
+
+        if not fits_token_budget(english_prompt):
+            with self.stage("summarize", context):
+                english_prompt, context["keywords"] = coalesced_summarize(english_prompt, context["ticket"])
+
+        with self.stage("llm", context):
+            return coalesced_llm(english_prompt, context["history"], context["ticket"])
+
+
+# === Shared instance ===
+pipeline_instance = PromptPipeline()
+
+def get_pipeline():
+    return pipeline_instance
+
+# === Compatibility helpers (same signatures as the old per-front-end copies) ===
+
+def get_api_data_summary(prompt: str):
+    intent = route_intent(prompt)
+    if not intent:
+        return None
+    try:
+        data = fetch_intent_data(intent, prompt)
+        if not data:
+            return None
+        summary_prompt = api_data_prompt(intent, prompt, data)
+        return data if summary_prompt is None else get_gemini_response(summary_prompt)
+    except Exception as e:
+        print("API fetch or summary failed:", e)
+        return None
+
+def process_prompt_workflow(user_input: str, source_lang: str):
+    context = pipeline_instance.run(user_input, source_lang)
+    return context["response"], context["keywords"]
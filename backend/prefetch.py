@@ -0,0 +1,155 @@
+import os
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from backend.api_utilities import extract_city_name
+from backend.metrics import speculative_prefetches
+from backend.tracing import set_attributes
+
+# Set SPECULATIVE_PREFETCH=0 to wait for the English routing before fetching
+PREFETCH_ENABLED = os.getenv("SPECULATIVE_PREFETCH", "1") != "0"
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "8"))
+
+# === Multilingual tables ===
+# Source-language words that NLLB renders as the English routing keyword ("weather", "news", "time").
+# Checked in route_intent's order, so a prompt with both "weather" and "time" words guesses weather.
+INTENT_KEYWORDS = {
+    "weather": [
+        "मौसम", "हवामान",  # hi, mr, ne, mai, doi
+        "আবহাওয়া", "বতৰ",  # bn, as
+        "હવામાન", "ਮੌਸਮ", "வானிலை", "వాతావరణం", "ಹವಾಮಾನ", "കാലാവസ്ഥ",
+        "موسم",  # ur, ks, sd
+    ],
+    "news": [
+        "समाचार", "खबर", "ख़बर", "न्यूज", "बातमी", "बातम्या",
+        "খবর", "সংবাদ", "বাতৰি", "খবৰ",
+        "સમાચાર", "ਖ਼ਬਰ", "ਖਬਰ", "செய்தி", "వార్త", "ಸುದ್ದಿ", "വാർത്ത",
+        "خبر",
+    ],
+    "time": [
+        "समय", "टाइम", "बजे", "वेळ",
+        "সময়", "বাজে",
+        "સમય", "ਸਮਾਂ", "ਵਜੇ", "நேரம்", "సమయం", "ಸಮಯ", "സമയം",
+        "وقت", "بجے",
+    ],
+}
+
+# Native spellings of the cities extract_city_name knows, in the same order, so the first match
+# here is the city it will find in the English translation
+CITY_NAMES = {
+    "Delhi": ["दिल्ली", "দিল্লি", "દિલ્હી", "ਦਿੱਲੀ", "டெல்லி", "ఢిల్లీ", "ದೆಹಲಿ", "ഡൽഹി", "دہلی", "دلی"],
+    "Mumbai": ["मुंबई", "মুম্বাই", "મુંબઈ", "ਮੁੰਬਈ", "மும்பை", "ముంబై", "ಮುಂಬೈ", "മുംബൈ", "ممبئی"],
+    "Bengaluru": ["बेंगलुरु", "बेंगलूरु", "বেঙ্গালুরু", "બેંગલુરુ", "பெங்களூரு", "బెంగళూరు", "ಬೆಂಗಳೂರು", "ബെംഗളൂരു"],
+    "Chennai": ["चेन्नई", "চেন্নাই", "ચેન્નઈ", "ਚੇਨਈ", "சென்னை", "చెన్నై", "ಚೆನ್ನೈ", "ചെന്നൈ", "چنئی"],
+    "Kolkata": ["कोलकाता", "কলকাতা", "કોલકાતા", "ਕੋਲਕਾਤਾ", "கொல்கத்தா", "కోల్కతా", "ಕೋಲ್ಕತ್ತಾ", "കൊൽക്കത്ത", "کولکاتا"],
+    "Hyderabad": ["हैदराबाद", "হায়দরাবাদ", "હૈદરાબાદ", "ਹੈਦਰਾਬਾਦ", "ஹைதராபாத்", "హైదరాబాద్", "ಹೈದರಾಬಾದ್", "ഹൈദരാബാദ്", "حیدرآباد"],
+    "Pune": ["पुणे", "পুনে", "પુણે", "ਪੁਣੇ", "புனே", "పూణే", "ಪುಣೆ", "പൂനെ", "پونے"],
+    "Ahmedabad": ["अहमदाबाद", "আহমেদাবাদ", "અમદાવાદ", "ਅਹਿਮਦਾਬਾਦ", "அகமதாபாத்", "అహ్మదాబాద్", "ಅಹಮದಾಬಾದ್", "അഹമ്മദാബാദ്"],
+    "Jaipur": ["जयपुर", "জয়পুর", "જયપુર", "ਜੈਪੁਰ", "ஜெய்ப்பூர்", "జైపూర్", "ಜೈಪುರ", "ജയ്പൂർ", "جے پور"],
+    "Lucknow": ["लखनऊ", "লখনউ", "લખનૌ", "ਲਖਨਊ", "லக்னோ", "లక్నో", "ಲಕ್ನೋ", "ലഖ്നൗ", "لکھنؤ"],
+    "Kanpur": ["कानपुर", "কানপুর", "કાનપુર", "ਕਾਨਪੁਰ", "கான்பூர்", "కాన్పూర్", "ಕಾನ್ಪುರ", "کانپور"],
+    "Nagpur": ["नागपुर", "নাগপুর", "નાગપુર", "ਨਾਗਪੁਰ", "நாக்பூர்", "నాగపూర్", "ನಾಗಪುರ", "ناگپور"],
+    "Indore": ["इंदौर", "ইন্দোর", "ઇન્દોર", "ਇੰਦੌਰ", "இந்தூர்", "ఇండోర్", "ಇಂದೋರ್", "اندور"],
+    "Bhopal": ["भोपाल", "ভোপাল", "ભોપાલ", "ਭੋਪਾਲ", "போபால்", "భోపాల్", "ಭೋಪಾಲ್", "ഭോപ്പാൽ", "بھوپال"],
+    "Patna": ["पटना", "পাটনা", "પટના", "ਪਟਨਾ", "பாட்னா", "పాట్నా", "ಪಾಟ್ನಾ", "پٹنہ"],
+    "Agra": ["आगरा", "আগ্রা", "આગ્રા", "ਆਗਰਾ", "ஆக்ரா", "ఆగ్రా", "ಆಗ್ರಾ", "آگرہ"],
+    "Varanasi": ["वाराणसी", "বারাণসী", "વારાણસી", "ਵਾਰਾਣਸੀ", "வாரணாசி", "వారణాసి", "ವಾರಣಾಸಿ", "വാരാണസി", "وارانسی"],
+    "Srinagar": ["श्रीनगर", "শ্রীনগর", "શ્રીનગર", "ਸ੍ਰੀਨਗਰ", "ஸ்ரீநகர்", "శ్రీనగర్", "ಶ್ರೀನಗರ", "ശ്രീനഗർ", "سری نگر"],
+    "Amritsar": ["अमृतसर", "অমৃতসর", "અમૃતસર", "ਅੰਮ੍ਰਿਤਸਰ", "அமிர்தசரஸ்", "అమృత్సర్", "ಅಮೃತಸರ", "امرتسر"],
+    "Ranchi": ["रांची", "রাঁচি", "રાંચી", "ਰਾਂਚੀ", "ராஞ்சி", "రాంచీ", "ರಾಂಚಿ", "റാഞ്ചി", "رانچی"],
+    "Coimbatore": ["कोयंबटूर", "কোয়েম্বাটুর", "કોઇમ્બતુર", "ਕੋਇੰਬਟੂਰ", "கோயம்புத்தூர்", "కోయంబత్తూరు", "ಕೊಯಮತ್ತೂರು", "കോയമ്പത്തൂർ"],
+    "Madurai": ["मदुरै", "মাদুরাই", "મદુરાઈ", "ਮਦੁਰੈ", "மதுரை", "మదురై", "ಮಧುರೈ"],
+    "Guwahati": ["गुवाहाटी", "গুৱাহাটী", "গুয়াহাটি", "ગુવાહાટી", "ਗੁਹਾਟੀ", "குவஹாத்தி", "గౌహతి", "ಗುವಾಹಾಟಿ", "ഗുവാഹത്തി"],
+    "Chandigarh": ["चंडीगढ़", "চণ্ডীগড়", "ચંડીગઢ", "ਚੰਡੀਗੜ੍ਹ", "சண்டிகர்", "చండీగఢ్", "ಚಂಡೀಗಢ", "ചണ്ഡീഗഢ്", "چندی گڑھ"],
+    "Mysore": ["मैसूर", "মহীশূর", "મૈસુર", "ਮੈਸੂਰ", "மைசூர்", "మైసూరు", "ಮೈಸೂರು", "മൈസൂർ", "میسور"],
+    "Thiruvananthapuram": ["तिरुवनंतपुरम", "তিরুবনন্তপুরম", "તિરુવનંતપુરમ", "திருவனந்தபுரம்", "తిరువనంతపురం", "ತಿರುವನಂತಪುರಂ", "തിരുവനന്തപുരം"],
+    "Visakhapatnam": ["विशाखापत्तनम", "বিশাখাপত্তনম", "વિશાખાપટ્ટનમ", "விசாகப்பட்டினம்", "విశాఖపట్నం", "ವಿಶಾಖಪಟ್ಟಣಂ", "വിശാഖപട്ടണം"],
+}
+
+# Zero-width (non-)joiners vary between keyboards; NFC settles nukta and vowel-sign forms
+_JOINERS = re.compile("[\u200c\u200d]")
+
+
+def _normalize(text):
+    return _JOINERS.sub("", unicodedata.normalize("NFC", text)).lower()
+
+_INTENT_TABLE = [(intent, [_normalize(w) for w in words]) for intent, words in INTENT_KEYWORDS.items()]
+_CITY_TABLE = [(city, [_normalize(n) for n in names]) for city, names in CITY_NAMES.items()]
+
+
+def guess_intent(text: str):
+    normalized = _normalize(text)
+    for intent, words in _INTENT_TABLE:
+        if intent in normalized or any(word in normalized for word in words):
+            return intent
+    return None
+
+def guess_city(text: str):
+    normalized = _normalize(text)
+    for city, names in _CITY_TABLE:
+        if any(name in normalized for name in names):
+            return city
+    return extract_city_name(text)  # romanized names in mixed-script prompts
+
+
+def speculate(text: str):
+    """(intent, fetch key, English stand-in prompt) for a source-language prompt, or None"""
+    intent = guess_intent(text)
+    if intent is None:
+        return None
+    if intent == "time":
+        return intent, None, "time"  # the time fetch ignores the prompt
+    city = guess_city(text)
+    if intent == "weather":
+        return intent, city, f"weather in {city}" if city else "weather"  # no city → the API's default
+    if city is None:
+        return None  # a news query without a city is the English prompt itself
+    return intent, city, f"news in {city}"
+
+
+class Prefetch:
+    def __init__(self, intent, key, future):
+        self.intent = intent
+        self.key = key
+        self.future = future
+
+
+# === Shared executor ===
+prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+
+
+def start_prefetch(text: str, fetch):
+    """Start fetch(intent, prompt) for the intent guessed from the source-language text"""
+    if not PREFETCH_ENABLED:
+        return None
+    guess = speculate(text)
+    if guess is None:
+        return None
+    intent, key, prompt = guess
+    set_attributes(**{"prefetch.intent": intent, "prefetch.key": key})
+    # Run in a copy of the caller's context so the fetch stays in the request's trace span
+    return Prefetch(intent, key, prefetch_executor.submit(copy_context().run, fetch, intent, prompt))
+
+
+def discard_prefetch(prefetch):
+    if prefetch is not None:
+        prefetch.future.cancel()  # not started yet → never runs; otherwise its result is dropped
+        speculative_prefetches.inc(intent=prefetch.intent, outcome="discarded")
+
+
+def take_prefetch(prefetch, intent, key):
+    """Prefetched data if the English routing agrees (same intent and fetch key), else None"""
+    if prefetch is None:
+        return None
+    if prefetch.intent != intent or prefetch.key != key:
+        discard_prefetch(prefetch)
+        return None
+    try:
+        data = prefetch.future.result()
+    except Exception as e:
+        print(f"⚠️ Speculative fetch failed: {e}")
+        data = None
+    speculative_prefetches.inc(intent=intent, outcome="used" if data else "failed")
+    return data
@@ -1,17 +1,37 @@
+import os
 import re
+import threading
+import time
 from sklearn.feature_extraction.text import TfidfVectorizer
 import numpy as np
 
+# Summarizer checkpoint (a smaller BART such as a distilled or tiny one can be swapped in)
+SUMMARIZER_MODEL = os.getenv("SUMMARIZER_MODEL", "facebook/bart-base")
+
 # Optional: Load BART model from Hugging Face on CPU only
 try:
     from transformers import pipeline, AutoModelForSeq2SeqLM, AutoTokenizer
     import torch
 
-    bart_tokenizer = AutoTokenizer.from_pretrained("facebook/bart-base")
-    bart_model = AutoModelForSeq2SeqLM.from_pretrained("facebook/bart-base").to("cpu")
+    bart_tokenizer = AutoTokenizer.from_pretrained(SUMMARIZER_MODEL)
+    bart_model = AutoModelForSeq2SeqLM.from_pretrained(SUMMARIZER_MODEL).to("cpu")
     summarizer = pipeline("summarization", model=bart_model, tokenizer=bart_tokenizer, device=-1)
+    try:
+        from backend.metrics import record_model_event
+        record_model_event("summarizer", "load")
+    except ImportError:
+        pass  # running standalone outside the package
 except ImportError:
     summarizer = None
+except OSError as e:
+    # Checkpoint not downloadable (e.g. offline with an empty cache): use the TF-IDF fallback
+    print(f"⚠️ Could not load summarizer {SUMMARIZER_MODEL}, using TF-IDF: {e}")
+    summarizer = None
+
+try:
+    from backend.tracing import set_attributes as _set_span_attributes
+except ImportError:
+    _set_span_attributes = None  # running standalone outside the package
 
 # === SIMPLE SENTENCE SPLITTER ===
 
@@ -36,13 +56,13 @@ def extract_keywords(text: str, top_k: int = 5) -> list:
 
 # === SUMMARIZER (Aggressive Extractive or BART if available) ===
 
-def summarize_text(text: str, num_sentences: int = 3) -> str:
+def summarize_text(text: str, num_sentences: int = 3, max_length: int = 120) -> str:
     """
     Summarizes the text using BART if available; otherwise falls back to TF-IDF extractive method.
     """
     if summarizer:
         try:
-            result = summarizer(text, max_length=120, min_length=60, do_sample=False)
+            result = summarizer(text, max_length=max_length, min_length=max_length // 2, do_sample=False)
             return result[0]['summary_text']
         except Exception:
             pass  # fallback in case BART fails
@@ -67,21 +87,261 @@ def friendly_clean(prompt: str) -> str:
     prompt = re.sub(r"\n+", " ", prompt)             # Replace newlines with spaces
     return prompt
 
+# === TOKEN BUDGET ===
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "75"))
+CHARS_PER_TOKEN = 4  # Gemini's documented rule of thumb for English text
+
+
+_count_tokenizer = None
+_count_tokenizer_lock = threading.Lock()
+
+
+def _nllb_tokenizer():
+    """
+    The NLLB tokenizer on its own (no model), loaded once. Returns False when it cannot be
+    loaded, so counting falls back to the character estimate for the whole process.
+    """
+    global _count_tokenizer
+    with _count_tokenizer_lock:
+        if _count_tokenizer is None:
+            try:
+                from transformers import NllbTokenizerFast
+                from backend.translator import TRANSLATOR_MODEL
+                _count_tokenizer = NllbTokenizerFast.from_pretrained(TRANSLATOR_MODEL)
+            except (ImportError, OSError, ValueError) as e:
+                print(f"⚠️ Could not load the NLLB tokenizer, estimating tokens from characters: {e}")
+                _count_tokenizer = False
+        return _count_tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counts NLLB tokens, or estimates Gemini tokens from the character count
+    if the NLLB tokenizer cannot be loaded.
+    """
+    tokenizer = _nllb_tokenizer()
+    if tokenizer:
+        # Straight to the Rust tokenizer, like NLLBTranslator.encode, so it is safe across threads
+        return sum(tokenizer.backend_tokenizer.encode(text, add_special_tokens=False).attention_mask)
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def fits_token_budget(text: str, token_budget: int = None) -> bool:
+    budget = PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    return count_tokens(text.strip()) <= budget
+
+
+def extract_to_budget(text: str, token_budget: int) -> str:
+    """
+    Keeps the highest scoring TF-IDF sentences (in original order) that fit in the budget.
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        return text
+
+    tfidf = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), max_df=0.9)
+    try:
+        sentence_scores = tfidf.fit_transform(sentences).sum(axis=1).A1
+    except ValueError:
+        sentence_scores = np.zeros(len(sentences))  # empty vocabulary: keep the leading sentences
+
+    chosen = []
+    used = 0
+    for i in np.argsort(-sentence_scores, kind="stable"):
+        cost = count_tokens(sentences[i])
+        if chosen and used + cost > token_budget:
+            continue
+        chosen.append(i)
+        used += cost
+    chosen.sort()
+    return ' '.join([sentences[i] for i in chosen])
+
+
+def compress_to_budget(text: str, token_budget: int = None):
+    """
+    Runs the cheapest compression method whose output fits the token budget:
+    no-op → stopword stripping → extractive (TF-IDF) → abstractive (BART).
+    Returns (compressed_text, method). If nothing fits, the shortest result is returned.
+    """
+    budget = PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    start_time = time.perf_counter()
+    original_tokens = count_tokens(text)
+    if original_tokens <= budget:
+        return text, "noop"
+
+    methods = [
+        ("stopwords", remove_stopwords),
+        ("extractive", lambda t: extract_to_budget(t, budget)),
+    ]
+    if summarizer:
+        methods.append(("abstractive", lambda t: summarize_text(t, max_length=max(budget, 16))))
+
+    best_text, best_method, best_tokens = text, "noop", original_tokens
+    for method, compress in methods:
+        candidate = compress(text)
+        tokens = count_tokens(candidate)
+        if tokens < best_tokens:
+            best_text, best_method, best_tokens = candidate, method, tokens
+        if tokens <= budget:
+            break
+
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    if _set_span_attributes:
+        _set_span_attributes(**{"compress.method": best_method, "compress.tokens_saved": original_tokens - best_tokens})
+    print(
+        f"🗜️ Compressed prompt with {best_method}: ~{original_tokens} → {best_tokens} tokens "
+        f"(saved ~{original_tokens - best_tokens}, budget {budget}) in {elapsed_ms:.1f} ms"
+    )
+    return best_text, best_method
+
 # === TOOL INPUT OPTIMIZER ===
 
-def optimize_tool_input(prompt: str) -> str:
+def optimize_tool_input(prompt: str, token_budget: int = None) -> str:
     cleaned = friendly_clean(prompt)
-    if len(cleaned) > 300:
-        return summarize_text(cleaned, num_sentences=2)
-    return cleaned
+    compressed, _ = compress_to_budget(cleaned, token_budget)
+    return compressed
 
 # === FOR IMPORT IN MAIN ===
 
-def get_optimized_prompt_and_keywords(prompt: str):
-    optimized = optimize_tool_input(prompt)
+def get_optimized_prompt_and_keywords(prompt: str, token_budget: int = None):
+    optimized = optimize_tool_input(prompt, token_budget)
     keywords = extract_keywords(optimized)
     return optimized, keywords
 
+# === BATCH OPTIMIZER (Offline / Bulk Workloads) ===
+
+DEFAULT_BATCH_SIZE = int(os.getenv("PROMPT_BATCH_SIZE", "8"))
+
+
+def summarize_batch(texts: list, num_sentences: int = 3, batch_size: int = DEFAULT_BATCH_SIZE,
+                    max_length: int = 120) -> list:
+    """
+    Summarizes many texts at once and returns the summaries in input order.
+    Texts are sorted by length so each BART batch pads to a similar size;
+    if BART is unavailable or fails, the whole batch is scored with one TF-IDF fit.
+    """
+    if not texts:
+        return []
+
+    if summarizer:
+        try:
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            summaries = [None] * len(texts)
+            for start in range(0, len(order), batch_size):
+                chunk = order[start:start + batch_size]
+                results = summarizer(
+                    [texts[i] for i in chunk],
+                    max_length=max_length, min_length=max_length // 2, do_sample=False,
+                    truncation=True, batch_size=len(chunk)
+                )
+                for i, result in zip(chunk, results):
+                    summaries[i] = result['summary_text']
+            return summaries
+        except Exception:
+            pass  # fallback in case BART fails
+
+    return tfidf_summarize_batch(texts, num_sentences=num_sentences)
+
+
+def tfidf_summarize_batch(texts: list, num_sentences: int = 3) -> list:
+    """
+    Extractive summaries for a batch, fitting a single TF-IDF model over every sentence in it.
+    """
+    split_texts = [split_sentences(text) for text in texts]
+    summaries = list(texts)
+
+    # Only texts longer than the requested summary need scoring
+    pending = [i for i, sentences in enumerate(split_texts) if len(sentences) > num_sentences]
+    if not pending:
+        return summaries
+
+    all_sentences = []
+    for i in pending:
+        all_sentences.extend(split_texts[i])
+
+    tfidf = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), max_df=0.9)
+    try:
+        sentence_scores = tfidf.fit_transform(all_sentences).sum(axis=1).A1
+    except ValueError:
+        return summaries  # vocabulary is empty (e.g. only stopwords)
+
+    offset = 0
+    for i in pending:
+        count = len(split_texts[i])
+        scores = sentence_scores[offset:offset + count]
+        ranked_indices = np.sort(np.argsort(scores)[::-1][:num_sentences])
+        summaries[i] = ' '.join([split_texts[i][j] for j in ranked_indices])
+        offset += count
+    return summaries
+
+
+class BatchPromptOptimizer:
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, window_batches: int = 4, token_budget: int = None):
+        # Prompts are read in windows of batch_size * window_batches so results can stream
+        self.batch_size = max(1, batch_size)
+        self.token_budget = PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+        self.window_size = self.batch_size * max(1, window_batches)
+        self.stats = {"prompts": 0, "summarized": 0, "chars_in": 0, "chars_out": 0, "seconds": 0.0}
+
+    def optimize(self, prompts):
+        """
+        Yields (optimized_prompt, keywords) for every prompt in the iterable, in order.
+        """
+        window = []
+        for prompt in prompts:
+            window.append(prompt)
+            if len(window) >= self.window_size:
+                yield from self._optimize_window(window)
+                window = []
+        if window:
+            yield from self._optimize_window(window)
+        self.report()
+
+    def _optimize_window(self, window: list):
+        start_time = time.perf_counter()
+        cleaned = [friendly_clean(prompt) for prompt in window]
+
+        # Same rule as optimize_tool_input: only prompts over the token budget are summarized
+        long_indices = [i for i, text in enumerate(cleaned) if not fits_token_budget(text, self.token_budget)]
+        summaries = summarize_batch(
+            [cleaned[i] for i in long_indices], num_sentences=2,
+            batch_size=self.batch_size, max_length=max(self.token_budget, 16)
+        )
+        optimized = list(cleaned)
+        for i, summary in zip(long_indices, summaries):
+            optimized[i] = summary
+
+        results = [(text, extract_keywords(text) if text.strip() else []) for text in optimized]
+
+        self.stats["prompts"] += len(window)
+        self.stats["summarized"] += len(long_indices)
+        self.stats["chars_in"] += sum(len(text) for text in cleaned)
+        self.stats["chars_out"] += sum(len(text) for text in optimized)
+        self.stats["seconds"] += time.perf_counter() - start_time
+        return results
+
+    def throughput(self) -> float:
+        # Prompts per second of optimizer time
+        if not self.stats["seconds"]:
+            return 0.0
+        return self.stats["prompts"] / self.stats["seconds"]
+
+    def report(self):
+        print(
+            f"📦 Batch optimizer: {self.stats['prompts']} prompts "
+            f"({self.stats['summarized']} summarized) in {self.stats['seconds']:.2f}s "
+            f"→ {self.throughput():.1f} prompts/s, "
+            f"{self.stats['chars_in']} → {self.stats['chars_out']} chars"
+        )
+
+
+def optimize_prompts_batch(prompts, batch_size: int = DEFAULT_BATCH_SIZE, token_budget: int = None):
+    """
+    Batched counterpart of get_optimized_prompt_and_keywords for bulk jobs.
+    """
+    return BatchPromptOptimizer(batch_size=batch_size, token_budget=token_budget).optimize(prompts)
+
 # === EXAMPLE TEST ===
 
 if __name__ == "__main__":
@@ -101,3 +361,7 @@ if __name__ == "__main__":
 
     print("\n--- Extracted Keywords ---")
     print(keywords)
+
+    print("\n--- Batch Optimization ---")
+    for optimized, keywords in optimize_prompts_batch([sample_prompt, "What is AI?"] * 4, batch_size=4):
+        print(keywords)
@@ -0,0 +1,164 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+# Session configuration
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")  # "memory" or "redis"
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_HISTORY_LIMIT = int(os.getenv("SESSION_HISTORY_LIMIT", "20"))  # chat turns kept per session
+
+SESSION_HEADER = "X-Session-ID"
+SESSION_COOKIE = "session_id"
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{8,128}$")
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+def is_valid_session_id(session_id) -> bool:
+    return bool(session_id) and bool(SESSION_ID_PATTERN.match(session_id))
+
+def new_session() -> dict:
+    """Per-client state: selected mode, pinned language hint and recent chat turns"""
+    return {"mode": None, "language": None, "history": []}
+
+def add_turn(session: dict, user_input: str, context: dict, limit: int = SESSION_HISTORY_LIMIT):
+    """Append one pipeline result to the session history (oldest turns are dropped)"""
+    session["history"].append({
+        "input": user_input,
+        "response": context["response"],
+        "language": context["source_lang"],
+        "english_prompt": context["english_prompt"],
+        "english_response": context.get("english_response"),
+        "time": time.time(),
+    })
+    del session["history"][:-limit]
+
+def llm_history(session: dict) -> list:
+    """English (prompt, response) pairs for the LLM, oldest first"""
+    return [
+        (turn["english_prompt"], turn["english_response"])
+        for turn in session["history"]
+        if turn.get("english_prompt") and turn.get("english_response")
+    ]
+
+
+class InMemorySessionStore:
+    """Sessions in this process only; fine for a single worker"""
+
+    def __init__(self, ttl_seconds=SESSION_TTL_SECONDS, purge_interval_seconds=60):
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+        self.sessions = {}  # session_id → (expires_at, JSON string)
+        self.lock = threading.Lock()
+        self.next_purge = time.time() + purge_interval_seconds
+
+    def get(self, session_id) -> dict:
+        now = time.time()
+        with self.lock:
+            entry = self.sessions.get(session_id)
+            if entry is None or entry[0] < now:
+                self.sessions.pop(session_id, None)
+                return new_session()
+        # Stored as JSON so callers get a copy and behave the same as with Redis
+        return json.loads(entry[1])
+
+    def update(self, session_id, function):
+        """Read, change (function(session) edits it in place) and save the session atomically"""
+        with self.lock:
+            entry = self.sessions.get(session_id)
+            session = json.loads(entry[1]) if entry and entry[0] >= time.time() else new_session()
+            function(session)
+            self._write(session_id, json.dumps(session, ensure_ascii=False))
+        return session
+
+    def save(self, session_id, session):
+        data = json.dumps(session, ensure_ascii=False)
+        with self.lock:
+            self._write(session_id, data)
+
+    def delete(self, session_id):
+        with self.lock:
+            self.sessions.pop(session_id, None)
+
+    def _write(self, session_id, data):
+        # Caller holds self.lock; expired sessions are swept at most once per purge interval
+        now = time.time()
+        self.sessions[session_id] = (now + self.ttl_seconds, data)
+        if now >= self.next_purge:
+            self._purge_expired(now)
+            self.next_purge = now + self.purge_interval_seconds
+
+    def _purge_expired(self, now):
+        for session_id in [key for key, (expires_at, _) in self.sessions.items() if expires_at < now]:
+            del self.sessions[session_id]
+
+    def __len__(self):
+        return len(self.sessions)
+
+
+class RedisSessionStore:
+    """
+    Sessions in Redis (or any server speaking its protocol, e.g. Valkey or KeyDB),
+    so every worker behind a load balancer sees the same state.
+    """
+
+    def __init__(self, url=REDIS_URL, ttl_seconds=SESSION_TTL_SECONDS, client=None, prefix="promptbridge:session:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("❌ SESSION_BACKEND=redis needs the 'redis' package: pip install redis")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, session_id) -> dict:
+        data = self.client.get(self.prefix + session_id)
+        return json.loads(data) if data else new_session()
+
+    def update(self, session_id, function):
+        """Read, change and save the session with WATCH/MULTI, retrying if another worker wrote it meanwhile"""
+        key = self.prefix + session_id
+
+        def apply(pipe):
+            data = pipe.get(key)
+            session = json.loads(data) if data else new_session()
+            function(session)
+            pipe.multi()
+            pipe.set(key, json.dumps(session, ensure_ascii=False), ex=self.ttl_seconds)
+            return session
+
+        return self.client.transaction(apply, key, value_from_callable=True)
+
+    def save(self, session_id, session):
+        self.client.set(self.prefix + session_id, json.dumps(session, ensure_ascii=False), ex=self.ttl_seconds)
+
+    def delete(self, session_id):
+        self.client.delete(self.prefix + session_id)
+
+
+def build_session_store(kind=SESSION_BACKEND):
+    if kind == "redis":
+        print(f"📡 Using Redis session store at {REDIS_URL}")
+        return RedisSessionStore()
+    return InMemorySessionStore()
+
+
+# === Shared instance ===
+session_store = None
+
+def get_session_store():
+    global session_store
+    if session_store is None:
+        session_store = build_session_store()
+    return session_store
+
+def set_session_store(store):
+    global session_store
+    session_store = store
@@ -0,0 +1,92 @@
+import os
+import re
+import threading
+import unicodedata
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from backend.admission import Overloaded
+from backend.metrics import admission_rejections, singleflight_calls, coalesced_calls
+from backend.tracing import set_attributes
+
+# Set SINGLEFLIGHT=0 to run every call on its own
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT", "1") != "0"
+WAIT_SLICE_SECONDS = 0.1  # how often a joined caller checks its own ticket
+
+
+def normalize_text(text: str) -> str:
+    """Same text up to Unicode form and whitespace → same key (and the same stage input)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: the first caller for a key runs the function,
+    callers arriving while it runs wait and get the same result (or exception).
+    Nothing is cached; once the call returns the next caller runs it again.
+    A waiting caller with a ticket stops waiting when its own request is cancelled or
+    its deadline passes; the call it joined keeps running for the others.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.lock = threading.Lock()
+        self.in_flight = {}  # key → Future of the running call
+
+    def do(self, key, function, *args, ticket=None, **kwargs):
+        if not SINGLEFLIGHT_ENABLED:
+            return function(*args, **kwargs)
+
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self.in_flight[key] = Future()
+        singleflight_calls.inc(stage=self.stage)
+
+        if not leader:
+            coalesced_calls.inc(stage=self.stage)
+            set_attributes(**{"singleflight.coalesced": True})
+            return self._wait(future, ticket)
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def _wait(self, future, ticket):
+        while True:
+            timeout = WAIT_SLICE_SECONDS
+            if ticket is not None:
+                try:
+                    ticket.check()
+                    if ticket.remaining() <= 0:
+                        admission_rejections.inc(reason="deadline", priority=ticket.priority_class)
+                        raise Overloaded(f"Deadline passed waiting for a coalesced {self.stage} call", 1)
+                except Exception as e:
+                    e.ticket = ticket  # this caller's own failure, not the joined call's
+                    raise
+                timeout = min(timeout, max(0.001, ticket.remaining()))
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeout:
+                if future.done():
+                    return future.result()  # finished just now, or the joined call itself timed out
+
+
+# === Shared per-stage instances ===
+translate_flight = SingleFlight("translate")
+fetch_flight = SingleFlight("fetch")
+summarize_flight = SingleFlight("summarize")
+llm_flight = SingleFlight("llm")
+
+
+def history_key(history):
+    # Turns are lists after a JSON round trip through the session store
+    return None if history is None else tuple(tuple(turn) for turn in history)
@@ -1,119 +1,434 @@
 import sounddevice as sd
 import numpy as np
+import queue
 import threading
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
+from concurrent.futures import Future
 from typing import Optional
+import io
 import torch
 import time
+import os
+
+from models import AVAILABLE_MODELS
+from backend.decoding_policy import get_decoding_policy
+from backend.metrics import record_model_event, observe_stage
+from backend.tracing import set_attributes
 
 # Audio parameters
 sample_rate = 16000
-block_duration = 5  # seconds
+vad_frame_duration = 0.03  # seconds per VAD frame
+vad_energy_threshold = 0.01  # RMS above this counts as speech
+silence_duration = 0.6  # trailing silence that closes a chunk
+max_chunk_duration = 8  # force a chunk boundary during long speech
+overlap_duration = 0.5  # audio carried into the next chunk (and pre-roll before speech)
+ring_capacity_seconds = 30
+language_pin_min_probability = 0.5  # confidence needed before a detected language is pinned
+
+# Whisper configuration (env overrides; "auto" picks based on the hardware)
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE") or AVAILABLE_MODELS["whisper"].split("whisper-")[-1]
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "auto")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "auto")
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))
+WHISPER_NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", "1"))
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
 
 # Global model (lazy-loaded)
 model = None
+loaded_config = None
 
 # Globals
-final_transcript = []
-stop_recording = threading.Event()
-is_recording = False
+active_session = None
+
+def available_cpu_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def resolve_whisper_config(model_size=None, device=None, compute_type=None, cpu_threads=None, num_workers=None):
+    """
+    Resolve the Whisper settings: CUDA + float16 when a GPU is present,
+    otherwise CPU + int8 with the available cores split across workers.
+    """
+    device = device or WHISPER_DEVICE
+    if device == "auto":
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    compute_type = compute_type or WHISPER_COMPUTE_TYPE
+    if compute_type == "auto":
+        compute_type = "float16" if device == "cuda" else "int8"
+
+    num_workers = max(1, num_workers or WHISPER_NUM_WORKERS)
+    cpu_threads = cpu_threads or WHISPER_CPU_THREADS
+    if not cpu_threads and device == "cpu":
+        cpu_threads = max(1, available_cpu_cores() // num_workers)
 
-def load_whisper():
-    """Load the Whisper model if not already loaded"""
-    global model
+    return {
+        "model_size_or_path": model_size or WHISPER_MODEL_SIZE,
+        "device": device,
+        "compute_type": compute_type,
+        "cpu_threads": cpu_threads or 0,
+        "num_workers": num_workers,
+    }
+
+def load_whisper(**overrides):
+    """Load the Whisper model if not already loaded (reloads if the requested config differs)"""
+    global model, loaded_config
+    config = resolve_whisper_config(**overrides)
+    if model is not None and config != loaded_config:
+        unload_whisper()
     if model is None:
-        print("🎤 Loading Whisper model...")
-        model = WhisperModel("medium", compute_type="float16", device="cuda")
+        print(f"🎤 Loading Whisper model ({config['model_size_or_path']} on {config['device']}, {config['compute_type']})...")
+        model = WhisperModel(**config)
+        loaded_config = config
+        record_model_event("whisper", "load")
         print("✅ Whisper model loaded.")
+    return model
 
 def unload_whisper():
     """Unload the Whisper model and free GPU memory"""
-    global model
+    global model, loaded_config
     if model:
         print("🧹 Unloading Whisper model...")
         del model
         model = None
+        loaded_config = None
         torch.cuda.empty_cache()
+        record_model_event("whisper", "unload")
         print("✅ Whisper model unloaded.")
 
-def transcribe_block():
-    """Record and transcribe a block of audio"""
-    global model
-    audio = sd.rec(int(sample_rate * block_duration), samplerate=sample_rate, channels=1)
-    sd.wait()
-    audio_array = np.squeeze(audio)
-
+def transcribe_chunk(audio_array, queue_depth=0, language=None):
+    """
+    Transcribe one VAD-segmented chunk of audio.
+    Returns (text, info); pass language to skip Whisper's language identification.
+    """
     if not np.any(audio_array):
-        print("⚠️ Skipping silent audio block")
-        return
+        print("⚠️ Skipping silent audio chunk")
+        return "", None
 
-    print("📡 Transcribing...")
-    segments_gen, _ = model.transcribe(
+    options = get_decoding_policy().options(len(audio_array) / sample_rate, queue_depth)
+    print(f"📡 Transcribing (beam {options['beam_size']})...")
+    set_attributes(**{"model.device": loaded_config["device"], "whisper.beam_size": options["beam_size"]})
+    start_time = time.perf_counter()
+    segments_gen, info = model.transcribe(
         audio_array,
-        language=None,
-        beam_size=10,
-        vad_filter=True,
-        vad_parameters={"threshold": 0.5}
+        language=language,
+        **options
     )
+    text = " ".join(segment.text.strip() for segment in segments_gen if segment.text.strip())
+    observe_stage("transcribe", time.perf_counter() - start_time)
+    return text, info
+
+def merge_overlap(previous_text, new_text, max_words=8):
+    """Drop leading words of new_text that repeat the tail of previous_text (from chunk overlap)"""
+    def normalize(word):
+        return word.strip(".,!?;:\"'").lower()
+
+    previous_words = [normalize(w) for w in previous_text.split()[-max_words:]]
+    new_words = new_text.split()
+    for size in range(min(len(previous_words), len(new_words)), 0, -1):
+        if previous_words[-size:] == [normalize(w) for w in new_words[:size]]:
+            return " ".join(new_words[size:])
+    return new_text
+
+
+class AudioRingBuffer:
+    """
+    Single-producer / single-consumer ring buffer of float32 samples.
+    The producer only advances write_pos and the consumer only advances read_pos,
+    so the audio callback never waits on a lock.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.write_pos = 0
+        self.read_pos = 0
+        self.dropped = 0
+
+    def available(self):
+        return self.write_pos - self.read_pos
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        free = self.capacity - self.available()
+        if len(samples) > free:
+            # Consumer fell behind: drop the newest audio rather than overwrite unread samples
+            self.dropped += len(samples) - free
+            samples = samples[:free]
+
+        count = len(samples)
+        if count == 0:
+            return 0
+        start = self.write_pos % self.capacity
+        first = min(count, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        self.buffer[:count - first] = samples[first:]
+        self.write_pos += count  # publish only after the samples are in place
+        return count
+
+    def read(self, max_samples=None):
+        count = self.available() if max_samples is None else min(max_samples, self.available())
+        start = self.read_pos % self.capacity
+        first = min(count, self.capacity - start)
+        samples = np.concatenate((self.buffer[start:start + first], self.buffer[:count - first]))
+        self.read_pos += count
+        return samples
+
+
+class StreamingTranscriber:
+    """
+    Captures audio continuously into a ring buffer while a decoder thread cuts it into
+    VAD-segmented, overlapping chunks and transcribes them. Each chunk's text is published
+    as a partial transcript as soon as it is decoded.
+    """
+
+    def __init__(self, on_partial=None, language=None):
+        self.ring = AudioRingBuffer(int(sample_rate * ring_capacity_seconds))
+        self.on_partial = on_partial
+        # Session language hint: detected once from the first confident chunk, then pinned
+        self.language = language
+        self.partials = queue.Queue()
+        self.transcript = []
+        self.stop_event = threading.Event()
+        self.decoder_thread = None
+        self.stream = None
+        self.is_running = False
+
+    def feed(self, samples):
+        """Push audio samples from any source (microphone callback, network, file)"""
+        return self.ring.write(samples)
+
+    def _audio_callback(self, indata, frames, time_info, status):
+        if status:
+            print(f"⚠️ Audio input status: {status}")
+        self.ring.write(indata[:, 0])
+
+    def start(self, use_microphone=True):
+        load_whisper()
+        self.stop_event.clear()
+        self.is_running = True
+        self.decoder_thread = threading.Thread(target=self._decode_loop, daemon=True)
+        self.decoder_thread.start()
+
+        if use_microphone:
+            self.stream = sd.InputStream(
+                samplerate=sample_rate,
+                channels=1,
+                dtype="float32",
+                blocksize=int(sample_rate * vad_frame_duration),
+                callback=self._audio_callback
+            )
+            self.stream.start()
+        print("\n🎤 Recording started. Speak now!")
+
+    def stop(self, timeout=None):
+        """Stop capture, let the decoder flush the remaining audio, and return the full transcript"""
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+        self.stop_event.set()
+        if self.decoder_thread is not None:
+            self.decoder_thread.join(timeout)
+        self.is_running = False
+        if self.ring.dropped:
+            print(f"⚠️ Dropped {self.ring.dropped} samples because decoding fell behind")
+        print("\n🛑 Recording stopped.")
+        return self.full_transcript()
+
+    def full_transcript(self):
+        return " ".join(self.transcript)
+
+    def backlog_depth(self):
+        # Ring fill mapped onto the decoding policy's queue depths: half full counts as busy and
+        # a full ring as overloaded, so decoding turns greedy before audio starts being dropped
+        policy = get_decoding_policy()
+        return int(self.ring.available() / self.ring.capacity * policy.overload_queue_depth)
+
+    def _publish(self, audio):
+        text, info = transcribe_chunk(audio, queue_depth=self.backlog_depth(), language=self.language)
+        if self.language is None and info is not None and info.language_probability >= language_pin_min_probability:
+            self.language = info.language
+            print(f"📌 Pinned session language: {self.language} ({info.language_probability:.2f})")
+        if self.transcript:
+            text = merge_overlap(self.transcript[-1], text)
+        if not text:
+            return
+        print(f"🗣️ {text}")
+        self.transcript.append(text)
+        self.partials.put(text)
+        if self.on_partial:
+            self.on_partial(text)
+
+    def _decode_loop(self):
+        frame_size = int(sample_rate * vad_frame_duration)
+        silence_frames = int(silence_duration / vad_frame_duration)
+        max_frames = int(max_chunk_duration / vad_frame_duration)
+        overlap_frames = int(overlap_duration / vad_frame_duration)
+
+        pending = np.zeros(0, dtype=np.float32)
+        chunk = []
+        speech_seen = False
+        silent_run = 0
+
+        while True:
+            stopping = self.stop_event.is_set()
+            new_samples = self.ring.read()
+            pending = np.concatenate((pending, new_samples))
+
+            while len(pending) >= frame_size:
+                frame, pending = pending[:frame_size], pending[frame_size:]
+                chunk.append(frame)
+                if np.sqrt(np.mean(frame ** 2)) >= vad_energy_threshold:
+                    speech_seen = True
+                    silent_run = 0
+                elif speech_seen:
+                    silent_run += 1
+                else:
+                    chunk = chunk[-overlap_frames:] if overlap_frames else []  # keep only pre-roll until speech starts
+                    continue
+
+                if silent_run >= silence_frames:
+                    self._publish(np.concatenate(chunk))
+                    chunk, speech_seen, silent_run = [], False, 0
+                elif len(chunk) >= max_frames:
+                    self._publish(np.concatenate(chunk))
+                    chunk = chunk[-overlap_frames:] if overlap_frames else []  # overlap so boundary words are not lost
+
+            if stopping:
+                if speech_seen:
+                    chunk.append(pending)
+                    self._publish(np.concatenate(chunk))
+                break
+            if len(new_samples) == 0:
+                time.sleep(vad_frame_duration)
+
+
+def decode_audio_bytes(audio_bytes):
+    """Decode an uploaded WAV/MP3/Opus payload in memory into 16 kHz mono float32 samples"""
+    return decode_audio(io.BytesIO(audio_bytes), sampling_rate=sample_rate)
+
+
+class TranscriptionQueue:
+    """
+    Queues transcription jobs for uploaded audio onto a single worker thread that
+    decodes them with faster-whisper's batched inference pipeline.
+    Concurrent uploads are decoded one after another: BatchedInferencePipeline batches the
+    VAD segments of one file, not segments from different files (each upload may have its
+    own language and decoding options). The queue depth still makes every job cheaper under load.
+    """
+
+    def __init__(self, batch_size=WHISPER_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.jobs = queue.Queue()
+        self.worker = None
+        self.worker_lock = threading.Lock()
+        self.pipeline = None
+        self.pipeline_model = None
+
+    def depth(self):
+        """Number of jobs waiting to be decoded"""
+        return self.jobs.qsize()
+
+    def submit(self, audio, language=None):
+        future = Future()
+        self.jobs.put((audio, language, time.perf_counter(), future))
+        self._ensure_worker()
+        return future
+
+    def _ensure_worker(self):
+        with self.worker_lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self._run, daemon=True)
+                self.worker.start()
+
+    def _get_pipeline(self):
+        current_model = load_whisper()
+        if self.pipeline is None or self.pipeline_model is not current_model:
+            self.pipeline = BatchedInferencePipeline(model=current_model)
+            self.pipeline_model = current_model
+        return self.pipeline
+
+    def _run(self):
+        while True:
+            audio, language, queued_at, future = self.jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._transcribe(audio, language, queued_at))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _transcribe(self, audio, language, queued_at):
+        started_at = time.perf_counter()
+        pipeline = self._get_pipeline()
+        audio_seconds = len(audio) / sample_rate
+        options = get_decoding_policy().options(audio_seconds, self.depth())
+        segments_gen, info = pipeline.transcribe(audio, language=language, batch_size=self.batch_size, **options)
+
+        segments = []
+        for segment in segments_gen:
+            segments.append({
+                "start": round(segment.start, 3),
+                "end": round(segment.end, 3),
+                "text": segment.text.strip(),
+                # Time from decode start until this segment was produced
+                "decoded_at_ms": round((time.perf_counter() - started_at) * 1000, 1),
+            })
+
+        decode_seconds = time.perf_counter() - started_at
+        observe_stage("transcribe", decode_seconds)
+        return {
+            "text": " ".join(s["text"] for s in segments if s["text"]),
+            "language": info.language,
+            "language_probability": round(info.language_probability, 3),
+            "audio_seconds": round(audio_seconds, 3),
+            "queue_wait_ms": round((started_at - queued_at) * 1000, 1),
+            "decode_ms": round(decode_seconds * 1000, 1),
+            "rtf": round(decode_seconds / audio_seconds, 4) if audio_seconds else None,
+            "beam_size": options["beam_size"],
+            "segments": segments,
+        }
+
+
+transcription_queue = TranscriptionQueue()
+
+def get_transcription_queue():
+    return transcription_queue
 
-    for segment in segments_gen:
-        text = segment.text.strip()
-        if text:
-            print(f"🗣️ {text}")
-            final_transcript.append(text)
-
-def record_loop():
-    """Continuous recording and transcription loop"""
-    global is_recording
-    is_recording = True
-    print("\n🎤 Recording started. Speak now!")
-    
-    while not stop_recording.is_set():
-        transcribe_block()
-    
-    is_recording = False
-    print("\n🛑 Recording stopped.")
 
 def start_recording():
     """Start the recording process - called from Streamlit button"""
-    global final_transcript, stop_recording
-    
-    # Reset transcript and flag
-    final_transcript = []
-    stop_recording.clear()
-    
-    # Load model if needed
-    load_whisper()
-    
-    # Start recording in a separate thread
-    recording_thread = threading.Thread(target=record_loop)
-    recording_thread.daemon = True  # Make thread exit when main program exits
-    recording_thread.start()
-    
-    # Give the thread a moment to start
-    time.sleep(0.5)
-    
+    global active_session
+
+    if active_session is not None and active_session.is_running:
+        return True
+
+    active_session = StreamingTranscriber()
+    active_session.start()
     return True
 
 def stop_recording_and_transcribe():
     """Stop recording and return the transcript - called from Streamlit button"""
-    global stop_recording, final_transcript
-    
-    if is_recording:
-        stop_recording.set()
-        # Wait briefly for recording to complete
-        time.sleep(0.5)
-        
-        # Combine all transcribed segments
-        full_transcript = " ".join(final_transcript)
+    global active_session
+
+    if active_session is not None and active_session.is_running:
+        full_transcript = active_session.stop()
         print("\n📝 Final Transcript:")
         print(full_transcript)
-        
         return full_transcript
     else:
         print("⚠️ No active recording to stop")
         return ""
 
+def get_partial_transcript():
+    """Return the text decoded so far for the active recording"""
+    if active_session is None:
+        return ""
+    return active_session.full_transcript()
+
 def run_button_based_transcription():
     """
     Legacy function for compatibility with Streamlit code
@@ -124,9 +439,15 @@ def run_button_based_transcription():
     # Return empty string - Streamlit will call stop_recording_and_transcribe() later
     return ""
 
+def get_detected_language():
+    """Return the language pinned for the latest recording (Whisper code, e.g. "hi"), if any"""
+    if active_session is None:
+        return None
+    return active_session.language
+
 def check_recording_status():
     """Return True if currently recording, False otherwise"""
-    return is_recording
+    return active_session is not None and active_session.is_running
 
 # If run directly as a script for testing
 if __name__ == "__main__":
@@ -5,16 +5,10 @@ import time
 # Add the parent directory to the Python path to allow importing modules from the parent folder
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from backend.translator import get_translator_instance, unload_translator, translate_to_user_lang
-from backend.prompt_optimizer import get_optimized_prompt_and_keywords
-from backend.gemini_chat import get_gemini_response
-from backend.api_utilities import (
-    fetch_weather, fetch_news, fetch_time,
-    fetch_quote, fetch_fun_fact, fetch_definition
-)
+from backend.pipeline import get_pipeline
 from backend.speech_to_text import run_button_based_transcription, unload_whisper
-from backend.speech_to_text import start_recording, stop_recording_and_transcribe, check_recording_status, unload_whisper
-from backend.text_to_speech import speak, stop_speaking
+from backend.speech_to_text import start_recording, stop_recording_and_transcribe, check_recording_status, get_partial_transcript, get_detected_language, unload_whisper
+from backend.text_to_speech import stop_speaking
 import traceback
 
 # App configuration
@@ -40,6 +34,8 @@ if "response_times" not in st.session_state:
     st.session_state.response_times = []
 if "user_input" not in st.session_state:
     st.session_state.user_input = ""
+if "current_audio" not in st.session_state:
+    st.session_state.current_audio = None
 
 # CSS Styling
 st.markdown("""
@@ -255,109 +251,8 @@ st.markdown("""
 #     except Exception as e:
 #         st.error(f"Failed to send command to terminal: {e}")
 
-def extract_city_name(prompt):
-    known_cities = [
-        "Delhi", "Mumbai", "Bengaluru", "Chennai", "Kolkata", "Hyderabad", "Pune",
-        "Ahmedabad", "Jaipur", "Lucknow", "Kanpur", "Nagpur", "Indore", "Bhopal",
-        "Patna", "Vadodara", "Ludhiana", "Agra", "Nashik", "Faridabad", "Meerut",
-        "Rajkot", "Varanasi", "Srinagar", "Amritsar", "Prayagraj", "Ranchi",
-        "Howrah", "Gwalior", "Jodhpur", "Coimbatore", "Vijayawada", "Jabalpur",
-        "Madurai", "Raipur", "Kota", "Guwahati", "Chandigarh", "Solapur", "Hubli",
-        "Mysore", "Tiruchirappalli", "Bareilly", "Moradabad", "Thiruvananthapuram",
-        "Noida", "Ghaziabad", "Visakhapatnam", "Davangere", "Mangalore", "Salem"
-    ]
-
-    for city in known_cities:
-        if city.lower() in prompt.lower():
-            return city
-    return None
-
-
-# Function to get summaries from APIs
-def get_api_data_summary(prompt: str):
-    lower_prompt = prompt.lower()
-    try:
-        if "weather" in lower_prompt:
-            data = fetch_weather(prompt)
-            if data:
-                return get_gemini_response(f"Summarize the following weather update: {data}")
-
-        elif "news" in lower_prompt:
-            data = fetch_news(prompt)
-            if data:
-                return get_gemini_response(f"Summarize the following news in 3-4 bullet points: {data}")
-
-        elif "time" in lower_prompt:
-            data = fetch_time()
-            if data:
-                return get_gemini_response(f"Summarize the following time and timezone info: {data}")
-
-        elif "quote" in lower_prompt:
-            return fetch_quote()
-
-        elif "fun fact" in lower_prompt or "fact" in lower_prompt:
-            return fetch_fun_fact()
-
-        elif "define" in lower_prompt or "definition" in lower_prompt:
-            word = lower_prompt.split()[-1]
-            data = fetch_definition(word)
-            if data:
-                return get_gemini_response(f"Explain the definition of '{word}' in simple words: {data}")
-
-        return None
-    except Exception as e:
-        st.error(f"API fetch or summary failed: {e}")
-        return None
-
-# Function to process prompt
-def process_prompt_workflow(user_input: str, source_lang: str):
-    if not user_input.strip():
-        return "Please provide a message.", []
-
-    # Skip translation if input is in English
-    if source_lang == "en":
-        english_prompt = user_input
-    else:
-        translator = get_translator_instance()
-        english_prompt = translator.translate_to_english(user_input)
-
-    api_summary = get_api_data_summary(english_prompt)
-    if api_summary:
-        # Remove any '*' symbols from response
-        api_summary = api_summary.replace('*', '')
-        # Only translate back if original input was not in English
-        if source_lang == "en":
-            final_response = api_summary
-        else:
-            final_response = translate_to_user_lang(api_summary, source_lang)
-        return final_response, []
-
-    if len(english_prompt.strip()) < 300:
-        gemini_response = get_gemini_response(english_prompt)
-        # Remove any '*' symbols from response
-        gemini_response = gemini_response.replace('*', '')
-        # Only translate back if original input was not in English
-        if source_lang == "en":
-            final_response = gemini_response
-        else:
-            final_response = translate_to_user_lang(gemini_response, source_lang)
-        return final_response, []
-
-    optimized_prompt, keywords = get_optimized_prompt_and_keywords(english_prompt)
-    gemini_response = get_gemini_response(optimized_prompt)
-    # Remove any '*' symbols from response
-    gemini_response = gemini_response.replace('*', '')
-    # Only translate back if original input was not in English
-    if source_lang == "en":
-        final_response = gemini_response
-    else:
-        final_response = translate_to_user_lang(gemini_response, source_lang)
-
-    return final_response, keywords
-
-
 # Function to handle user input
-def handle_user_input(user_input: str, speak_response: bool = False):
+def handle_user_input(user_input: str, speak_response: bool = False, source_lang: str = None):
     if not user_input.strip():
         return
         
@@ -368,14 +263,14 @@ def handle_user_input(user_input: str, speak_response: bool = False):
         # Start the timer
         start_time = time.time()
         
-        # Process the user's message
-        translator = get_translator_instance()
-        source_lang = translator.detect_lang_code(user_input)
-        final_response, keywords = process_prompt_workflow(user_input, source_lang)
+        # Process the user's message (a language already known, e.g. pinned by Whisper, skips langdetect)
+        result = get_pipeline().run(user_input, source_lang, speak_response=speak_response)
+        final_response = result["response"]
+        keywords = result["keywords"]
         
-        # Calculate the response time
+        # Calculate the response time (speech synthesis is not part of the answer time)
         end_time = time.time()
-        response_time = round(end_time - start_time, 2)
+        response_time = round(end_time - start_time - result["timings"].get("tts", 0.0), 2)
         
         # Add response time to history
         st.session_state.response_times.append(response_time)
@@ -388,9 +283,12 @@ def handle_user_input(user_input: str, speak_response: bool = False):
             "response_time": response_time
         })
         
-        # Text-to-speech if enabled
+        # Text-to-speech if enabled (played by the browser on the next render)
         if speak_response:
-            speak(final_response, source_lang)
+            if result["audio"]:
+                st.session_state.current_audio = result["audio"]
+            else:
+                st.warning(f"Language '{result['source_lang']}' is not supported for speech output.")
             
         st.session_state.current_response = final_response
         
@@ -499,6 +397,11 @@ else:
 
 st.markdown("</div>", unsafe_allow_html=True)
 
+# Play the latest spoken response once
+if st.session_state.current_audio:
+    st.audio(st.session_state.current_audio, format="audio/mp3", autoplay=True)
+    st.session_state.current_audio = None
+
 # Create tabs for Text and Voice modes
 if st.session_state.mode == "text":
     # Text input area
@@ -534,14 +437,14 @@ else:  # Voice Mode
     if recording_active:
         st.markdown("<p class='recording-active'>🔴 Recording in progress...</p>", unsafe_allow_html=True)
         
-        # Show the ongoing status every 5 seconds (or your desired chunk duration)
-        st.markdown("<p>🎤 Recording started. Speak now in chunks of 5 seconds!</p>", unsafe_allow_html=True)
-        
-        # Simulate the "transcribing" status
-        st.markdown("<p>📡 Transcribing...</p>", unsafe_allow_html=True)
+        st.markdown("<p>🎤 Recording started. Speak now!</p>", unsafe_allow_html=True)
         
-        # You can update or handle transcriptions here in real-time if possible
-        # For example, after every 5-second chunk, you can update the transcription
+        # Partial transcript published by the streaming decoder so far
+        partial_transcript = get_partial_transcript()
+        if partial_transcript:
+            st.markdown(f"<p>📡 {partial_transcript}</p>", unsafe_allow_html=True)
+        else:
+            st.markdown("<p>📡 Listening...</p>", unsafe_allow_html=True)
         
     else:
         st.markdown("<p>Press Start to begin recording your voice</p>", unsafe_allow_html=True)
@@ -560,7 +463,7 @@ else:  # Voice Mode
             transcript = stop_recording_and_transcribe()
             if transcript:
                 st.session_state.transcribed_input = transcript
-                handle_user_input(transcript, True)  # Voice mode always speaks responses
+                handle_user_input(transcript, True, get_detected_language())  # Voice mode always speaks responses
                 unload_whisper()
                 st.session_state.recording = False
                 st.rerun()
@@ -1,22 +1,195 @@
-from gtts import gTTS
 from pydub import AudioSegment
 from pydub.playback import play
 from langdetect import detect
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import io
+import os
+import re
+import threading
 
-def speak(text: str, lang: str = None):
-    # Converts text to speech, detecting language if not specified
+from backend.tts_engines import get_tts_engine
+from backend.metrics import register_cache
+from backend.tracing import set_attributes
+
+# Cache configuration
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".tts_cache"))
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "256"))
+
+# Sentence pipelining: synthesis threads and how many sentences may be synthesized ahead of playback
+TTS_STREAM_WORKERS = int(os.getenv("TTS_STREAM_WORKERS", "3"))
+TTS_STREAM_LOOKAHEAD = int(os.getenv("TTS_STREAM_LOOKAHEAD", "4"))
+
+# Phrases worth synthesizing ahead of time, per language
+COMMON_PHRASES = {
+    "en": [
+        "Returned to mode selection",
+        "Please provide a message.",
+        "Sorry, something went wrong. Please try again.",
+    ],
+}
+
+
+class SpeechCache:
+    """
+    Content-addressed on-disk cache of synthesized audio keyed by (engine, text, lang).
+    Least recently used files are evicted once the cache grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._entries())
+
+    def _path(self, text, lang, engine_name="gtts", audio_format="mp3"):
+        key = hashlib.sha256(f"{engine_name}\0{lang}\0{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{audio_format}")
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".tmp"):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    yield path, stat.st_mtime, stat.st_size
+
+    def get(self, text, lang, engine_name="gtts", audio_format="mp3"):
+        path = self._path(text, lang, engine_name, audio_format)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return audio
+
+    def put(self, text, lang, audio, engine_name="gtts", audio_format="mp3"):
+        path = self._path(text, lang, engine_name, audio_format)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a partial file
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(audio)
+        with self.lock:
+            try:
+                self.total_bytes -= os.path.getsize(path)  # replacing an entry frees its old size
+            except FileNotFoundError:
+                pass
+            os.replace(temp_path, path)
+            self.total_bytes += len(audio)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Drop least recently used entries until the cache is back under 90% of its budget
+        target = int(self.max_bytes * 0.9)
+        for path, _, size in sorted(self._entries(), key=lambda entry: entry[1]):
+            if self.total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+                self.total_bytes -= size
+            except FileNotFoundError:
+                pass
+        print(f"🧹 TTS cache evicted down to {self.total_bytes / (1024 * 1024):.1f} MB")
+
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+speech_cache = SpeechCache()
+register_cache("tts", speech_cache)
+
+def get_speech_cache():
+    return speech_cache
+
+
+def synthesize(text: str, lang: str = None, engine: str = None) -> bytes:
+    """
+    Returns encoded audio for the text, served from the cache when the same (text, lang)
+    was synthesized before. Raises ValueError if the engine does not support the language.
+    """
+    if lang is None:
+        lang = detect(text)
+
+    tts_engine = get_tts_engine(engine)
+    audio = speech_cache.get(text, lang, tts_engine.name, tts_engine.audio_format)
+    set_attributes(**{"tts.engine": tts_engine.name, "cache.hit": audio is not None})
+    if audio is not None:
+        return audio
+
+    if not tts_engine.supports(lang):
+        raise ValueError(f"Language '{lang}' not supported by {tts_engine.name}")
+    audio = tts_engine.synthesize(text, lang)
+    speech_cache.put(text, lang, audio, tts_engine.name, tts_engine.audio_format)
+    return audio
+
+def split_for_speech(text: str, min_chars: int = 20) -> list:
+    """Split text at sentence ends (Latin, Devanagari danda, Urdu full stop), merging very short pieces"""
+    pieces = [p.strip() for p in re.split(r'(?<=[.!?।॥۔؟])\s+|\n+', text.strip()) if p.strip()]
+    sentences = []
+    for piece in pieces:
+        if sentences and len(sentences[-1]) < min_chars:
+            sentences[-1] = f"{sentences[-1]} {piece}"
+        else:
+            sentences.append(piece)
+    return sentences
+
+synthesis_pool = ThreadPoolExecutor(max_workers=TTS_STREAM_WORKERS, thread_name_prefix="tts")
+
+def stream_speech(text: str, lang: str = None, engine: str = None):
+    """
+    Yields (sentence, audio_bytes) in order. Sentences are synthesized concurrently on a
+    small pool, so the first chunk is ready after the first sentence rather than the whole text.
+    """
     if lang is None:
         lang = detect(text)
+
+    sentences = iter(split_for_speech(text))
+    pending = deque()
+    for sentence in sentences:
+        pending.append((sentence, synthesis_pool.submit(synthesize, sentence, lang, engine)))
+        if len(pending) >= TTS_STREAM_LOOKAHEAD:
+            break
+
+    while pending:
+        sentence, future = pending.popleft()
+        # Keep the look-ahead window full while the caller consumes this chunk
+        next_sentence = next(sentences, None)
+        if next_sentence is not None:
+            pending.append((next_sentence, synthesis_pool.submit(synthesize, next_sentence, lang, engine)))
+        yield sentence, future.result()
+
+def prerender_phrases(phrases_by_lang=None):
+    """Synthesize common phrases into the cache so later requests need no synthesis"""
+    phrases_by_lang = phrases_by_lang or COMMON_PHRASES
+    rendered = 0
+    for lang, phrases in phrases_by_lang.items():
+        for phrase in phrases:
+            try:
+                synthesize(phrase, lang)
+                rendered += 1
+            except Exception as e:
+                print(f"⚠️ Could not pre-render '{phrase}' ({lang}): {e}")
+    print(f"✅ Pre-rendered {rendered} TTS phrases.")
+    return rendered
+
+def speak(text: str, lang: str = None, engine: str = None):
+    # Converts text to speech and plays it on this machine's speakers, sentence by sentence
+    audio_format = get_tts_engine(engine).audio_format
     try:
-        tts = gTTS(text=text, lang=lang)
-        with io.BytesIO() as f:
-            tts.write_to_fp(f)
-            f.seek(0)
-            audio = AudioSegment.from_file(f, format="mp3")
-            play(audio)
-    except ValueError:
-        print(f"❌ Language '{lang}' not supported by gTTS.")
+        for _, audio in stream_speech(text, lang, engine):
+            play(AudioSegment.from_file(io.BytesIO(audio), format=audio_format))
+    except ValueError as e:
+        print(f"❌ {e}")
 
 def stop_speaking():
     global current_playback
@@ -30,5 +203,5 @@ if __name__ == "__main__":
     speak("तुम्हारा नाम क्या है?")
     speak("What is your name?")
     speak("আপনার নাম কি?")
-    
-# Final Copy
\ No newline at end of file
+
+# Final Copy
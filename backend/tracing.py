@@ -0,0 +1,275 @@
+import contextvars
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+# Tracing configuration (OTEL_* names follow the OpenTelemetry conventions)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")  # "none", "file" or "otlp"
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "promptbridge")
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "0.01"))  # head sampling
+TRACE_TAIL_LATENCY_MS = float(os.getenv("TRACE_TAIL_LATENCY_MS", "2000"))  # always keep slower traces
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Trace:
+    __slots__ = ("trace_id", "spans", "head_sampled", "error")
+
+    def __init__(self, trace_id, head_sampled):
+        self.trace_id = trace_id
+        self.spans = []
+        self.head_sampled = head_sampled
+        self.error = False
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "status", "status_message")
+
+    def __init__(self, trace, name, parent_id=None, kind=SPAN_KIND_INTERNAL, attributes=None):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.status = STATUS_UNSET
+        self.status_message = ""
+
+    def set_attribute(self, key, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_error(self, error):
+        self.status = STATUS_ERROR
+        self.status_message = str(error)
+        self.trace.error = True
+
+
+class NoopSpan:
+    """Returned when tracing is disabled, so call sites never need to check"""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def record_error(self, error):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+# === OTLP/JSON encoding ===
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def encode_trace(trace):
+    """One trace as an OTLP/JSON ExportTraceServiceRequest"""
+    spans = []
+    for span in trace.spans:
+        encoded = {
+            "traceId": trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+            "status": {"code": span.status, "message": span.status_message},
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        spans.append(encoded)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "promptbridge"}, "spans": spans}],
+        }]
+    }
+
+
+# === EXPORTERS ===
+
+class BackgroundExporter(ABC):
+    """Encodes and ships finished traces on a worker thread so requests never wait on I/O"""
+
+    def __init__(self, max_queue=10000):
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._start_worker()
+        # Threads do not survive fork(): forked server workers get a fresh queue and thread
+        os.register_at_fork(after_in_child=self._start_worker)
+
+    def _start_worker(self):
+        self.traces = queue.Queue(maxsize=self.max_queue)
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def export(self, trace):
+        try:
+            self.traces.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            trace = self.traces.get()
+            try:
+                self.write(encode_trace(trace))
+            except Exception as e:
+                print(f"⚠️ Trace export failed: {e}")
+
+    @abstractmethod
+    def write(self, payload):
+        """Ship one encoded trace; runs on the worker thread"""
+
+
+class FileSpanExporter(BackgroundExporter):
+    """Appends one OTLP/JSON document per trace (JSON Lines)"""
+
+    def __init__(self, path=TRACE_FILE):
+        self.path = path
+        super().__init__()
+
+    def write(self, payload):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+
+class OTLPHttpExporter(BackgroundExporter):
+    """Posts OTLP/JSON to a collector's /v1/traces endpoint"""
+
+    def __init__(self, endpoint=OTLP_ENDPOINT):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        super().__init__()
+
+    def write(self, payload):
+        import requests
+
+        response = requests.post(self.url, json=payload, timeout=5)
+        response.raise_for_status()
+
+
+# === TRACER ===
+
+TRACEPARENT_PATTERN = re.compile(r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?$")
+
+
+def parse_traceparent(header):
+    """W3C traceparent → (trace_id, parent_span_id, sampled), or None if malformed"""
+    match = TRACEPARENT_PATTERN.match(header.strip().lower()) if isinstance(header, str) else None
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags, rest = match.groups()
+    if version == "ff" or (version == "00" and rest):
+        return None  # later versions may append fields, version 00 may not
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class Tracer:
+    """
+    Minimal OpenTelemetry-compatible tracer. Every trace is recorded in memory, then exported
+    when it ends if it was head-sampled (TRACE_SAMPLE_RATIO or a sampled traceparent),
+    failed, or was slower than TRACE_TAIL_LATENCY_MS (tail sampling).
+    """
+
+    def __init__(self, exporter=None, sample_ratio=TRACE_SAMPLE_RATIO, tail_latency_ms=TRACE_TAIL_LATENCY_MS):
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self.tail_latency_ns = tail_latency_ms * 1_000_000
+        self.exported = 0
+
+    @contextmanager
+    def span(self, name, attributes=None, traceparent=None):
+        """Start a span; with no active span this starts a new trace"""
+        if self.exporter is None:
+            yield NOOP_SPAN
+            return
+
+        parent = current_span.get()
+        if parent is not None:
+            span = Span(parent.trace, name, parent.span_id, attributes=attributes)
+        else:
+            remote = parse_traceparent(traceparent) if traceparent else None
+            if remote:
+                trace_id, parent_id, sampled = remote
+            else:
+                trace_id, parent_id, sampled = f"{random.getrandbits(128):032x}", None, False
+            trace = Trace(trace_id, sampled or random.random() < self.sample_ratio)
+            span = Span(trace, name, parent_id, kind=SPAN_KIND_SERVER, attributes=attributes)
+
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            current_span.reset(token)
+            span.trace.spans.append(span)
+            if parent is None:
+                self._finish(span)
+
+    def _finish(self, root):
+        trace = root.trace
+        slow = root.end_ns - root.start_ns >= self.tail_latency_ns
+        if trace.head_sampled or trace.error or slow:
+            self.exporter.export(trace)
+            self.exported += 1
+
+
+def build_exporter(kind=TRACE_EXPORTER):
+    if kind == "file":
+        return FileSpanExporter()
+    if kind == "otlp":
+        return OTLPHttpExporter()
+    return None
+
+
+# === Shared tracer and helpers for the backend modules ===
+tracer = Tracer(build_exporter())
+
+def get_tracer():
+    return tracer
+
+def span(name, attributes=None, traceparent=None):
+    return tracer.span(name, attributes, traceparent)
+
+def set_attributes(**attributes):
+    """Tag the active span (no-op when nothing is being traced)"""
+    active = current_span.get()
+    if active is not None:
+        active.set_attributes(attributes)
@@ -1,16 +1,34 @@
-from transformers import NllbTokenizer, AutoModelForSeq2SeqLM
+import os
+from transformers import NllbTokenizerFast, AutoModelForSeq2SeqLM
 import torch
 from langdetect import detect
 
+from backend.admission import get_stage_gate
+from backend.generation_policy import get_generation_policy
+from backend.metrics import record_model_event
+from backend.tracing import set_attributes
+
+# NLLB checkpoint; any NLLB-200 variant (or a local directory with one) works
+TRANSLATOR_MODEL = os.getenv("TRANSLATOR_MODEL", "facebook/nllb-200-distilled-600M")
+MAX_INPUT_TOKENS = 1024  # NLLB's position limit, language token and </s> included
+
+
+def translate_queue_depth():
+    # Requests waiting for the translate stage gate (always 0 inside translator replica processes)
+    gate = get_stage_gate("translate_in")
+    return gate.queue_depth() if gate is not None else 0
+
+
 class NLLBTranslator:
-    def __init__(self, model_name="facebook/nllb-200-distilled-600M"):
+    def __init__(self, model_name=TRANSLATOR_MODEL):
         self.model_name = model_name
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model = None
         self.tokenizer = None
+        self.pool = None  # set by TranslatorReplicaPool.attach() to translate in replica processes
         print(f"🧠 Translator ready. Model will load lazily on first use.")
 
-        self.lang_code_to_id = None
+        self.lang_token_ids = None  # NLLB code (e.g. "hin_Deva") → language token ID, filled on load
         self.lang_detect_map = {
             "as": "asm_Beng",
             "bn": "ben_Beng",
@@ -37,58 +55,112 @@ class NLLBTranslator:
     def _load_model(self):
         if self.model is None or self.tokenizer is None:
             print(f"🚀 Loading NLLB model to {self.device}...")
-            self.tokenizer = NllbTokenizer.from_pretrained(self.model_name)
+            # Rust-backed tokenizer; encode() uses it without changing its state, so threads can share it
+            tokenizer = NllbTokenizerFast.from_pretrained(self.model_name)
+            self.lang_token_ids = self._language_token_ids(tokenizer)
+            self.tokenizer = tokenizer
             self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name).to(self.device)
-            self.lang_code_to_id = self.tokenizer.convert_tokens_to_ids
+            record_model_event("translator", "load")
             print("✅ NLLB Model and Tokenizer loaded.")
 
+    def _language_token_ids(self, tokenizer):
+        # Every language the app can translate to or from, resolved once
+        codes = set(self.lang_detect_map.values()) | {"eng_Latn"}
+        ids = {code: tokenizer.convert_tokens_to_ids(code) for code in codes}
+        return {code: token_id for code, token_id in ids.items() if token_id != tokenizer.unk_token_id}
+
+    def language_token_id(self, nllb_code):
+        token_id = self.lang_token_ids.get(nllb_code)
+        if token_id is None:
+            raise ValueError(f"❌ Unsupported NLLB language code: {nllb_code}")
+        return token_id
+
     def detect_lang_code(self, text):
         lang = detect(text)
         return lang  # Return ISO 639-1 code like "hi", "bn", etc.
 
-    def translate_to_english(self, text):
-        self._load_model()
-        iso_code = self.detect_lang_code(text)
+    def translate_to_english(self, text, source_lang_code=None):
+        # source_lang_code (e.g. from Whisper or the request) skips a second langdetect pass
+        iso_code = source_lang_code or self.detect_lang_code(text)
         source_lang = self.lang_detect_map.get(iso_code, "eng_Latn")
         print(f"🌐 Translating from {source_lang} → eng_Latn...")
         print(f"🔤 Input text: {text}")
+        if self.pool is not None:
+            return self.pool.translate(text, source_lang, "eng_Latn")
+        self._load_model()
         return self._translate(text, source_lang, "eng_Latn")
 
     def translate_from_english(self, text, target_lang_code):
-        self._load_model()
-
         target_lang = self.lang_detect_map.get(target_lang_code)
         if not target_lang:
             raise ValueError(f"❌ Unsupported or unknown target language code: {target_lang_code}")
 
         print(f"🌐 Translating from eng_Latn → {target_lang}...")
         print(f"🔤 Input text: {text}")
+        if self.pool is not None:
+            return self.pool.translate(text, "eng_Latn", target_lang)
+        self._load_model()
         return self._translate(text, "eng_Latn", target_lang)
 
-    def _translate(self, text, source_lang, target_lang):
-        self.tokenizer.src_lang = source_lang
-        encoded = self.tokenizer(text, return_tensors="pt").to(self.device)
-
-        target_lang_id = self.lang_code_to_id(target_lang)
-        if target_lang_id is None:
-            raise ValueError(f"❌ Invalid target language code: {target_lang}")
-
-        generated_tokens = self.model.generate(
-            **encoded,
-            forced_bos_token_id=target_lang_id,
-            max_length=256
-        )
+    def encode(self, texts, source_lang):
+        """
+        Padded input tensors for texts in one NLLB language. The language token is added here
+        instead of through tokenizer.src_lang, and the Rust tokenizer is called directly: the
+        transformers wrapper rewrites its special-token template on every call, which races
+        between threads.
+        """
+        source_lang_id = self.language_token_id(source_lang)
+        encodings = self.tokenizer.backend_tokenizer.encode_batch(texts, add_special_tokens=False)
+        # Drop any padding the wrapper may have left enabled on the shared backend; pad() below re-pads
+        token_ids = [[token_id for token_id, mask in zip(encoding.ids, encoding.attention_mask) if mask][:MAX_INPUT_TOKENS - 2]
+                     for encoding in encodings]
+        eos_id = self.tokenizer.eos_token_id
+        if getattr(self.tokenizer, "legacy_behaviour", False):
+            input_ids = [ids + [eos_id, source_lang_id] for ids in token_ids]  # old NLLB layout
+        else:
+            input_ids = [[source_lang_id] + ids + [eos_id] for ids in token_ids]
+        return self.tokenizer.pad({"input_ids": input_ids}, return_tensors="pt").to(self.device)
+
+    def _generate(self, encoded, source_lang, target_lang):
+        input_tokens = int(encoded["attention_mask"].sum(dim=1).max()) - 2  # without language token and </s>
+        options = get_generation_policy().options(input_tokens, source_lang, target_lang, translate_queue_depth())
+        set_attributes(**{f"translate.{name}": value for name, value in options.items()})
+        with torch.inference_mode():
+            generated_tokens = self.model.generate(
+                **encoded,
+                forced_bos_token_id=self.language_token_id(target_lang),
+                **options
+            )
+        return self.tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)
 
-        translated = self.tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)[0]
+    def _translate(self, text, source_lang, target_lang):
+        set_attributes(**{"model.device": str(self.device), "translate.source": source_lang, "translate.target": target_lang})
+        translated = self._generate(self.encode([text], source_lang), source_lang, target_lang)[0]
         print(f"📝 Translated text: {translated}")
         return translated
 
+    def translate_batch(self, texts, source_lang, target_lang, max_batch_size=16):
+        """Translate many texts with the same NLLB language pair, one padded generate() per chunk"""
+        self._load_model()
+        set_attributes(**{"model.device": str(self.device), "translate.source": source_lang,
+                          "translate.target": target_lang, "translate.batch_size": len(texts)})
+        self.language_token_id(target_lang)  # fail before encoding anything
+
+        translations = []
+        for start in range(0, len(texts), max_batch_size):
+            chunk = texts[start:start + max_batch_size]
+            translations.extend(self._generate(self.encode(chunk, source_lang), source_lang, target_lang))
+        return translations
+
     def unload(self):
+        if self.model is not None:
+            record_model_event("translator", "unload")
         print("🧹 Unloading NLLB model from memory...")
         del self.model
         del self.tokenizer
         self.model = None
         self.tokenizer = None
+        self.lang_token_ids = None
         torch.cuda.empty_cache()
         print("✅ Translator unloaded successfully.")
 
@@ -96,8 +168,8 @@ class NLLBTranslator:
 translator_instance = NLLBTranslator()
 
 # === External utility functions ===
-def get_translated_text(text):
-    return translator_instance.translate_to_english(text)
+def get_translated_text(text, source_lang_code=None):
+    return translator_instance.translate_to_english(text, source_lang_code)
 
 def translate_to_user_lang(text, target_lang_code):
     return translator_instance.translate_from_english(text, target_lang_code)
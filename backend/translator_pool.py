@@ -0,0 +1,216 @@
+import itertools
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+import torch
+import torch.multiprocessing
+
+from backend.translator import get_translator_instance
+
+# Pool configuration; 0 replicas keeps translation in the calling process
+TRANSLATOR_REPLICAS = int(os.getenv("TRANSLATOR_REPLICAS", "0"))
+TRANSLATOR_REPLICA_THREADS = int(os.getenv("TRANSLATOR_REPLICA_THREADS", "0"))  # 0 = cores / replicas
+# "spawn" (default) or "fork". fork is only safe if the parent never ran a multi-threaded torch op:
+# a forked child's first multi-threaded op hangs on the parent's OpenMP pool otherwise
+TRANSLATOR_POOL_START_METHOD = os.getenv("TRANSLATOR_POOL_START_METHOD", "spawn")
+TRANSLATOR_POOL_TIMEOUT = float(os.getenv("TRANSLATOR_POOL_TIMEOUT", "120"))
+
+
+def available_cores():
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+def partition_cores(cores, replicas, threads_per_replica):
+    """Disjoint core sets, one per replica (wrapping around only if there are too few cores)"""
+    if replicas * threads_per_replica > len(cores):
+        print(f"⚠️ {replicas} replicas × {threads_per_replica} threads > {len(cores)} cores; core sets will overlap")
+    return [
+        [cores[(i * threads_per_replica + j) % len(cores)] for j in range(threads_per_replica)]
+        for i in range(replicas)
+    ]
+
+
+def _replica_main(replica_id, cores, threads, job_queues, results, stop_event, steal_interval, shared=None):
+    """Replica process: pin to its cores, take the parent's model (shared memory or forked), serve and steal jobs"""
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(threads)
+
+    translator = get_translator_instance()
+    translator.pool = None  # translate here, not back through the pool
+    if shared is not None:
+        translator.model, translator.tokenizer = shared
+        translator.lang_token_ids = translator._language_token_ids(translator.tokenizer)
+    translator._load_model()
+    results.put((None, replica_id, "ready", None))
+
+    own_queue = job_queues[replica_id]
+    others = [job_queues[(replica_id + offset) % len(job_queues)] for offset in range(1, len(job_queues))]
+    while not stop_event.is_set():
+        try:
+            job = own_queue.get(timeout=steal_interval)
+        except queue.Empty:
+            # Idle: take the oldest job waiting at another replica
+            job = None
+            for other in others:
+                try:
+                    job = other.get_nowait()
+                    break
+                except queue.Empty:
+                    continue
+            if job is None:
+                continue
+
+        job_id, texts, source_lang, target_lang = job
+        try:
+            results.put((job_id, replica_id, translator.translate_batch(texts, source_lang, target_lang), None))
+        except Exception as e:
+            results.put((job_id, replica_id, None, f"{type(e).__name__}: {e}"))
+
+
+class TranslatorReplicaPool:
+    """
+    N NLLB replicas in separate processes, each pinned to its own cores with its own torch
+    thread count. Batches go to the replica with the fewest outstanding texts; a replica
+    whose queue runs dry steals waiting batches from the others.
+    The model is loaded once in the parent; spawned replicas map its weights from shared
+    memory, forked ones share them copy-on-write.
+    """
+
+    def __init__(self, replicas=None, threads_per_replica=None, start_method=None, steal_interval=0.02):
+        cores = available_cores()
+        self.replicas = replicas or TRANSLATOR_REPLICAS or 1
+        self.threads_per_replica = (threads_per_replica or TRANSLATOR_REPLICA_THREADS
+                                    or max(1, len(cores) // self.replicas))
+        self.core_sets = partition_cores(cores, self.replicas, self.threads_per_replica)
+        self.context = torch.multiprocessing.get_context(start_method or TRANSLATOR_POOL_START_METHOD)
+        self.steal_interval = steal_interval
+
+        self.job_queues = [self.context.Queue() for _ in range(self.replicas)]
+        self.results = self.context.Queue()
+        self.stop_event = self.context.Event()
+        self.processes = []
+        self.lock = threading.Lock()
+        self.pending = {}  # job_id → (future, assigned replica, text count)
+        self.outstanding = [0] * self.replicas  # texts assigned and not yet finished, per replica
+        self.completed = [0] * self.replicas  # batches finished by each replica
+        self.stolen = 0
+        self.job_ids = itertools.count()
+        self.ready = threading.Semaphore(0)
+        self.collector = None
+
+    def start(self, timeout=600):
+        # Loaded once here so every replica shares the parent's weights
+        translator = get_translator_instance()
+        translator._load_model()
+        shared = None
+        if self.context.get_start_method() != "fork":
+            translator.model.share_memory()
+            shared = (translator.model, translator.tokenizer)
+        print(f"🚀 Starting {self.replicas} translator replicas × {self.threads_per_replica} threads...")
+        for replica_id, cores in enumerate(self.core_sets):
+            process = self.context.Process(
+                target=_replica_main,
+                args=(replica_id, cores, self.threads_per_replica, self.job_queues, self.results,
+                      self.stop_event, self.steal_interval, shared),
+                daemon=True,
+            )
+            process.start()
+            self.processes.append(process)
+
+        self.collector = threading.Thread(target=self._collect, daemon=True)
+        self.collector.start()
+        for _ in range(self.replicas):
+            if not self.ready.acquire(timeout=timeout):
+                raise TimeoutError("❌ Translator replicas did not start in time")
+        print("✅ Translator replicas ready.")
+        return self
+
+    def _collect(self):
+        while True:
+            item = self.results.get()
+            if item is None:
+                break
+            job_id, replica_id, translations, error = item
+            if job_id is None:
+                self.ready.release()
+                continue
+            with self.lock:
+                future, assigned, count = self.pending.pop(job_id)
+                self.outstanding[assigned] -= count
+                self.completed[replica_id] += 1
+                if replica_id != assigned:
+                    self.stolen += 1
+            if error:
+                future.set_exception(RuntimeError(f"❌ Translator replica {replica_id} failed: {error}"))
+            else:
+                future.set_result(translations)
+
+    def submit(self, texts, source_lang, target_lang) -> Future:
+        """Queue one batch (NLLB codes, e.g. "hin_Deva" → "eng_Latn"); the future yields the translations"""
+        future = Future()
+        with self.lock:
+            job_id = next(self.job_ids)
+            replica_id = min(range(self.replicas), key=self.outstanding.__getitem__)
+            self.outstanding[replica_id] += len(texts)
+            self.pending[job_id] = (future, replica_id, len(texts))
+        self.job_queues[replica_id].put((job_id, list(texts), source_lang, target_lang))
+        return future
+
+    def translate_batch(self, texts, source_lang, target_lang, timeout=TRANSLATOR_POOL_TIMEOUT):
+        return self.submit(texts, source_lang, target_lang).result(timeout=timeout)
+
+    def translate(self, text, source_lang, target_lang, timeout=TRANSLATOR_POOL_TIMEOUT):
+        return self.translate_batch([text], source_lang, target_lang, timeout)[0]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "replicas": self.replicas,
+                "threads_per_replica": self.threads_per_replica,
+                "core_sets": self.core_sets,
+                "outstanding": list(self.outstanding),
+                "completed": list(self.completed),
+                "stolen": self.stolen,
+            }
+
+    def attach(self, translator=None):
+        """Route a translator's translate_to_english / translate_from_english through this pool"""
+        (translator or get_translator_instance()).pool = self
+        return self
+
+    def close(self, timeout=10):
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.results.put(None)
+        if self.collector:
+            self.collector.join(timeout)
+        get_translator_instance().pool = None
+        print("🧹 Translator replicas stopped.")
+
+
+# === Shared instance ===
+translator_pool = None
+
+def start_translator_pool(replicas=None, threads_per_replica=None):
+    """Start the shared pool and send the app's translations through it"""
+    global translator_pool
+    if translator_pool is None:
+        translator_pool = TranslatorReplicaPool(replicas, threads_per_replica).start().attach()
+    return translator_pool
+
+def get_translator_pool():
+    return translator_pool
+
+def stop_translator_pool():
+    global translator_pool
+    if translator_pool is not None:
+        translator_pool.close()
+        translator_pool = None
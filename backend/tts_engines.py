@@ -0,0 +1,223 @@
+import io
+import os
+import re
+import shutil
+import subprocess
+import threading
+import wave
+from abc import ABC, abstractmethod
+
+from backend.metrics import record_model_event
+
+# Engine used when none is requested explicitly: "gtts" (online), "mms" or "espeak" (offline)
+TTS_ENGINE = os.getenv("TTS_ENGINE", "gtts")
+
+
+class TTSEngine(ABC):
+    """
+    Interface for text-to-speech backends.
+    synthesize() returns encoded audio bytes in the engine's audio_format.
+    """
+    name = "base"
+    audio_format = "wav"
+
+    def supports(self, lang: str) -> bool:
+        return True
+
+    @abstractmethod
+    def synthesize(self, text: str, lang: str) -> bytes:
+        """Encoded audio for text in a langdetect language code"""
+
+
+class GTTSEngine(TTSEngine):
+    """Google Translate's web TTS endpoint (needs network access)"""
+    name = "gtts"
+    audio_format = "mp3"
+
+    def __init__(self):
+        self._languages = None
+
+    def supports(self, lang):
+        if self._languages is None:
+            from gtts.lang import tts_langs
+            self._languages = set(tts_langs())
+        return lang in self._languages
+
+    def synthesize(self, text, lang):
+        from gtts import gTTS
+
+        tts = gTTS(text=text, lang=lang)
+        with io.BytesIO() as f:
+            tts.write_to_fp(f)
+            return f.getvalue()
+
+
+def pcm_to_wav(samples, sample_rate: int) -> bytes:
+    """Encode float samples in [-1, 1] as 16-bit mono WAV"""
+    import numpy as np
+
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with io.BytesIO() as f:
+        with wave.open(f, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm.tobytes())
+        return f.getvalue()
+
+
+class EspeakEngine(TTSEngine):
+    """
+    eSpeak NG formant synthesizer: fully offline, tiny and fast on CPU, robotic but intelligible.
+    Requires the espeak-ng binary on PATH.
+    """
+    name = "espeak"
+    audio_format = "wav"
+
+    # langdetect codes → eSpeak NG voices (languages without their own voice use the closest one)
+    VOICES = {
+        "as": "as", "bn": "bn", "brx": "hi", "doi": "hi", "en": "en", "gom": "kok",
+        "gu": "gu", "hi": "hi", "kn": "kn", "ks": "ur", "mai": "hi", "ml": "ml",
+        "mr": "mr", "ne": "ne", "pa": "pa", "sa": "hi", "sd": "sd", "ta": "ta",
+        "te": "te", "ur": "ur",
+    }
+
+    def __init__(self, binary: str = None):
+        self.binary = binary or os.getenv("ESPEAK_BINARY") or shutil.which("espeak-ng") or "espeak-ng"
+        self._installed_voices = None
+
+    def _voices(self):
+        if self._installed_voices is None:
+            try:
+                output = subprocess.run(
+                    [self.binary, "--voices"], capture_output=True, text=True, timeout=10
+                ).stdout
+            except (OSError, subprocess.TimeoutExpired):
+                output = ""
+            # Columns: Pty Language Age/Gender VoiceName File Other Languages, e.g.
+            #  5  en-gb  --/M  English_(Great_Britain)  gmw/en  (en 2)
+            voices = set()
+            for line in output.splitlines()[1:]:
+                columns = line.split()
+                if len(columns) > 1:
+                    voices.add(columns[1])
+                    voices.update(re.findall(r"\(([\w-]+) \d+\)", line))
+            self._installed_voices = voices
+        return self._installed_voices
+
+    def supports(self, lang):
+        voice = self.VOICES.get(lang)
+        if voice is None:
+            return False
+        # "-v en" resolves to a regional voice (en-gb, en-us) when no bare "en" is listed
+        return any(v == voice or v.startswith(voice + "-") for v in self._voices())
+
+    def synthesize(self, text, lang):
+        result = subprocess.run(
+            [self.binary, "-v", self.VOICES[lang], "--stdout"],
+            input=text.encode("utf-8"), capture_output=True, timeout=60
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"espeak-ng failed: {result.stderr.decode(errors='ignore').strip()}")
+        return result.stdout
+
+
+class MMSEngine(TTSEngine):
+    """
+    Meta MMS-TTS (VITS) checkpoints from Hugging Face: neural, offline once downloaded,
+    about 36M parameters per language so it runs comfortably on CPU.
+    One model is loaded lazily per language.
+    """
+    name = "mms"
+    audio_format = "wav"
+
+    # langdetect codes → MMS-TTS checkpoints (only languages with a published checkpoint)
+    CHECKPOINTS = {
+        "as": "facebook/mms-tts-asm", "bn": "facebook/mms-tts-ben", "en": "facebook/mms-tts-eng",
+        "gu": "facebook/mms-tts-guj", "hi": "facebook/mms-tts-hin", "kn": "facebook/mms-tts-kan",
+        "mai": "facebook/mms-tts-mai", "ml": "facebook/mms-tts-mal", "mr": "facebook/mms-tts-mar",
+        "ne": "facebook/mms-tts-npi", "pa": "facebook/mms-tts-pan", "ta": "facebook/mms-tts-tam",
+        "te": "facebook/mms-tts-tel", "ur": "facebook/mms-tts-urd-script_arabic",
+    }
+
+    def __init__(self):
+        self.models = {}
+        self.locks = {}
+        self.unavailable = set()
+        self.load_lock = threading.Lock()
+        self.uroman = None
+
+    def supports(self, lang):
+        return lang in self.CHECKPOINTS and lang not in self.unavailable
+
+    def _load(self, lang):
+        with self.load_lock:
+            if lang not in self.models:
+                from transformers import AutoTokenizer, VitsModel
+
+                checkpoint = self.CHECKPOINTS[lang]
+                print(f"🚀 Loading MMS-TTS model {checkpoint}...")
+                try:
+                    tokenizer = AutoTokenizer.from_pretrained(checkpoint)
+                    model = VitsModel.from_pretrained(checkpoint).eval()
+                except OSError as e:
+                    # Not downloaded (air-gapped) or no such checkpoint
+                    self.unavailable.add(lang)
+                    raise ValueError(f"MMS-TTS checkpoint {checkpoint} is unavailable: {e}")
+                self.models[lang] = (tokenizer, model)
+                self.locks[lang] = threading.Lock()
+                record_model_event(f"mms-tts-{lang}", "load")
+                print("✅ MMS-TTS model loaded.")
+        return self.models[lang], self.locks[lang]
+
+    def _romanize(self, text):
+        # Some MMS vocabularies are Latin-only and expect uroman-romanized input
+        if self.uroman is None:
+            try:
+                import uroman
+            except ImportError:
+                raise ValueError("This MMS-TTS language needs the 'uroman' package for romanization")
+            self.uroman = uroman.Uroman()
+        return self.uroman.romanize_string(text)
+
+    def unload(self):
+        with self.load_lock:
+            for lang in self.models:
+                record_model_event(f"mms-tts-{lang}", "unload")
+            self.models.clear()
+            self.locks.clear()
+
+    def synthesize(self, text, lang):
+        import torch
+
+        (tokenizer, model), lock = self._load(lang)
+        if getattr(tokenizer, "is_uroman", False):
+            text = self._romanize(text)
+        inputs = tokenizer(text, return_tensors="pt")
+        with lock, torch.inference_mode():
+            waveform = model(**inputs).waveform[0].numpy()
+        return pcm_to_wav(waveform, model.config.sampling_rate)
+
+
+ENGINE_CLASSES = {
+    "gtts": GTTSEngine,
+    "espeak": EspeakEngine,
+    "mms": MMSEngine,
+}
+
+engine_instances = {}
+engine_lock = threading.Lock()
+
+def get_tts_engine(name: str = None) -> TTSEngine:
+    """Return the shared instance of the named engine (defaults to TTS_ENGINE)"""
+    name = name or TTS_ENGINE
+    if name not in ENGINE_CLASSES:
+        raise ValueError(f"❌ Unknown TTS engine: {name}")
+    with engine_lock:
+        if name not in engine_instances:
+            engine_instances[name] = ENGINE_CLASSES[name]()
+        return engine_instances[name]
+
+def register_tts_engine(name: str, engine_class):
+    """Make an additional engine class selectable by name"""
+    ENGINE_CLASSES[name] = engine_class
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from starlette.websockets import WebSocketDisconnect
+
+from backend.pipeline import get_pipeline
+from backend.speech_to_text import StreamingTranscriber
+from backend.text_to_speech import stream_speech
+from backend.tts_engines import get_tts_engine
+from backend.sessions import get_session_store, add_turn, llm_history
+from backend.admission import admit, run_admitted, Overloaded, RequestCancelled
+
+# WebSocket voice configuration
+VOICE_WS_MAX_SESSIONS = int(os.getenv("VOICE_WS_MAX_SESSIONS", "8"))
+VOICE_WS_SEND_QUEUE = int(os.getenv("VOICE_WS_SEND_QUEUE", "32"))  # outgoing messages buffered per session
+
+# Client audio formats: 16 kHz mono PCM frames, as binary WebSocket messages
+SAMPLE_FORMATS = {"pcm_s16le": ("<i2", 32768.0), "f32le": ("<f4", 1.0)}
+
+# Close code for "server at capacity, try again later"
+CLOSE_TRY_AGAIN_LATER = 1013
+
+voice_session_slots = asyncio.Semaphore(VOICE_WS_MAX_SESSIONS)
+
+
+def decode_pcm(data: bytes, sample_format: str = "pcm_s16le"):
+    dtype, scale = SAMPLE_FORMATS[sample_format]
+    usable = len(data) - len(data) % np.dtype(dtype).itemsize
+    return np.frombuffer(data[:usable], dtype=dtype).astype(np.float32) / scale
+
+
+class VoiceSession:
+    """
+    One full-duplex voice conversation over a WebSocket.
+
+    Client → server: binary frames of 16 kHz mono PCM, plus JSON control messages
+      {"type": "start", "sample_format": "pcm_s16le"|"f32le", "language": ..., "speak": true, "engine": ...}
+      {"type": "end"}     end of utterance: transcribe the rest and answer it
+      {"type": "cancel"}  stop the answer in progress (barge-in)
+      {"type": "close"}
+    Server → client: JSON events "ready", "partial", "transcript", "response", "audio" (followed by
+    one binary frame with the encoded audio), "done", "warning" and "error".
+
+    Backpressure: outgoing messages pass through a bounded queue. Partial transcripts are
+    dropped when it is full (later ones supersede them); answer audio waits for room, which
+    pauses synthesis for a slow client. Incoming audio goes into the transcriber's ring
+    buffer, which drops audio rather than grow when decoding falls behind.
+    """
+
+    def __init__(self, websocket, session_id):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.loop = asyncio.get_running_loop()
+        self.outbox = asyncio.Queue(maxsize=VOICE_WS_SEND_QUEUE)
+        self.sample_format = "pcm_s16le"
+        self.language = None
+        self.speak = True
+        self.engine = None
+        self.transcriber = None
+        self.answer_task = None
+        self.ticket = None
+        self.answer_lock = asyncio.Lock()
+        self.dropped_partials = 0
+        self.reported_dropped_samples = 0
+
+    # === Outgoing ===
+
+    async def send(self, event, audio=None):
+        await self.outbox.put((event, audio))
+
+    def _queue_partial(self, text):
+        try:
+            self.outbox.put_nowait(({"type": "partial", "text": text}, None))
+        except asyncio.QueueFull:
+            self.dropped_partials += 1
+
+    def _on_partial(self, text):
+        # Called on the transcriber's decoder thread
+        self.loop.call_soon_threadsafe(self._queue_partial, text)
+
+    async def _sender(self):
+        while True:
+            event, audio = await self.outbox.get()
+            await self.websocket.send_text(json.dumps(event, ensure_ascii=False))
+            if audio is not None:
+                await self.websocket.send_bytes(audio)
+
+    # === Incoming ===
+
+    async def _start_transcriber(self):
+        # Keep the language pinned by the previous utterance
+        language = self.transcriber.language if self.transcriber else self.language
+        self.transcriber = StreamingTranscriber(on_partial=self._on_partial, language=language)
+        await run_in_threadpool(self.transcriber.start, False)
+
+    async def _handle_control(self, message):
+        kind = message.get("type")
+        if kind == "start":
+            sample_format = message.get("sample_format", self.sample_format)
+            if sample_format not in SAMPLE_FORMATS:
+                await self.send({"type": "error", "error": f"Unsupported sample_format '{sample_format}'"})
+                return True
+            self.sample_format = sample_format
+            self.language = message.get("language", self.language)
+            self.speak = message.get("speak", self.speak)
+            self.engine = message.get("engine", self.engine)
+            if self.transcriber.language is None:
+                self.transcriber.language = self.language
+        elif kind == "end":
+            finished, self.transcriber = self.transcriber, None
+            await self._start_transcriber()  # audio sent while answering goes to the next utterance
+            transcript = await run_in_threadpool(finished.stop)
+            self.transcriber.language = self.transcriber.language or finished.language
+            # Answers run in the background (so audio keeps flowing) and one at a time, in order
+            self.answer_task = asyncio.create_task(self._answer(transcript, finished.language))
+        elif kind == "cancel":
+            if self.answer_task and not self.answer_task.done():
+                self.answer_task.cancel()
+                if self.ticket is not None:
+                    self.ticket.cancel()  # stop the pipeline thread at its next stage
+        elif kind == "close":
+            return False
+        else:
+            await self.send({"type": "error", "error": f"Unknown message type '{kind}'"})
+        return True
+
+    def _feed(self, data):
+        self.transcriber.feed(decode_pcm(data, self.sample_format))
+        dropped = self.transcriber.ring.dropped
+        if dropped > self.reported_dropped_samples:
+            self.reported_dropped_samples = dropped
+            self._queue_warning(f"Decoding fell behind; dropped {dropped} samples so far")
+
+    def _queue_warning(self, message):
+        try:
+            self.outbox.put_nowait(({"type": "warning", "warning": message}, None))
+        except asyncio.QueueFull:
+            pass
+
+    # === Answering ===
+
+    async def _answer(self, transcript, whisper_language):
+        async with self.answer_lock:
+            try:
+                await self.send({"type": "transcript", "text": transcript, "language": whisper_language})
+                if not transcript.strip():
+                    await self.send({"type": "done"})
+                    return
+
+                client = self.websocket.client.host if self.websocket.client else "unknown"
+                self.ticket = ticket = admit(client, "voice")
+                store = get_session_store()
+                session = store.get(self.session_id)
+                language = self.language or whisper_language
+                result = await run_in_threadpool(
+                    run_admitted, ticket, get_pipeline().run, transcript, language, False, llm_history(session),
+                    ticket=ticket
+                )
+                # Atomic read-modify-write, so a concurrent /chat on the same session doesn't lose turns
+                store.update(self.session_id, lambda session: add_turn(session, transcript, result))
+
+                await self.send({
+                    "type": "response",
+                    "text": result["response"],
+                    "keywords": result["keywords"],
+                    "language": result["source_lang"],
+                })
+                if self.speak:
+                    await self._stream_audio(result["response"], result["source_lang"])
+                await self.send({"type": "done"})
+            except (asyncio.CancelledError, RequestCancelled):
+                await self.send({"type": "done", "cancelled": True})
+            except Overloaded as e:
+                await self.send({"type": "error", "error": str(e), "retry_after": e.retry_after})
+            except Exception as e:
+                await self.send({"type": "error", "error": str(e)})
+
+    async def _stream_audio(self, text, lang):
+        audio_format = get_tts_engine(self.engine).audio_format
+        chunks = stream_speech(text, lang, self.engine)
+        index = 0
+        try:
+            while True:
+                try:
+                    chunk = await run_in_threadpool(next, chunks, None)
+                except ValueError as e:
+                    await self.send({"type": "warning", "warning": str(e)})
+                    return
+                if chunk is None:
+                    return
+                sentence, audio = chunk
+                # Waits while the outbox is full, so synthesis stays a few sentences ahead at most
+                await self.send({"type": "audio", "index": index, "text": sentence, "format": audio_format}, audio)
+                index += 1
+        finally:
+            chunks.close()
+
+    # === Main loop ===
+
+    async def run(self):
+        sender = asyncio.create_task(self._sender())
+        try:
+            await self._start_transcriber()
+            await self.send({"type": "ready", "session_id": self.session_id,
+                             "sample_rate": 16000, "sample_formats": list(SAMPLE_FORMATS)})
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return  # client is gone: drop whatever is still queued
+                if message.get("bytes") is not None:
+                    self._feed(message["bytes"])
+                elif message.get("text") is not None:
+                    try:
+                        control = json.loads(message["text"])
+                    except json.JSONDecodeError:
+                        await self.send({"type": "error", "error": "Control messages must be JSON"})
+                        continue
+                    if not await self._handle_control(control):
+                        break
+
+            # Graceful close: let the last answer and queued messages go out first
+            if self.answer_task is not None:
+                await asyncio.wait([self.answer_task, sender], return_when=asyncio.FIRST_COMPLETED)
+            while not self.outbox.empty() and not sender.done():
+                await asyncio.sleep(0.01)
+            await self.websocket.close()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            if self.answer_task is not None and not self.answer_task.done():
+                self.answer_task.cancel()
+                if self.ticket is not None:
+                    self.ticket.cancel()
+            sender.cancel()
+            if self.transcriber is not None:
+                await run_in_threadpool(self.transcriber.stop, 1.0)
@@ -0,0 +1,125 @@
+"""
+Accuracy / latency benchmark for Whisper decoding policies.
+
+Uses the labelled clip set in benchmarks/clips/: every clip needs a reference transcript
+next to it with the same name and a .txt extension (e.g. weather_hi.wav + weather_hi.txt).
+
+    python -m benchmarks.bench_decoding_policy --policies greedy fast balanced accurate adaptive --queue-depths 0 2 4
+
+Reports word error rate (WER) and mean / p95 decode latency for every policy and queue depth.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend import speech_to_text
+from backend.decoding_policy import DecodingPolicy
+from benchmarks.bench_whisper import DEFAULT_CLIPS_DIR, load_clips
+
+
+def normalize_words(text):
+    return "".join(ch.lower() if ch.isalnum() or ch.isspace() else " " for ch in text).split()
+
+
+def word_error_rate(reference, hypothesis):
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    # Levenshtein distance over words, one row at a time
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def load_labelled_clips(clips_dir):
+    labelled = []
+    for name, audio in load_clips(clips_dir):
+        label_path = os.path.join(clips_dir, os.path.splitext(name)[0] + ".txt")
+        if not os.path.exists(label_path):
+            print(f"⚠️ Skipping {name}: no reference transcript")
+            continue
+        with open(label_path, encoding="utf-8") as f:
+            labelled.append((name, audio, f.read().strip()))
+    return labelled
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def benchmark_policy(model, policy, clips, queue_depth):
+    latencies, errors = [], []
+    presets = {}
+    for name, audio, reference in clips:
+        audio_seconds = len(audio) / speech_to_text.sample_rate
+        options = policy.options(audio_seconds, queue_depth)
+        preset = policy.choose_preset(audio_seconds, queue_depth)
+        presets[preset] = presets.get(preset, 0) + 1
+
+        start = time.perf_counter()
+        segments, _ = model.transcribe(audio, **options)
+        hypothesis = " ".join(segment.text.strip() for segment in segments)
+        latencies.append(time.perf_counter() - start)
+        errors.append(word_error_rate(reference, hypothesis))
+
+    return {
+        "policy": policy.mode,
+        "queue_depth": queue_depth,
+        "presets": presets,
+        "wer": round(sum(errors) / len(errors), 4),
+        "mean_latency_ms": round(sum(latencies) / len(latencies) * 1000, 1),
+        "p95_latency_ms": round(percentile(latencies, 95) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper decoding policy benchmark")
+    parser.add_argument("--clips", default=DEFAULT_CLIPS_DIR, help="directory of labelled audio clips")
+    parser.add_argument("--policies", nargs="+", default=["greedy", "fast", "balanced", "accurate", "adaptive"])
+    parser.add_argument("--queue-depths", nargs="+", type=int, default=[0],
+                        help="simulated queue depths (only change the adaptive policy)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    clips = load_labelled_clips(args.clips)
+    if not clips:
+        print(f"❌ No labelled clips found in {args.clips}")
+        return 1
+
+    model = speech_to_text.load_whisper()
+    results = []
+    for mode in args.policies:
+        policy = DecodingPolicy(mode=mode)
+        depths = args.queue_depths if mode == "adaptive" else [0]
+        for depth in depths:
+            result = benchmark_policy(model, policy, clips, depth)
+            results.append(result)
+            print(
+                f"📊 {mode:<9} depth={depth}: WER {result['wer']:.3f}, "
+                f"mean {result['mean_latency_ms']} ms, p95 {result['p95_latency_ms']} ms {result['presets']}"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,445 @@
+"""
+End-to-end /chat benchmark against local fake upstream services.
+
+    python -m benchmarks.bench_e2e --requests 200 --concurrency 4 --output e2e.json
+    python -m benchmarks.bench_e2e --save-workload workload.jsonl      # write the workload only
+    python -m benchmarks.bench_e2e --workload workload.jsonl           # replay a saved workload
+    python -m benchmarks.bench_e2e --url http://localhost:8000         # drive a running server
+
+By default the app runs in-process with Gemini, GNews, OpenWeatherMap and TimeZoneDB
+replaced by benchmarks.fake_services; the local models (langdetect, NLLB, BART) are real.
+With --url, start the server with the environment printed by `python -m benchmarks.fake_services`.
+
+The workload mixes all 20 languages of the translator's lang_detect_map, short questions
+for each intent and long prompts that exceed the token budget (summarize stage).
+Every request runs in a session of its own, so no LLM history builds up and results do not
+depend on which client thread sent a request.
+Per-stage breakdowns come from the Server-Timing header of each /chat response.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fake_services import FakeServices
+
+SESSION_HEADER = "X-Session-ID"
+
+# Short prompts per language: a plain LLM question and one per API intent
+PROMPTS = {
+    "as": {
+        "chat": "ঘৰতে ভাল চাহ কেনেকৈ বনাম?",
+        "weather": "আজি দিল্লীত বতৰ কেনেকুৱা?",
+        "news": "মোক মুম্বাইৰ শেহতীয়া বাতৰি কোৱা।",
+        "time": "এতিয়া কলকাতাত কিমান বাজিছে?",
+        "quote": "মোক এটা উদ্ধৃতি কোৱা।",
+        "fact": "মোক এটা মজাৰ তথ্য কোৱা।",
+        "define": "বুদ্ধিমত্তাৰ সংজ্ঞা দিয়া।",
+    },
+    "bn": {
+        "chat": "বাড়িতে ভালো চা কীভাবে বানাব?",
+        "weather": "আজ দিল্লিতে আবহাওয়া কেমন?",
+        "news": "আমাকে মুম্বাইয়ের সর্বশেষ খবর বলো।",
+        "time": "এখন কলকাতায় কটা বাজে?",
+        "quote": "আমাকে একটি উক্তি বলো।",
+        "fact": "আমাকে একটি মজার তথ্য বলো।",
+        "define": "বুদ্ধিমত্তার সংজ্ঞা দাও।",
+    },
+    "brx": {
+        "chat": "न'आव मोजां साहा माबोरै खुलुमनो?",
+        "weather": "दिनै दिल्लियाव बतोर माबोरै?",
+        "news": "आंनो मुम्बाइनि गोदान खौरांफोर खिथा।",
+        "time": "दानो कलकातायाव बेसेबां सम जादों?",
+        "quote": "आंनो मोनसे उद्धृति खिथा।",
+        "fact": "आंनो मोनसे मोजां फोरमायथि खिथा।",
+        "define": "बुद्धिनि सोदोबथि हो।",
+    },
+    "doi": {
+        "chat": "घरै च बधिया चाह् किस चाल्ली बनाचै?",
+        "weather": "अज्ज दिल्ली च मौसम कनेहा ऐ?",
+        "news": "मिगी मुंबई दियां ताजा खबरां दस्सो।",
+        "time": "हून कोलकाता च केह् टाइम होआ ऐ?",
+        "quote": "मिगी इक उद्धरण दस्सो।",
+        "fact": "मिगी इक मजेदार तत्थ दस्सो।",
+        "define": "बुद्धि दी परिभाशा देओ।",
+    },
+    "en": {
+        "chat": "How do I make good tea at home?",
+        "weather": "What is the weather in Delhi today?",
+        "news": "Tell me the latest news from Mumbai.",
+        "time": "What time is it in Kolkata now?",
+        "quote": "Tell me a quote.",
+        "fact": "Tell me a fun fact.",
+        "define": "Define intelligence.",
+    },
+    "gom": {
+        "chat": "घरा बरो चा कसो करचो?",
+        "weather": "आयज दिल्लींत हवामान कशें आसा?",
+        "news": "म्हाका मुंबयचीं ताजीं खबरो सांग।",
+        "time": "आतां कोलकातांत कितले वाजले?",
+        "quote": "म्हाका एक सुविचार सांग।",
+        "fact": "म्हाका एक मजेशीर तथ्य सांग।",
+        "define": "बुद्धीची व्याख्या सांग।",
+    },
+    "gu": {
+        "chat": "ઘરે સારી ચા કેવી રીતે બનાવવી?",
+        "weather": "આજે દિલ્હીમાં હવામાન કેવું છે?",
+        "news": "મને મુંબઈના તાજા સમાચાર કહો.",
+        "time": "અત્યારે કોલકાતામાં કેટલા વાગ્યા છે?",
+        "quote": "મને એક સુવિચાર કહો.",
+        "fact": "મને એક રસપ્રદ હકીકત કહો.",
+        "define": "બુદ્ધિની વ્યાખ્યા આપો.",
+    },
+    "hi": {
+        "chat": "घर पर अच्छी चाय कैसे बनाऊं?",
+        "weather": "आज दिल्ली में मौसम कैसा है?",
+        "news": "मुझे मुंबई की ताज़ा खबरें बताओ।",
+        "time": "अभी कोलकाता में क्या समय हुआ है?",
+        "quote": "मुझे एक उद्धरण बताओ।",
+        "fact": "मुझे एक मज़ेदार तथ्य बताओ।",
+        "define": "बुद्धि की परिभाषा बताओ।",
+    },
+    "kn": {
+        "chat": "ಮನೆಯಲ್ಲಿ ಒಳ್ಳೆಯ ಚಹಾ ಹೇಗೆ ಮಾಡುವುದು?",
+        "weather": "ಇಂದು ದೆಹಲಿಯಲ್ಲಿ ಹವಾಮಾನ ಹೇಗಿದೆ?",
+        "news": "ಮುಂಬೈನ ಇತ್ತೀಚಿನ ಸುದ್ದಿಯನ್ನು ನನಗೆ ತಿಳಿಸಿ.",
+        "time": "ಈಗ ಕೋಲ್ಕತ್ತಾದಲ್ಲಿ ಸಮಯ ಎಷ್ಟು?",
+        "quote": "ನನಗೆ ಒಂದು ಉಲ್ಲೇಖ ಹೇಳಿ.",
+        "fact": "ನನಗೆ ಒಂದು ಮೋಜಿನ ಸಂಗತಿ ಹೇಳಿ.",
+        "define": "ಬುದ್ಧಿವಂತಿಕೆಯನ್ನು ವ್ಯಾಖ್ಯಾನಿಸಿ.",
+    },
+    "ks": {
+        "chat": "گرِ منٛز کیٛتھ پٲٹھۍ بَنٲوِ جان چاے؟",
+        "weather": "دِلّی منٛز اَز موسم کیٛتھ پٲٹھۍ چھُ؟",
+        "news": "مےٚ ونِو مُمبئی ہِنٛز تازٕ خبر۔",
+        "time": "وۄنۍ کیٛتھ وَقت چھُ کولکتہٕ منٛز؟",
+        "quote": "مےٚ ونِو اَکھ قول۔",
+        "fact": "مےٚ ونِو اَکھ مزیدار حقیقت۔",
+        "define": "ذہانتُک تعریف وَنِو۔",
+    },
+    "mai": {
+        "chat": "घरमे नीक चाह कोना बनाबी?",
+        "weather": "आइ दिल्लीमे मौसम केहन अछि?",
+        "news": "हमरा मुंबईक ताजा समाचार कहू।",
+        "time": "एखन कोलकातामे कतेक बजल अछि?",
+        "quote": "हमरा एकटा उद्धरण कहू।",
+        "fact": "हमरा एकटा मजेदार तथ्य कहू।",
+        "define": "बुद्धिक परिभाषा दिअ।",
+    },
+    "ml": {
+        "chat": "വീട്ടിൽ നല്ല ചായ എങ്ങനെ ഉണ്ടാക്കാം?",
+        "weather": "ഇന്ന് ഡൽഹിയിലെ കാലാവസ്ഥ എങ്ങനെയാണ്?",
+        "news": "മുംബൈയിലെ ഏറ്റവും പുതിയ വാർത്തകൾ പറയൂ.",
+        "time": "ഇപ്പോൾ കൊൽക്കത്തയിൽ സമയം എത്രയാണ്?",
+        "quote": "എനിക്ക് ഒരു ഉദ്ധരണി പറയൂ.",
+        "fact": "എനിക്ക് ഒരു രസകരമായ വസ്തുത പറയൂ.",
+        "define": "ബുദ്ധിയെ നിർവചിക്കുക.",
+    },
+    "mr": {
+        "chat": "घरी चांगला चहा कसा बनवायचा?",
+        "weather": "आज दिल्लीत हवामान कसे आहे?",
+        "news": "मला मुंबईच्या ताज्या बातम्या सांगा.",
+        "time": "आता कोलकात्यात किती वाजले आहेत?",
+        "quote": "मला एक सुविचार सांगा.",
+        "fact": "मला एक मजेदार तथ्य सांगा.",
+        "define": "बुद्धिमत्तेची व्याख्या सांगा.",
+    },
+    "ne": {
+        "chat": "घरमा राम्रो चिया कसरी बनाउने?",
+        "weather": "आज दिल्लीमा मौसम कस्तो छ?",
+        "news": "मलाई मुम्बईको ताजा समाचार भन।",
+        "time": "अहिले कोलकातामा कति बज्यो?",
+        "quote": "मलाई एउटा उद्धरण भन।",
+        "fact": "मलाई एउटा रोचक तथ्य भन।",
+        "define": "बुद्धिको परिभाषा देऊ।",
+    },
+    "pa": {
+        "chat": "ਘਰ ਵਿੱਚ ਵਧੀਆ ਚਾਹ ਕਿਵੇਂ ਬਣਾਈਏ?",
+        "weather": "ਅੱਜ ਦਿੱਲੀ ਵਿੱਚ ਮੌਸਮ ਕਿਹੋ ਜਿਹਾ ਹੈ?",
+        "news": "ਮੈਨੂੰ ਮੁੰਬਈ ਦੀਆਂ ਤਾਜ਼ਾ ਖ਼ਬਰਾਂ ਦੱਸੋ।",
+        "time": "ਹੁਣ ਕੋਲਕਾਤਾ ਵਿੱਚ ਕੀ ਸਮਾਂ ਹੋਇਆ ਹੈ?",
+        "quote": "ਮੈਨੂੰ ਇੱਕ ਹਵਾਲਾ ਦੱਸੋ।",
+        "fact": "ਮੈਨੂੰ ਇੱਕ ਮਜ਼ੇਦਾਰ ਤੱਥ ਦੱਸੋ।",
+        "define": "ਬੁੱਧੀ ਦੀ ਪਰਿਭਾਸ਼ਾ ਦਿਓ।",
+    },
+    "sa": {
+        "chat": "गृहे उत्तमं चायपेयं कथं निर्मीयते?",
+        "weather": "अद्य दिल्लीनगरे वातावरणं कीदृशम् अस्ति?",
+        "news": "मुम्बईनगरस्य नूतनवार्ताः मां वद।",
+        "time": "इदानीं कोलकातानगरे कः समयः?",
+        "quote": "मह्यम् एकं सुभाषितं वद।",
+        "fact": "मह्यम् एकं रोचकं तथ्यं वद।",
+        "define": "बुद्धेः परिभाषां वद।",
+    },
+    "sd": {
+        "chat": "گهر ۾ سٺي چانهه ڪيئن ٺاهيان؟",
+        "weather": "اڄ دهليءَ ۾ موسم ڪيئن آهي؟",
+        "news": "مون کي ممبئي جون تازيون خبرون ٻڌايو.",
+        "time": "هن وقت ڪولڪتا ۾ ڇا وقت ٿيو آهي؟",
+        "quote": "مون کي ڪو قول ٻڌايو.",
+        "fact": "مون کي ڪا دلچسپ حقيقت ٻڌايو.",
+        "define": "ذهانت جي وصف ٻڌايو.",
+    },
+    "ta": {
+        "chat": "வீட்டில் நல்ல தேநீர் எப்படி தயாரிப்பது?",
+        "weather": "இன்று டெல்லியில் வானிலை எப்படி இருக்கிறது?",
+        "news": "மும்பையின் சமீபத்திய செய்திகளைச் சொல்லுங்கள்.",
+        "time": "இப்போது கொல்கத்தாவில் நேரம் என்ன?",
+        "quote": "எனக்கு ஒரு மேற்கோள் சொல்லுங்கள்.",
+        "fact": "எனக்கு ஒரு சுவாரஸ்யமான உண்மையைச் சொல்லுங்கள்.",
+        "define": "நுண்ணறிவை வரையறுக்கவும்.",
+    },
+    "te": {
+        "chat": "ఇంట్లో మంచి టీ ఎలా తయారు చేయాలి?",
+        "weather": "ఈ రోజు ఢిల్లీలో వాతావరణం ఎలా ఉంది?",
+        "news": "ముంబై తాజా వార్తలు చెప్పండి.",
+        "time": "ఇప్పుడు కోల్‌కతాలో సమయం ఎంత?",
+        "quote": "నాకు ఒక సూక్తి చెప్పండి.",
+        "fact": "నాకు ఒక ఆసక్తికరమైన వాస్తవం చెప్పండి.",
+        "define": "తెలివితేటలను నిర్వచించండి.",
+    },
+    "ur": {
+        "chat": "گھر پر اچھی چائے کیسے بناؤں؟",
+        "weather": "آج دہلی میں موسم کیسا ہے؟",
+        "news": "مجھے ممبئی کی تازہ خبریں بتاؤ۔",
+        "time": "اس وقت کولکتہ میں کیا وقت ہوا ہے؟",
+        "quote": "مجھے ایک اقتباس سناؤ۔",
+        "fact": "مجھے ایک دلچسپ حقیقت بتاؤ۔",
+        "define": "ذہانت کی تعریف بتاؤ۔",
+    },
+}
+
+# Share of each prompt kind in a generated workload; "long" prompts go through summarization
+KIND_WEIGHTS = {
+    "chat": 0.3, "weather": 0.12, "news": 0.12, "time": 0.08,
+    "quote": 0.05, "fact": 0.05, "define": 0.05, "long": 0.23,
+}
+LONG_PROMPT_REPEATS = 12  # repeats of the chat question, enough to exceed PROMPT_TOKEN_BUDGET
+
+
+def build_workload(size, seed=0, languages=None):
+    """Deterministic list of requests; languages are cycled so every one is covered"""
+    rng = random.Random(seed)
+    languages = languages or list(PROMPTS)
+    kinds, weights = zip(*KIND_WEIGHTS.items())
+    workload = []
+    for i in range(size):
+        lang = languages[i % len(languages)]
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "long":
+            text = " ".join([PROMPTS[lang]["chat"]] * LONG_PROMPT_REPEATS)
+        else:
+            text = PROMPTS[lang][kind]
+        workload.append({"id": i, "lang": lang, "kind": kind, "text": text})
+    rng.shuffle(workload)
+    return workload
+
+
+def load_workload(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_workload(workload, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for item in workload:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+
+def parse_server_timing(header):
+    """'detect;dur=1.2, llm;dur=400.0' → {"detect": 1.2, "llm": 400.0} (milliseconds)"""
+    timings = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if name and key == "dur":
+                timings[name] = float(value)
+    return timings
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_summary(values):
+    if not values:
+        return None
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 1),
+        "p50_ms": round(percentile(values, 50), 1),
+        "p95_ms": round(percentile(values, 95), 1),
+        "p99_ms": round(percentile(values, 99), 1),
+        "max_ms": round(max(values), 1),
+    }
+
+
+def summarize_results(records, wall_seconds):
+    ok = [r for r in records if r["status"] == 200]
+    summary = {
+        "requests": len(records),
+        "errors": len(records) - len(ok),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(ok) / wall_seconds, 3) if wall_seconds else None,
+        "latency": latency_summary([r["latency_ms"] for r in ok]),
+        "stages": {},
+        "by_kind": {},
+        "by_lang": {},
+    }
+    stages = sorted({stage for r in ok for stage in r["stages"]})
+    for stage in stages:
+        summary["stages"][stage] = latency_summary([r["stages"][stage] for r in ok if stage in r["stages"]])
+    for field, target in (("kind", "by_kind"), ("lang", "by_lang")):
+        for value in sorted({r[field] for r in ok}):
+            summary[target][value] = latency_summary([r["latency_ms"] for r in ok if r[field] == value])
+    return summary
+
+
+# === Clients ===
+
+class InProcessClient:
+    """Runs main.app in this process (FastAPI TestClient) against the fake services"""
+
+    def __init__(self):
+        from fastapi.testclient import TestClient
+        import main
+
+        self.client = TestClient(main.app)
+
+    def post(self, path, payload, session_id=None):
+        headers = {SESSION_HEADER: session_id} if session_id else None
+        response = self.client.post(path, json=payload, headers=headers)
+        return response.status_code, response.headers.get("server-timing")
+
+
+class HTTPClient:
+    def __init__(self, base_url):
+        import requests
+
+        self.session = requests.Session()
+        self.base_url = base_url.rstrip("/")
+
+    def post(self, path, payload, session_id=None):
+        headers = {SESSION_HEADER: session_id} if session_id else None
+        response = self.session.post(self.base_url + path, json=payload, headers=headers, timeout=300)
+        return response.status_code, response.headers.get("server-timing")
+
+
+def run_request(client, item, send_language):
+    payload = {"text": item["text"]}
+    if send_language:
+        payload["language"] = item["lang"]
+    # A fresh session per request (the header wins over any cookie the client kept)
+    session_id = uuid.uuid4().hex
+    start = time.perf_counter()
+    try:
+        client.post("/set-mode", {"mode": "text"}, session_id)
+        start = time.perf_counter()
+        status, timing_header = client.post("/chat", payload, session_id)
+    except Exception as e:
+        print(f"  ❌ request {item['id']} failed: {e}")
+        status, timing_header = None, None
+    return {
+        "id": item["id"],
+        "lang": item["lang"],
+        "kind": item["kind"],
+        "status": status,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        "stages": parse_server_timing(timing_header),
+    }
+
+
+def run_benchmark(client, workload, concurrency, warmup, send_language):
+    # Warm-up requests load the local models and are not counted
+    for item in workload[:warmup]:
+        run_request(client, item, send_language)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        records = list(pool.map(lambda item: run_request(client, item, send_language), workload))
+    return records, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end /chat benchmark with fake upstream services")
+    parser.add_argument("--requests", type=int, default=100, help="size of a generated workload")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--languages", nargs="+", default=list(PROMPTS))
+    parser.add_argument("--workload", help="replay a saved JSON Lines workload instead of generating one")
+    parser.add_argument("--save-workload", help="write the workload as JSON Lines and exit")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--send-language", action="store_true", help="send the language hint (skips detection)")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--gemini-latency-ms", type=float, default=400)
+    parser.add_argument("--api-latency-ms", type=float, default=80)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    workload = load_workload(args.workload) if args.workload else build_workload(args.requests, args.seed, args.languages)
+    if args.save_workload:
+        save_workload(workload, args.save_workload)
+        print(f"📄 {len(workload)} requests written to {args.save_workload}")
+        return 0
+
+    services = None
+    if args.url:
+        client = HTTPClient(args.url)
+    else:
+        services = FakeServices(gemini_latency_ms=args.gemini_latency_ms, api_latency_ms=args.api_latency_ms)
+        services.start()
+        # Must be set before the backend modules are imported
+        os.environ.update(services.env())
+        client = InProcessClient()
+
+    print(f"🚀 Running {len(workload)} requests at concurrency {args.concurrency}...")
+    records, wall_seconds = run_benchmark(client, workload, args.concurrency, args.warmup, args.send_language)
+    summary = summarize_results(records, wall_seconds)
+
+    latency = summary["latency"] or {}
+    print(f"\n✅ {summary['requests'] - summary['errors']}/{summary['requests']} ok, "
+          f"{summary['throughput_rps']} req/s")
+    print(f"  latency p50 {latency.get('p50_ms')} ms, p95 {latency.get('p95_ms')} ms, p99 {latency.get('p99_ms')} ms")
+    for stage, stats in summary["stages"].items():
+        print(f"  {stage:<14} p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  (n={stats['count']})")
+
+    if args.output:
+        results = {
+            "config": {
+                "requests": len(workload),
+                "concurrency": args.concurrency,
+                "warmup": args.warmup,
+                "seed": args.seed,
+                "workload": args.workload,
+                "send_language": args.send_language,
+                "url": args.url,
+                "gemini_latency_ms": None if args.url else args.gemini_latency_ms,
+                "api_latency_ms": None if args.url else args.api_latency_ms,
+            },
+            "summary": summary,
+            "upstream_calls": services.calls if services else None,
+            "requests": records,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 Results written to {args.output}")
+
+    if services:
+        services.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Quality / latency benchmark for NLLB generation policies.
+
+The test set is the parallel sample prompts in bench_e2e.PROMPTS: every language asks the same
+questions (the four in KINDS are used), so each one is translated to English (English prompt as reference) and English is
+translated into each language NLLB has a code of its own for (that language's prompt as reference).
+--long-repeats also adds paragraph-length inputs (all four questions, repeated) in both directions.
+
+    python -m benchmarks.bench_generation_policy --policies fixed greedy fast balanced adaptive --queue-depths 0 2 4
+
+Reports chrF and mean / p95 latency for every policy and queue depth, how many outputs hit their
+token limit, and the observed output/input token ratio per language to tune EXPANSION_RATIOS.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import torch
+
+from backend.generation_policy import GenerationPolicy
+from backend.translator import NLLBTranslator, TRANSLATOR_MODEL
+from benchmarks.bench_e2e import PROMPTS
+
+KINDS = ["chat", "weather", "news", "time"]
+# Languages whose prompts are written in the NLLB language they map to (not e.g. Dogri → hin_Deva)
+FROM_ENGLISH = ["as", "bn", "gu", "hi", "kn", "ml", "mr", "ne", "pa", "sa", "sd", "ta", "te", "ur"]
+
+
+# === chrF ===
+
+def char_ngrams(text, n):
+    text = "".join(text.split())  # chrF ignores whitespace
+    return Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def chrf(references, hypotheses, max_order=6, beta=2.0):
+    """Corpus-level chrF (Popović, 2015) on a 0-100 scale, as computed by sacrebleu's defaults"""
+    matches, hyp_total, ref_total = [0] * max_order, [0] * max_order, [0] * max_order
+    for reference, hypothesis in zip(references, hypotheses):
+        for n in range(1, max_order + 1):
+            ref_ngrams, hyp_ngrams = char_ngrams(reference, n), char_ngrams(hypothesis, n)
+            matches[n - 1] += sum((ref_ngrams & hyp_ngrams).values())
+            hyp_total[n - 1] += sum(hyp_ngrams.values())
+            ref_total[n - 1] += sum(ref_ngrams.values())
+
+    orders = [n for n in range(max_order) if hyp_total[n] and ref_total[n]]
+    if not orders:
+        return 0.0
+    precision = sum(matches[n] / hyp_total[n] for n in orders) / len(orders)
+    recall = sum(matches[n] / ref_total[n] for n in orders) / len(orders)
+    if precision + recall == 0:
+        return 0.0
+    return 100 * (1 + beta ** 2) * precision * recall / (beta ** 2 * precision + recall)
+
+
+# === Test set ===
+
+def build_test_set(translator, long_repeats=0):
+    """(name, text, source NLLB code, target NLLB code, reference) for every direction"""
+    cases = []
+    for lang in sorted(PROMPTS):
+        if lang == "en":
+            continue
+        code = translator.lang_detect_map[lang]
+        for kind in KINDS:
+            cases.append((f"{lang}-en/{kind}", PROMPTS[lang][kind], code, "eng_Latn", PROMPTS["en"][kind]))
+        if lang in FROM_ENGLISH:
+            for kind in KINDS:
+                cases.append((f"en-{lang}/{kind}", PROMPTS["en"][kind], "eng_Latn", code, PROMPTS[lang][kind]))
+
+        if long_repeats:
+            paragraph = {l: " ".join([PROMPTS[l][kind] for kind in KINDS] * long_repeats) for l in (lang, "en")}
+            cases.append((f"{lang}-en/long", paragraph[lang], code, "eng_Latn", paragraph["en"]))
+            if lang in FROM_ENGLISH:
+                cases.append((f"en-{lang}/long", paragraph["en"], "eng_Latn", code, paragraph[lang]))
+    return cases
+
+
+# === Runs ===
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def translate_with(translator, policy, text, source_lang, target_lang, queue_depth):
+    """
+    NLLBTranslator._generate with an explicit policy and queue depth.
+    Returns (translation, input tokens, generated tokens, generate options).
+    """
+    encoded = translator.encode([text], source_lang)
+    input_tokens = int(encoded["attention_mask"].sum()) - 2
+    options = policy.options(input_tokens, source_lang, target_lang, queue_depth)
+    with torch.inference_mode():
+        generated = translator.model.generate(
+            **encoded, forced_bos_token_id=translator.language_token_id(target_lang), **options
+        )
+    # Everything after the decoder start token, the forced language token and </s> included
+    new_tokens = int((generated[0] != translator.tokenizer.pad_token_id).sum()) - 1
+    return translator.tokenizer.decode(generated[0], skip_special_tokens=True), input_tokens, new_tokens, options
+
+
+def benchmark_policy(translator, policy, cases, queue_depth):
+    latencies, references, hypotheses = [], [], []
+    presets, token_ratios = Counter(), {}
+    at_limit = 0
+    for name, text, source_lang, target_lang, reference in cases:
+        start = time.perf_counter()
+        hypothesis, input_tokens, new_tokens, options = translate_with(
+            translator, policy, text, source_lang, target_lang, queue_depth
+        )
+        latencies.append(time.perf_counter() - start)
+        references.append(reference)
+        hypotheses.append(hypothesis)
+
+        presets[policy.choose_preset(input_tokens, queue_depth)] += 1
+        at_limit += new_tokens >= options.get("max_new_tokens", options.get("max_length", 0) - 1)
+        # Non-English tokens per English token, keyed by the non-English language
+        output_tokens = max(1, new_tokens - 2)
+        if source_lang == "eng_Latn":
+            token_ratios.setdefault(target_lang, []).append(output_tokens / max(1, input_tokens))
+        else:
+            token_ratios.setdefault(source_lang, []).append(max(1, input_tokens) / output_tokens)
+
+    return {
+        "policy": policy.mode,
+        "queue_depth": queue_depth,
+        "presets": dict(presets),
+        "chrf": round(chrf(references, hypotheses), 2),
+        "mean_latency_ms": round(sum(latencies) / len(latencies) * 1000, 1),
+        "p95_latency_ms": round(percentile(latencies, 95) * 1000, 1),
+        "at_token_limit": at_limit,
+        "expansion": {code: round(sum(r) / len(r), 2) for code, r in sorted(token_ratios.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NLLB generation policy benchmark")
+    parser.add_argument("--checkpoint", default=TRANSLATOR_MODEL, help="NLLB checkpoint name or directory")
+    parser.add_argument("--policies", nargs="+", default=["fixed", "greedy", "fast", "balanced", "adaptive"])
+    parser.add_argument("--queue-depths", nargs="+", type=int, default=[0],
+                        help="simulated translate queue depths (only change the adaptive policy)")
+    parser.add_argument("--long-repeats", type=int, default=3,
+                        help="repeats of the four questions in the paragraph cases (0 = none)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    translator = NLLBTranslator(model_name=args.checkpoint)
+    translator._load_model()
+    cases = build_test_set(translator, args.long_repeats)
+    print(f"🧪 {len(cases)} test sentences")
+
+    translate_with(translator, GenerationPolicy(mode="greedy"), *cases[0][1:4], 0)  # warm-up
+    results = []
+    for mode in args.policies:
+        policy = GenerationPolicy(mode=mode)
+        depths = args.queue_depths if mode == "adaptive" else [0]
+        for depth in depths:
+            result = benchmark_policy(translator, policy, cases, depth)
+            results.append(result)
+            print(
+                f"📊 {mode:<8} depth={depth}: chrF {result['chrf']:.2f}, mean {result['mean_latency_ms']} ms, "
+                f"p95 {result['p95_latency_ms']} ms, {result['at_token_limit']} at token limit {result['presets']}"
+            )
+
+    print(f"\n📏 Observed tokens per English token: {results[0]['expansion']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
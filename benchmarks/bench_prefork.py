@@ -0,0 +1,189 @@
+"""
+Memory and throughput of the pre-fork server (serve.py) versus worker count.
+
+    python -m benchmarks.bench_prefork --workers 1 2 4 --requests 200 --output prefork.json
+
+For every worker count this starts serve.py against the fake upstream services, runs the
+end-to-end workload over HTTP, then reads /proc/<pid>/smaps_rollup for the parent and each
+worker. RSS counts shared pages in every process; PSS splits them between the processes
+sharing them, so the sum of PSS is the real footprint. With copy-on-write working, total
+PSS grows far slower than workers × single-process RSS. Linux only.
+
+Each client thread keeps one connection, so its /set-mode and /chat calls reach the same
+worker even with the default in-memory sessions.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.bench_e2e import PROMPTS, HTTPClient, build_workload, run_request, summarize_results
+from benchmarks.fake_services import FakeServices
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MEMORY_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def read_memory(pid):
+    """smaps_rollup fields of one process, in MB"""
+    memory = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in MEMORY_FIELDS:
+                memory[name.lower() + "_mb"] = round(int(value.split()[0]) / 1024, 1)
+    return memory
+
+
+def child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def wait_until_ready(url, process, timeout):
+    import requests
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"serve.py exited with status {process.returncode}")
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Server at {url} not ready after {timeout}s")
+
+
+def check_workers_answer(url, workers, timeout):
+    """
+    Send a translated chat on several fresh connections at once, so they land on different
+    workers, and fail fast if any worker does not answer (e.g. a fork-after-OpenMP hang)
+    """
+    import requests
+
+    def probe(_):
+        with requests.Session() as session:
+            session.post(url + "/set-mode", json={"mode": "text"}, timeout=timeout)
+            return session.post(url + "/chat", json={"text": PROMPTS["hi"]["chat"]}, timeout=timeout).status_code
+
+    with ThreadPoolExecutor(max_workers=workers * 2) as pool:
+        try:
+            statuses = list(pool.map(probe, range(workers * 2)))
+        except requests.exceptions.Timeout:
+            raise AssertionError(f"A worker did not answer within {timeout}s")
+    assert all(status == 200 for status in statuses), f"Workers answered with {statuses}"
+
+
+def run_workload(url, workload, concurrency, warmup):
+    local = threading.local()
+
+    def client():
+        # One keep-alive connection (and so one worker) per client thread
+        if not hasattr(local, "client"):
+            local.client = HTTPClient(url)
+        return local.client
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda item: run_request(client(), item, False), workload[:warmup]))
+        start = time.perf_counter()
+        records = list(pool.map(lambda item: run_request(client(), item, False), workload))
+    return records, time.perf_counter() - start
+
+
+def benchmark_workers(workers, workload, args, env):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    command = [sys.executable, "serve.py", "--workers", str(workers), "--port", str(port)]
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env)
+    try:
+        wait_until_ready(url, process, args.startup_timeout)
+        assert len(child_pids(process.pid)) == workers, f"Expected {workers} workers"
+        check_workers_answer(url, workers, args.answer_timeout)
+        parent_after_load = read_memory(process.pid)
+
+        concurrency = args.concurrency or workers * 2
+        records, wall_seconds = run_workload(url, workload, concurrency, args.warmup)
+
+        worker_memory = [read_memory(pid) for pid in child_pids(process.pid)]
+        parent_memory = read_memory(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    summary = summarize_results(records, wall_seconds)
+    return {
+        "workers": workers,
+        "concurrency": concurrency,
+        "throughput_rps": summary["throughput_rps"],
+        "latency": summary["latency"],
+        "errors": summary["errors"],
+        "parent_after_load": parent_after_load,
+        "parent": parent_memory,
+        "worker_memory": worker_memory,
+        "total_rss_mb": round(parent_memory["rss_mb"] + sum(m["rss_mb"] for m in worker_memory), 1),
+        "total_pss_mb": round(parent_memory["pss_mb"] + sum(m["pss_mb"] for m in worker_memory), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork server memory and throughput scaling")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=None, help="client threads (default: 2 × workers)")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--gemini-latency-ms", type=float, default=100)
+    parser.add_argument("--api-latency-ms", type=float, default=20)
+    parser.add_argument("--startup-timeout", type=float, default=600)
+    parser.add_argument("--answer-timeout", type=float, default=120,
+                        help="seconds every worker gets to answer its first translated chat")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    services = FakeServices(gemini_latency_ms=args.gemini_latency_ms, api_latency_ms=args.api_latency_ms)
+    services.start()
+    env = {**os.environ, **services.env()}
+    workload = build_workload(args.requests, args.seed)
+
+    results = []
+    for workers in args.workers:
+        print(f"\n🚀 Benchmarking {workers} worker(s)...")
+        result = benchmark_workers(workers, workload, args, env)
+        results.append(result)
+        per_worker_pss = [m["pss_mb"] for m in result["worker_memory"]]
+        print(f"  {result['throughput_rps']} req/s, p95 {(result['latency'] or {}).get('p95_ms')} ms, "
+              f"{result['errors']} errors")
+        print(f"  total RSS {result['total_rss_mb']} MB, total PSS {result['total_pss_mb']} MB "
+              f"(parent {result['parent']['pss_mb']} MB, workers {per_worker_pss})")
+
+    baseline = results[0]
+    for result in results:
+        if baseline["throughput_rps"] and result["throughput_rps"]:
+            result["speedup"] = round(result["throughput_rps"] / baseline["throughput_rps"], 2)
+            result["efficiency"] = round(result["speedup"] * baseline["workers"] / result["workers"], 2)
+    services.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
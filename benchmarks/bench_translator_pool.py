@@ -0,0 +1,118 @@
+"""
+Translation throughput versus the number of translator replicas.
+
+    python -m benchmarks.bench_translator_pool --replicas 1 2 4 8 --sentences 256 --output pool.json
+
+Every replica gets --threads cores of its own (default: all cores / the largest replica
+count), so the largest configuration uses the whole machine. The baseline row is the
+current single in-process NLLBTranslator using every core for intra-op threads.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import torch
+
+from backend.translator import get_translator_instance
+from backend.translator_pool import TranslatorReplicaPool, available_cores
+from benchmarks.bench_e2e import PROMPTS
+
+
+def build_batches(sentences, batch_size, translator):
+    """(texts, source NLLB code) batches cycling through every language's sample prompts"""
+    pool = [(text, translator.lang_detect_map[lang])
+            for lang, prompts in sorted(PROMPTS.items()) if lang != "en"
+            for text in prompts.values()]
+    items = [pool[i % len(pool)] for i in range(sentences)]
+    by_lang = {}
+    for text, source in items:
+        by_lang.setdefault(source, []).append(text)
+    return [
+        (texts[start:start + batch_size], source)
+        for source, texts in by_lang.items()
+        for start in range(0, len(texts), batch_size)
+    ]
+
+
+def run_baseline(batches, cores):
+    translator = get_translator_instance()
+    translator._load_model()
+    torch.set_num_threads(len(cores))
+    texts, source = batches[0]
+    translator.translate_batch(texts, source, "eng_Latn")  # warm-up
+    start = time.perf_counter()
+    for texts, source in batches:
+        translator.translate_batch(texts, source, "eng_Latn")
+    return time.perf_counter() - start
+
+
+def run_pool(batches, pool):
+    for future in [pool.submit(batches[0][0], batches[0][1], "eng_Latn") for _ in range(pool.replicas)]:
+        future.result()  # warm-up, one batch per replica
+    start = time.perf_counter()
+    futures = [pool.submit(texts, source, "eng_Latn") for texts, source in batches]
+    for future in futures:
+        future.result()
+    return time.perf_counter() - start, pool.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Translator replica pool scaling benchmark")
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=None, help="torch threads (= pinned cores) per replica")
+    parser.add_argument("--sentences", type=int, default=128)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--skip-baseline", action="store_true")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    cores = available_cores()
+    threads = args.threads or max(1, len(cores) // max(args.replicas))
+    batches = build_batches(args.sentences, args.batch_size, get_translator_instance())
+    print(f"🧪 {args.sentences} sentences in {len(batches)} batches, {len(cores)} cores, {threads} threads per replica")
+
+    # Every pool starts before the all-core baseline runs in this process, so with
+    # TRANSLATOR_POOL_START_METHOD=fork no replica is forked after all-core translations
+    pools = {}
+    results = []
+    try:
+        for replicas in args.replicas:
+            pools[replicas] = TranslatorReplicaPool(replicas, threads).start()
+
+        if not args.skip_baseline:
+            seconds = run_baseline(batches, cores)
+            results.append({"mode": "single", "replicas": 1, "threads": len(cores),
+                            "seconds": round(seconds, 3), "sentences_per_second": round(args.sentences / seconds, 2)})
+            print(f"  single translator, {len(cores)} threads: {results[-1]['sentences_per_second']} sentences/s")
+
+        for replicas, pool in pools.items():
+            seconds, stats = run_pool(batches, pool)
+            results.append({"mode": "pool", "replicas": replicas, "threads": threads,
+                            "seconds": round(seconds, 3), "sentences_per_second": round(args.sentences / seconds, 2),
+                            "completed": stats["completed"], "stolen": stats["stolen"]})
+            print(f"  {replicas} replicas × {threads} threads: {results[-1]['sentences_per_second']} sentences/s "
+                  f"(batches per replica {stats['completed']}, stolen {stats['stolen']})")
+    finally:
+        for pool in pools.values():
+            pool.close()
+
+    pool_results = [r for r in results if r["mode"] == "pool"]
+    if pool_results:
+        base = pool_results[0]
+        for result in pool_results:
+            result["speedup"] = round(result["sentences_per_second"] / base["sentences_per_second"], 2)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": {**vars(args), "cores": len(cores), "threads_per_replica": threads},
+                       "results": results}, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Latency benchmark for the text-to-speech engines, per language.
+
+    python -m benchmarks.bench_tts --engines mms espeak gtts --repeats 3
+
+Calls each engine directly (bypassing the speech cache) and reports the cold first call
+(including model load), warm mean latency and, for WAV output, the real-time factor.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import wave
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.tts_engines import ENGINE_CLASSES, get_tts_engine
+
+# One short reply per language in the translator's lang_detect_map
+SAMPLE_SENTENCES = {
+    "as": "আজি বতৰ ভাল।",
+    "bn": "আজকের আবহাওয়া ভালো।",
+    "brx": "दिनै बतोर मोजां।",
+    "doi": "अज्ज मौसम खरा ऐ।",
+    "en": "The weather is pleasant today.",
+    "gom": "आयज हवामान बरें आसा।",
+    "gu": "આજે હવામાન સારું છે.",
+    "hi": "आज मौसम अच्छा है।",
+    "kn": "ಇಂದು ಹವಾಮಾನ ಚೆನ್ನಾಗಿದೆ.",
+    "ks": "اَز چھُ موسم جان۔",
+    "mai": "आइ मौसम नीक अछि।",
+    "ml": "ഇന്ന് കാലാവസ്ഥ നല്ലതാണ്.",
+    "mr": "आज हवामान छान आहे.",
+    "ne": "आज मौसम राम्रो छ।",
+    "pa": "ਅੱਜ ਮੌਸਮ ਵਧੀਆ ਹੈ।",
+    "sa": "अद्य वातावरणं शोभनम् अस्ति।",
+    "sd": "اڄ موسم سٺو آهي.",
+    "ta": "இன்று வானிலை நன்றாக உள்ளது.",
+    "te": "ఈ రోజు వాతావరణం బాగుంది.",
+    "ur": "آج موسم اچھا ہے۔",
+}
+
+
+def wav_duration(audio):
+    try:
+        with wave.open(io.BytesIO(audio), "rb") as wav:
+            return wav.getnframes() / wav.getframerate()
+    except (wave.Error, EOFError):
+        return None
+
+
+def benchmark_engine(engine_name, languages, repeats):
+    engine = get_tts_engine(engine_name)
+    results = []
+    for lang in languages:
+        if not engine.supports(lang):
+            results.append({"engine": engine_name, "lang": lang, "supported": False})
+            continue
+
+        text = SAMPLE_SENTENCES[lang]
+        try:
+            start = time.perf_counter()
+            audio = engine.synthesize(text, lang)
+            cold_seconds = time.perf_counter() - start
+
+            warm = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                audio = engine.synthesize(text, lang)
+                warm.append(time.perf_counter() - start)
+        except Exception as e:
+            results.append({"engine": engine_name, "lang": lang, "supported": True, "error": str(e)})
+            continue
+
+        warm_seconds = sum(warm) / len(warm)
+        duration = wav_duration(audio) if engine.audio_format == "wav" else None
+        results.append({
+            "engine": engine_name,
+            "lang": lang,
+            "supported": True,
+            "cold_ms": round(cold_seconds * 1000, 1),
+            "warm_ms": round(warm_seconds * 1000, 1),
+            "audio_seconds": round(duration, 3) if duration else None,
+            "rtf": round(warm_seconds / duration, 4) if duration else None,
+            "bytes": len(audio),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS engine latency benchmark")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINE_CLASSES))
+    parser.add_argument("--languages", nargs="+", default=list(SAMPLE_SENTENCES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = []
+    for engine_name in args.engines:
+        print(f"\n🔊 Benchmarking {engine_name}...")
+        for result in benchmark_engine(engine_name, args.languages, args.repeats):
+            results.append(result)
+            if not result["supported"]:
+                print(f"  {result['lang']:<4} unsupported")
+            elif "error" in result:
+                print(f"  {result['lang']:<4} ❌ {result['error']}")
+            else:
+                rtf = f", RTF {result['rtf']}" if result["rtf"] is not None else ""
+                print(f"  {result['lang']:<4} cold {result['cold_ms']} ms, warm {result['warm_ms']} ms{rtf}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
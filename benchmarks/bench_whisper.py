@@ -0,0 +1,123 @@
+"""
+Real-time factor (RTF) benchmark for Whisper configurations.
+
+Put a fixed set of audio clips (wav/mp3/ogg/opus/flac) in benchmarks/clips/ (or pass --clips)
+and run from the repository root:
+
+    python -m benchmarks.bench_whisper --configs small:cpu:int8 small:cuda:float16
+
+RTF = decode time / audio duration, so anything below 1.0 is faster than real time.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from faster_whisper import decode_audio
+
+from backend import speech_to_text
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".ogg", ".opus", ".flac", ".m4a")
+DEFAULT_CLIPS_DIR = os.path.join(os.path.dirname(__file__), "clips")
+
+
+def load_clips(clips_dir):
+    clips = []
+    for name in sorted(os.listdir(clips_dir)):
+        if name.lower().endswith(AUDIO_EXTENSIONS):
+            audio = decode_audio(os.path.join(clips_dir, name), sampling_rate=speech_to_text.sample_rate)
+            clips.append((name, audio))
+    return clips
+
+
+def parse_config(spec):
+    # "size:device:compute_type[:cpu_threads[:num_workers]]", empty fields fall back to auto
+    fields = (spec.split(":") + [""] * 5)[:5]
+    size, device, compute_type, cpu_threads, num_workers = fields
+    return {
+        "model_size": size or None,
+        "device": device or None,
+        "compute_type": compute_type or None,
+        "cpu_threads": int(cpu_threads) if cpu_threads else None,
+        "num_workers": int(num_workers) if num_workers else None,
+    }
+
+
+def benchmark_config(spec, clips, beam_size=5):
+    load_start = time.perf_counter()
+    model = speech_to_text.load_whisper(**parse_config(spec))
+    load_seconds = time.perf_counter() - load_start
+    config = dict(speech_to_text.loaded_config)
+
+    # Warm-up so one-off allocations are not charged to the first clip
+    list(model.transcribe(clips[0][1][:speech_to_text.sample_rate], beam_size=1)[0])
+
+    per_clip = []
+    for name, audio in clips:
+        start = time.perf_counter()
+        segments, _ = model.transcribe(audio, beam_size=beam_size)
+        text = " ".join(segment.text.strip() for segment in segments)
+        decode_seconds = time.perf_counter() - start
+        duration = len(audio) / speech_to_text.sample_rate
+        per_clip.append({
+            "clip": name,
+            "audio_seconds": round(duration, 3),
+            "decode_seconds": round(decode_seconds, 3),
+            "rtf": round(decode_seconds / duration, 4),
+            "text": text,
+        })
+
+    speech_to_text.unload_whisper()
+    total_audio = sum(c["audio_seconds"] for c in per_clip)
+    total_decode = sum(c["decode_seconds"] for c in per_clip)
+    return {
+        "spec": spec,
+        "config": config,
+        "load_seconds": round(load_seconds, 2),
+        "rtf": round(total_decode / total_audio, 4),
+        "clips": per_clip,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper real-time factor benchmark")
+    parser.add_argument("--clips", default=DEFAULT_CLIPS_DIR, help="directory of audio clips")
+    parser.add_argument("--configs", nargs="+", default=["auto"],
+                        help="size:device:compute_type[:cpu_threads[:num_workers]] (use 'auto' for auto-detection)")
+    parser.add_argument("--beam-size", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    clips = load_clips(args.clips)
+    if not clips:
+        print(f"❌ No audio clips found in {args.clips}")
+        return 1
+
+    results = []
+    for spec in args.configs:
+        print(f"\n⏱️ Benchmarking {spec}...")
+        try:
+            result = benchmark_config("" if spec == "auto" else spec, clips, beam_size=args.beam_size)
+        except Exception as e:
+            print(f"❌ {spec} failed: {e}")
+            continue
+        results.append(result)
+        config = result["config"]
+        print(
+            f"✅ {config['model_size_or_path']} {config['device']}/{config['compute_type']} "
+            f"threads={config['cpu_threads']} workers={config['num_workers']}: "
+            f"RTF {result['rtf']} (load {result['load_seconds']}s)"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Shared options and fixtures for the pytest-benchmark micro suites (benchmarks/test_bench_*.py).
+
+    pip install -r requirements-dev.txt
+    python -m pytest benchmarks --benchmark-only --benchmark-json=micro.json
+    python -m pytest benchmarks --benchmark-only --tiny-models      # tiny random-weight models
+
+Runs offline by default (HF_HUB_OFFLINE=1): checkpoints must already be in the Hugging Face
+cache or be local directories, otherwise the model benchmarks are skipped.
+--tiny-models only needs the tokenizer and config of each checkpoint and builds a two-layer
+model with random weights from them, which keeps timings about the code paths rather than
+the network size. Each benchmark stores its tracemalloc peak (Python heap only) and the
+process RSS peak (which includes torch tensor buffers) in extra_info.
+"""
+import os
+import sys
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Shapes of the --tiny-models networks (BART and NLLB/M2M100 share these config names)
+TINY_MODEL_DIMENSIONS = {
+    "d_model": 64,
+    "encoder_layers": 2,
+    "decoder_layers": 2,
+    "encoder_attention_heads": 4,
+    "decoder_attention_heads": 4,
+    "encoder_ffn_dim": 128,
+    "decoder_ffn_dim": 128,
+}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("promptbridge benchmarks")
+    group.addoption("--translator-checkpoint", default=None,
+                    help="NLLB checkpoint name or directory (default: TRANSLATOR_MODEL)")
+    group.addoption("--summarizer-checkpoint", default=None,
+                    help="BART checkpoint name or directory (default: SUMMARIZER_MODEL)")
+    group.addoption("--tiny-models", action="store_true",
+                    help="build tiny random-weight models from the checkpoints' configs")
+    group.addoption("--allow-download", action="store_true",
+                    help="let Hugging Face download missing checkpoints")
+    group.addoption("--bench-rounds", type=int, default=5, help="timed rounds per model benchmark")
+
+
+def pytest_configure(config):
+    if not config.getoption("allow_download"):
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+
+def build_tiny_model(checkpoint, directory):
+    """Save the checkpoint's tokenizer plus a tiny random-weight model with the same vocabulary"""
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer
+
+    config = AutoConfig.from_pretrained(checkpoint)
+    for name, value in TINY_MODEL_DIMENSIONS.items():
+        setattr(config, name, value)
+    AutoTokenizer.from_pretrained(checkpoint).save_pretrained(directory)
+    AutoModelForSeq2SeqLM.from_config(config).save_pretrained(directory)
+    return str(directory)
+
+
+def resolve_checkpoint(request, tmp_path_factory, option, default):
+    checkpoint = request.config.getoption(option) or default
+    if not request.config.getoption("tiny_models"):
+        return checkpoint
+    try:
+        return build_tiny_model(checkpoint, tmp_path_factory.mktemp(f"tiny-{option}"))
+    except OSError as e:
+        pytest.skip(f"{checkpoint} tokenizer/config not available offline: {e}")
+
+
+@pytest.fixture(scope="session")
+def rounds(request):
+    return request.config.getoption("bench_rounds")
+
+
+@pytest.fixture(scope="session")
+def translator(request, tmp_path_factory):
+    """A loaded NLLBTranslator (separate from the app's shared instance)"""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from backend.translator import NLLBTranslator, TRANSLATOR_MODEL
+
+    checkpoint = resolve_checkpoint(request, tmp_path_factory, "translator_checkpoint", TRANSLATOR_MODEL)
+    instance = NLLBTranslator(checkpoint)
+    try:
+        instance._load_model()
+    except OSError as e:
+        pytest.skip(f"Translator checkpoint {checkpoint} not available: {e}")
+    yield instance
+    instance.unload()
+
+
+@pytest.fixture(scope="session")
+def bart_summarizer(request, tmp_path_factory):
+    """A summarization pipeline for the BART path of summarize_text"""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from backend import prompt_optimizer
+
+    explicit = request.config.getoption("summarizer_checkpoint") or request.config.getoption("tiny_models")
+    if prompt_optimizer.summarizer is not None and not explicit:
+        return prompt_optimizer.summarizer
+
+    from transformers import pipeline
+
+    checkpoint = resolve_checkpoint(request, tmp_path_factory, "summarizer_checkpoint",
+                                    prompt_optimizer.SUMMARIZER_MODEL)
+    try:
+        return pipeline("summarization", model=checkpoint, tokenizer=checkpoint, device=-1)
+    except OSError as e:
+        pytest.skip(f"Summarizer checkpoint {checkpoint} not available: {e}")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where getrusage is missing"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    measure(func, *args, rounds=None) → benchmark result. One untimed call under tracemalloc
+    records the Python heap peak and the process RSS peak around it; the timed rounds then
+    run without tracing overhead.
+    """
+    def run(func, *args, rounds=None, **kwargs):
+        rss_before = peak_rss_mb()
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["tracemalloc_peak_kb"] = round(peak / 1024, 1)
+        if rss_before is not None:
+            # Lifetime peak of the process, so the growth is 0 unless this call set a new peak
+            rss_after = peak_rss_mb()
+            benchmark.extra_info["rss_peak_mb"] = round(rss_after, 1)
+            benchmark.extra_info["rss_peak_growth_mb"] = round(rss_after - rss_before, 1)
+
+        if "torch" in sys.modules and sys.modules["torch"].cuda.is_available():
+            torch = sys.modules["torch"]
+            torch.cuda.reset_peak_memory_stats()
+            func(*args, **kwargs)
+            benchmark.extra_info["cuda_peak_mb"] = round(torch.cuda.max_memory_allocated() / 2**20, 1)
+
+        if rounds:
+            return benchmark.pedantic(func, args=args, kwargs=kwargs, rounds=rounds, warmup_rounds=1)
+        return benchmark(func, *args, **kwargs)
+
+    return run
@@ -0,0 +1,177 @@
+"""
+Local stand-ins for the upstream services used by the chat pipeline: Gemini (REST
+generateContent), GNews, OpenWeatherMap and TimeZoneDB. Responses are canned and each
+call sleeps for a configurable latency, so benchmarks are repeatable and need no keys.
+
+    python -m benchmarks.fake_services --port 8900
+
+prints the environment variables that point a separately started server at the fakes.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def gemini_reply(prompt):
+    # Markdown emphasis is kept on purpose: the pipeline strips '*' before translating back
+    topic = " ".join(prompt.split()[:12])
+    return (
+        f"**Summary:** here is a short answer about \"{topic}\". "
+        "It covers the main points in a few plain sentences. "
+        "*Tip:* ask a follow-up question if you need more detail."
+    )
+
+
+class FakeServiceHandler(BaseHTTPRequestHandler):
+    server_version = "FakeServices/1.0"
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output readable
+
+    def _delay(self, latency_ms):
+        if latency_ms > 0:
+            # ±20% jitter so percentiles are not all identical
+            time.sleep(latency_ms * random.uniform(0.8, 1.2) / 1000)
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.calls["gemini"] += 1
+
+        if not url.path.endswith(":generateContent"):
+            self._send_json({"error": {"code": 404, "message": f"Unknown method {url.path}"}}, 404)
+            return
+
+        # The prompt is the last user turn of the chat history
+        contents = request.get("contents") or [{}]
+        parts = contents[-1].get("parts") or [{}]
+        prompt = parts[-1].get("text", "")
+        self._delay(self.server.gemini_latency_ms)
+        self._send_json({
+            "candidates": [{
+                "content": {"parts": [{"text": gemini_reply(prompt)}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {"promptTokenCount": len(prompt.split()), "candidatesTokenCount": 40},
+        })
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/gnews/search":
+            self.server.calls["gnews"] += 1
+            self._delay(self.server.api_latency_ms)
+            topic = query.get("q", "India")
+            count = int(query.get("max", 5))
+            self._send_json({
+                "totalArticles": count,
+                "articles": [
+                    {"title": f"{topic}: headline number {i + 1} of the day", "source": {"name": f"Source {i + 1}"}}
+                    for i in range(count)
+                ],
+            })
+        elif url.path == "/owm/weather":
+            self.server.calls["openweathermap"] += 1
+            self._delay(self.server.api_latency_ms)
+            self._send_json({
+                "name": query.get("q", "Delhi"),
+                "weather": [{"main": "Clear", "description": "clear sky"}],
+                "main": {"temp": 31.4, "feels_like": 33.0, "humidity": 42},
+                "wind": {"speed": 3.6},
+            })
+        elif url.path == "/tz/get-time-zone":
+            self.server.calls["timezonedb"] += 1
+            self._delay(self.server.api_latency_ms)
+            self._send_json({
+                "status": "OK",
+                "zoneName": query.get("zone", "Asia/Kolkata"),
+                "abbreviation": "IST",
+                "gmtOffset": 19800,
+                "formatted": time.strftime("%Y-%m-%d %H:%M:%S"),
+            })
+        else:
+            self._send_json({"error": f"Unknown path {url.path}"}, 404)
+
+
+class FakeServices:
+    """All fake upstreams on one local port; start() returns the server's base URL"""
+
+    def __init__(self, host="127.0.0.1", port=0, gemini_latency_ms=400, api_latency_ms=80):
+        self.server = ThreadingHTTPServer((host, port), FakeServiceHandler)
+        self.server.daemon_threads = True
+        self.server.gemini_latency_ms = gemini_latency_ms
+        self.server.api_latency_ms = api_latency_ms
+        self.server.calls = {"gemini": 0, "gnews": 0, "openweathermap": 0, "timezonedb": 0}
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def calls(self):
+        return dict(self.server.calls)
+
+    def env(self):
+        """Environment variables that route the backend's upstream calls to these fakes"""
+        return {
+            "GEMINI_API_KEY": "fake-gemini-key",
+            "GEMINI_API_ENDPOINT": self.base_url,
+            "GNEWS_KEY": "fake-gnews-key",
+            "GNEWS_BASE_URL": f"{self.base_url}/gnews",
+            "OPENWEATHERMAP_KEY": "fake-owm-key",
+            "OPENWEATHERMAP_BASE_URL": f"{self.base_url}/owm",
+            "TIMEZONEDB_API_KEY": "fake-timezonedb-key",
+            "TIMEZONEDB_BASE_URL": f"{self.base_url}/tz",
+            "ADMISSION_RATE": "0",  # every benchmark client shares one address
+        }
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini / GNews / OpenWeatherMap / TimeZoneDB server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--gemini-latency-ms", type=float, default=400)
+    parser.add_argument("--api-latency-ms", type=float, default=80)
+    args = parser.parse_args()
+
+    services = FakeServices(args.host, args.port, args.gemini_latency_ms, args.api_latency_ms)
+    print(f"🧪 Fake services listening on {services.base_url}")
+    print("Start the app with:")
+    for key, value in services.env().items():
+        print(f"  export {key}={value}")
+    try:
+        services.server.serve_forever()
+    except KeyboardInterrupt:
+        services.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Admission control: priority queues, load shedding, rate limits and cancellation"""
+import threading
+import time
+
+import pytest
+
+from backend.admission import Overloaded, PriorityGate, RateLimited, RateLimiter, RequestCancelled, Ticket, TokenBucket
+
+
+def wait_until(predicate, timeout=5):
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, "condition not reached"
+        time.sleep(0.005)
+
+
+class HeldGate:
+    """A gate of one slot, held by the test until release()"""
+
+    def __init__(self, queue_limit=8, initial_seconds=1.0):
+        self.gate = PriorityGate("test", 1, queue_limit, initial_seconds)
+        self.released = threading.Event()
+        self.holder = threading.Thread(target=self._hold)
+        self.holder.start()
+        wait_until(lambda: self.gate.active == 1)
+
+    def _hold(self):
+        with self.gate.slot(Ticket("text", deadline=0)):
+            self.released.wait(5)
+
+    def release(self):
+        self.released.set()
+        self.holder.join()
+
+
+@pytest.fixture
+def held():
+    held = HeldGate()
+    yield held
+    held.release()
+
+
+def test_waiters_run_by_priority_then_arrival(held):
+    order, threads = [], []
+
+    def waiter(name, priority):
+        with held.gate.slot(Ticket(priority, deadline=0), shed=False):
+            order.append(name)
+
+    arrivals = [("batch-1", "batch"), ("text-1", "text"), ("voice-1", "voice"), ("text-2", "text"),
+                ("batch-2", "batch"), ("voice-2", "voice")]
+    for count, (name, priority) in enumerate(arrivals, start=1):
+        threads.append(threading.Thread(target=waiter, args=(name, priority)))
+        threads[-1].start()
+        wait_until(lambda: held.gate.queue_depth() == count)  # queued in arrival order
+
+    held.release()
+    for thread in threads:
+        thread.join()
+    assert order == ["voice-1", "voice-2", "text-1", "text-2", "batch-1", "batch-2"]
+    assert held.gate.active == 0 and held.gate.queue_depth() == 0
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    held = HeldGate(queue_limit=1)
+    served = []
+
+    def waiter():
+        with held.gate.slot(Ticket("text", deadline=0)):
+            served.append(True)
+
+    thread = threading.Thread(target=waiter)
+    try:
+        thread.start()
+        wait_until(lambda: held.gate.queue_depth() == 1)
+        with pytest.raises(Overloaded) as error:
+            held.gate.check_admission(Ticket("text", deadline=0))
+        assert error.value.retry_after >= 1
+        held.gate.check_admission(Ticket("batch"), shed=False)  # batch waits in line instead
+    finally:
+        held.release()
+        thread.join()
+    assert served == [True]
+    assert held.gate.active == 0 and held.gate.queue_depth() == 0
+
+
+def test_estimated_wait_past_the_deadline_is_rejected():
+    held = HeldGate(initial_seconds=10)
+    try:
+        with pytest.raises(Overloaded) as error:
+            held.gate.check_admission(Ticket("voice", deadline=1))
+        assert error.value.retry_after == 10
+        held.gate.check_admission(Ticket("text", deadline=30))
+    finally:
+        held.release()
+
+
+def test_deadline_passing_in_the_queue_is_rejected(held):
+    start = time.monotonic()
+    with pytest.raises(Overloaded) as error:
+        with held.gate.slot(Ticket("text", deadline=0.2), shed=False):
+            pass
+    assert 0.15 < time.monotonic() - start < 2
+    assert error.value.retry_after >= 1
+    assert held.gate.active == 1 and held.gate.queue_depth() == 0
+
+
+def test_cancelled_ticket_leaves_the_queue(held):
+    ticket = Ticket("text", deadline=30)
+    errors = []
+
+    def waiter():
+        try:
+            with held.gate.slot(ticket):
+                pass
+        except RequestCancelled as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    wait_until(lambda: held.gate.queue_depth() == 1)
+    ticket.cancel()
+    thread.join(2)
+    assert not thread.is_alive() and len(errors) == 1
+    assert held.gate.active == 1 and held.gate.queue_depth() == 0
+
+    held.release()
+    assert held.gate.active == 0
+    with held.gate.slot(Ticket("text")):  # the slot is free again
+        assert held.gate.active == 1
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.take() == 0 and bucket.take() == 0
+    assert bucket.take() == pytest.approx(0.1, abs=0.02)
+    time.sleep(0.12)
+    assert bucket.take() == 0
+    assert bucket.take() > 0  # the burst is not refilled beyond what the rate allows
+
+
+def test_rate_limiter_rejects_per_client():
+    limiter = RateLimiter(rate=10, burst=2)
+    limiter.check("a")
+    limiter.check("a")
+    with pytest.raises(RateLimited) as error:
+        limiter.check("a")
+    assert error.value.retry_after == 1
+    limiter.check("b")  # other clients have their own bucket
+    time.sleep(0.12)
+    limiter.check("a")
+
+
+def test_rate_limiter_forgets_least_recent_clients():
+    limiter = RateLimiter(rate=10, burst=1, max_clients=2)
+    for client in ("a", "b", "c"):
+        limiter.check(client)
+    assert list(limiter.buckets) == ["b", "c"]
+    limiter.check("a")  # a fresh bucket again
@@ -0,0 +1,49 @@
+"""Micro-benchmarks for the summarizer, keyword extraction and city lookup hot paths"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from backend import prompt_optimizer
+from backend.api_utilities import extract_city_name
+
+SENTENCES = [
+    "The monsoon reached Kerala three days earlier than forecast this year.",
+    "Farmers in Maharashtra are preparing to sow cotton and soybean.",
+    "Reservoir levels across the southern states are still below average.",
+    "The weather department expects heavy rain along the western coast next week.",
+    "City officials have asked residents to clear drains before the downpour.",
+    "Power companies are stocking spare transformers for storm damage.",
+    "Schools in low-lying areas may close if flooding gets worse.",
+    "Traders say vegetable prices usually rise during the first weeks of rain.",
+]
+TEXTS = {
+    "short": " ".join(SENTENCES[:2]),
+    "medium": " ".join(SENTENCES),
+    "long": " ".join(SENTENCES * 6),
+}
+
+
+@pytest.mark.parametrize("size", TEXTS)
+def test_summarize_text_tfidf(measure, monkeypatch, size):
+    monkeypatch.setattr(prompt_optimizer, "summarizer", None)
+    measure(prompt_optimizer.summarize_text, TEXTS[size])
+
+
+@pytest.mark.parametrize("size", TEXTS)
+def test_summarize_text_bart(measure, monkeypatch, bart_summarizer, rounds, size):
+    monkeypatch.setattr(prompt_optimizer, "summarizer", bart_summarizer)
+    measure(prompt_optimizer.summarize_text, TEXTS[size], rounds=rounds)
+
+
+@pytest.mark.parametrize("size", TEXTS)
+def test_extract_keywords(measure, size):
+    measure(prompt_optimizer.extract_keywords, TEXTS[size])
+
+
+@pytest.mark.parametrize("prompt", [
+    "What is the weather in Delhi?",        # first city in the list
+    "What is the weather in Salem today?",  # last city in the list
+    "What is the weather like right now?",  # no city, full scan
+], ids=["first", "last", "miss"])
+def test_extract_city_name(measure, prompt):
+    measure(extract_city_name, prompt)
@@ -0,0 +1,50 @@
+"""Micro-benchmarks for the audio encoding and decoding steps around speak()"""
+import io
+import shutil
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+np = pytest.importorskip("numpy")
+pytest.importorskip("pydub")  # backend.text_to_speech imports it for playback
+
+from backend.text_to_speech import split_for_speech
+from backend.tts_engines import pcm_to_wav
+
+SAMPLE_RATE = 16000
+DURATIONS = {"1s": 1, "10s": 10}
+
+
+def tone(seconds):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return 0.3 * np.sin(2 * np.pi * 220 * t).astype(np.float32)
+
+
+@pytest.mark.parametrize("duration", DURATIONS)
+def test_pcm_to_wav(measure, duration):
+    measure(pcm_to_wav, tone(DURATIONS[duration]), SAMPLE_RATE)
+
+
+@pytest.mark.parametrize("duration", DURATIONS)
+def test_decode_wav_for_playback(measure, duration):
+    # The AudioSegment.from_file step speak() runs before play()
+    pydub = pytest.importorskip("pydub")
+    audio = pcm_to_wav(tone(DURATIONS[duration]), SAMPLE_RATE)
+    measure(lambda: pydub.AudioSegment.from_file(io.BytesIO(audio), format="wav"))
+
+
+@pytest.mark.parametrize("duration", DURATIONS)
+def test_decode_mp3_for_playback(measure, duration):
+    pydub = pytest.importorskip("pydub")
+    if not shutil.which("ffmpeg"):
+        pytest.skip("ffmpeg is needed to encode/decode mp3")
+    segment = pydub.AudioSegment.from_file(io.BytesIO(pcm_to_wav(tone(DURATIONS[duration]), SAMPLE_RATE)), format="wav")
+    with io.BytesIO() as f:
+        segment.export(f, format="mp3")
+        audio = f.getvalue()
+    measure(lambda: pydub.AudioSegment.from_file(io.BytesIO(audio), format="mp3"))
+
+
+def test_split_for_speech(measure):
+    text = " ".join(["आज मौसम अच्छा है। बाहर धूप है।", "The weather is pleasant today! Enjoy it."] * 20)
+    measure(split_for_speech, text)
@@ -0,0 +1,87 @@
+"""
+Micro-benchmarks for NLLB tokenization: the slow sentencepiece tokenizer and the fast (Rust)
+tokenizer with the per-call src_lang switch the translator used to do, against the
+translator's stateless encode() and its precomputed language-token table.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.bench_e2e import PROMPTS
+
+LANGS = ["hi", "bn", "ta", "ur"]  # one per script family is enough to compare tokenizers
+BATCH_SIZES = [1, 16]
+
+
+@pytest.fixture(scope="module")
+def nllb_tokenizers(request):
+    """(slow, fast) tokenizers of the translator checkpoint; no model weights are loaded"""
+    transformers = pytest.importorskip("transformers")
+    from backend.translator import TRANSLATOR_MODEL
+
+    checkpoint = request.config.getoption("translator_checkpoint") or TRANSLATOR_MODEL
+    try:
+        return (transformers.NllbTokenizer.from_pretrained(checkpoint),
+                transformers.NllbTokenizerFast.from_pretrained(checkpoint))
+    except OSError as e:
+        pytest.skip(f"Tokenizer for {checkpoint} not available: {e}")
+
+
+@pytest.fixture(scope="module")
+def encoder(nllb_tokenizers):
+    """An NLLBTranslator with only the fast tokenizer attached, enough for encode()"""
+    from backend.translator import NLLBTranslator
+
+    instance = NLLBTranslator()
+    instance.tokenizer = nllb_tokenizers[1]
+    instance.lang_token_ids = instance._language_token_ids(instance.tokenizer)
+    return instance
+
+
+def batch_of(lang, size):
+    questions = list(PROMPTS[lang].values())
+    return [questions[i % len(questions)] for i in range(size)]
+
+
+def tokenize_with_src_lang(tokenizer, texts, source_lang):
+    # The old translator path: switch the shared tokenizer's language, then tokenize
+    tokenizer.src_lang = source_lang
+    return tokenizer(texts, return_tensors="pt", padding=True)
+
+
+@pytest.mark.parametrize("size", BATCH_SIZES)
+@pytest.mark.parametrize("lang", LANGS)
+def test_slow_tokenizer_src_lang(measure, nllb_tokenizers, encoder, lang, size):
+    texts = batch_of(lang, size)
+    measure(tokenize_with_src_lang, nllb_tokenizers[0], texts, encoder.lang_detect_map[lang])
+
+
+@pytest.mark.parametrize("size", BATCH_SIZES)
+@pytest.mark.parametrize("lang", LANGS)
+def test_fast_tokenizer_src_lang(measure, nllb_tokenizers, encoder, lang, size):
+    texts = batch_of(lang, size)
+    measure(tokenize_with_src_lang, nllb_tokenizers[1], texts, encoder.lang_detect_map[lang])
+
+
+@pytest.mark.parametrize("size", BATCH_SIZES)
+@pytest.mark.parametrize("lang", LANGS)
+def test_stateless_encode(measure, encoder, lang, size):
+    measure(encoder.encode, batch_of(lang, size), encoder.lang_detect_map[lang])
+
+
+def test_stateless_encode_matches_src_lang(nllb_tokenizers, encoder):
+    # Same input IDs as the tokenizer's own src_lang handling, for every supported language
+    for lang, questions in PROMPTS.items():
+        code = encoder.lang_detect_map[lang]
+        expected = tokenize_with_src_lang(nllb_tokenizers[1], list(questions.values()), code)
+        assert encoder.encode(list(questions.values()), code)["input_ids"].tolist() == expected["input_ids"].tolist()
+
+
+def test_language_token_lookup(measure, nllb_tokenizers, encoder):
+    codes = sorted(encoder.lang_token_ids)
+    measure(lambda: [nllb_tokenizers[1].convert_tokens_to_ids(code) for code in codes])
+
+
+def test_language_token_table(measure, encoder):
+    codes = sorted(encoder.lang_token_ids)
+    measure(lambda: [encoder.language_token_id(code) for code in codes])
@@ -0,0 +1,26 @@
+"""Micro-benchmarks for NLLBTranslator._translate across languages, directions and input lengths"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.bench_e2e import PROMPTS
+
+LENGTHS = {"short": 1, "long": 6}  # repeats of each language's sample question
+ENGLISH_REPLY = (
+    "Boil fresh water, add a spoon of tea leaves and let it steep for three minutes. "
+    "Add milk and sugar to taste, then strain it into a warm cup."
+)
+
+
+@pytest.mark.parametrize("length", LENGTHS)
+@pytest.mark.parametrize("lang", sorted(PROMPTS))
+def test_translate_to_english(measure, translator, rounds, lang, length):
+    text = " ".join([PROMPTS[lang]["chat"]] * LENGTHS[length])
+    source = translator.lang_detect_map[lang]
+    measure(translator._translate, text, source, "eng_Latn", rounds=rounds)
+
+
+@pytest.mark.parametrize("lang", sorted(set(PROMPTS) - {"en"}))
+def test_translate_from_english(measure, translator, rounds, lang):
+    target = translator.lang_detect_map[lang]
+    measure(translator._translate, ENGLISH_REPLY, "eng_Latn", target, rounds=rounds)
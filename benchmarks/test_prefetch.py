@@ -0,0 +1,81 @@
+"""Speculative prefetch: source-language guesses must agree with the English routing, or be dropped"""
+import itertools
+from concurrent.futures import Future
+
+import pytest
+
+from backend.api_utilities import extract_city_name
+from backend.prefetch import CITY_NAMES, Prefetch, guess_city, guess_intent, speculate, take_prefetch
+
+
+def test_city_table_follows_extract_city_name_order():
+    # For any two cities the first one in CITY_NAMES must be the one the English routing finds
+    # (cities it cannot find on their own, e.g. "Visakhapatnam" matching "Patna", are skipped)
+    cities = [city for city in CITY_NAMES if extract_city_name(city) == city]
+    for first, second in itertools.combinations(cities, 2):
+        assert extract_city_name(f"{second} and {first}") == first
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("आज दिल्ली में मौसम कैसा है?", "weather"),
+    ("ইন্দ আবহাওয়া কেমন?", "weather"),
+    ("मुझे मुंबई की ताज़ा खबरें बताओ।", "news"),
+    ("இப்போது கொல்கத்தாவில் நேரம் என்ன?", "time"),
+    ("What is the weather in Delhi?", "weather"),
+    ("घर पर अच्छी चाय कैसे बनाऊं?", None),
+])
+def test_guess_intent(text, intent):
+    assert guess_intent(text) == intent
+
+
+@pytest.mark.parametrize("text, city", [
+    ("आज दिल्ली में मौसम कैसा है?", "Delhi"),
+    ("ഇന്ന് ഡൽഹിയിലെ കാലാവസ്ഥ", "Delhi"),
+    ("मदुरै और गुवाहाटी की खबरें", "Madurai"),
+    ("Pune का मौसम", "Pune"),  # romanized names are found by extract_city_name
+    ("आज मौसम कैसा है?", None),
+])
+def test_guess_city(text, city):
+    assert guess_city(text) == city
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("आज दिल्ली में मौसम कैसा है?", ("weather", "Delhi", "weather in Delhi")),
+    ("आज मौसम कैसा है?", ("weather", None, "weather")),
+    ("मुझे मुंबई की ताज़ा खबरें बताओ।", ("news", "Mumbai", "news in Mumbai")),
+    ("मुझे ताज़ा खबरें बताओ।", None),  # news without a city is keyed by the English prompt
+    ("अभी कोलकाता में क्या समय हुआ है?", ("time", None, "time")),
+    ("घर पर अच्छी चाय कैसे बनाऊं?", None),
+])
+def test_speculate(text, expected):
+    assert speculate(text) == expected
+
+
+def prefetch_of(intent, key, result=None, error=None, done=True):
+    future = Future()
+    if done:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    return Prefetch(intent, key, future)
+
+
+def test_prefetch_is_used_when_routing_agrees():
+    assert take_prefetch(prefetch_of("weather", "Delhi", {"temp": 31}), "weather", "Delhi") == {"temp": 31}
+
+
+@pytest.mark.parametrize("intent, key", [("news", "Delhi"), ("weather", "Mumbai"), ("weather", None)])
+def test_prefetch_is_discarded_when_routing_disagrees(intent, key):
+    prefetch = prefetch_of("weather", "Delhi", done=False)
+    assert take_prefetch(prefetch, intent, key) is None
+    assert prefetch.future.cancelled()  # not started yet, so it never runs
+
+
+def test_failed_prefetch_falls_back():
+    prefetch = prefetch_of("weather", "Delhi", error=ConnectionError("upstream down"))
+    assert take_prefetch(prefetch, "weather", "Delhi") is None
+
+
+def test_no_prefetch():
+    assert take_prefetch(None, "weather", "Delhi") is None
@@ -0,0 +1,43 @@
+"""In-memory sessions: writes are atomic and expired sessions do not pile up"""
+import threading
+import time
+
+from backend.sessions import InMemorySessionStore, add_turn
+
+
+def record(session, text):
+    add_turn(session, text, {"response": "ok", "source_lang": "en", "english_prompt": text}, limit=1000)
+
+
+def test_concurrent_updates_keep_every_turn():
+    store = InMemorySessionStore()
+    threads = [threading.Thread(target=store.update, args=("session-1", lambda s, i=i: record(s, str(i))))
+               for i in range(100)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.get("session-1")["history"]) == 100
+
+
+def test_update_purges_expired_sessions():
+    store = InMemorySessionStore(ttl_seconds=0, purge_interval_seconds=0)
+    for i in range(50):
+        store.update(f"anonymous-{i}", lambda session: session.update(mode=None))
+    time.sleep(0.01)
+    store.update("last-client", lambda session: session.update(mode="text"))
+    assert len(store) == 1
+
+
+def test_purge_waits_for_the_interval():
+    store = InMemorySessionStore(ttl_seconds=0, purge_interval_seconds=3600)
+    for i in range(5):
+        store.save(f"anonymous-{i}", {"mode": None, "language": None, "history": []})
+    assert len(store) == 5
+
+
+def test_expired_session_reads_as_new():
+    store = InMemorySessionStore(ttl_seconds=0)
+    store.update("session-1", lambda session: session.update(mode="text"))
+    time.sleep(0.01)
+    assert store.get("session-1")["mode"] is None
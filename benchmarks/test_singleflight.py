@@ -0,0 +1,61 @@
+"""Coalesced calls: joined callers share the leader's result but can still give up on their own"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.admission import Overloaded, RequestCancelled, Ticket
+from backend.singleflight import SingleFlight
+
+
+@pytest.fixture
+def blocked_leader():
+    """A running leader call for key "k" that returns "done" once release is set"""
+    flight = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "done"
+
+    pool = ThreadPoolExecutor(max_workers=4)
+    leader = pool.submit(flight.do, "k", slow)
+    started.wait(5)
+    yield flight, pool, release, leader, calls
+    release.set()
+    pool.shutdown()
+
+
+def test_joined_caller_gets_the_leader_result(blocked_leader):
+    flight, pool, release, leader, calls = blocked_leader
+    follower = pool.submit(flight.do, "k", lambda: "not run", ticket=Ticket("text", deadline=5))
+    release.set()
+    assert leader.result(5) == follower.result(5) == "done"
+    assert calls == [1]
+
+
+def test_cancelled_caller_stops_waiting(blocked_leader):
+    flight, pool, release, leader, calls = blocked_leader
+    ticket = Ticket("text", deadline=30)
+    follower = pool.submit(flight.do, "k", lambda: "not run", ticket=ticket)
+    time.sleep(0.05)
+    ticket.cancel()
+    with pytest.raises(RequestCancelled) as error:
+        follower.result(1)
+    assert error.value.ticket is ticket
+    assert not leader.done()  # the leader keeps running for anyone else
+
+
+def test_caller_gives_up_at_its_deadline(blocked_leader):
+    flight, pool, release, leader, calls = blocked_leader
+    ticket = Ticket("text", deadline=0.2)
+    start = time.monotonic()
+    with pytest.raises(Overloaded) as error:
+        flight.do("k", lambda: "not run", ticket=ticket)
+    assert time.monotonic() - start < 1
+    assert error.value.ticket is ticket and error.value.retry_after >= 1
+    assert not leader.done()
@@ -0,0 +1,51 @@
+"""Streaming transcription under load: a filling ring buffer must push decoding down to greedy"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faster_whisper")
+pytest.importorskip("sounddevice")
+
+from backend import speech_to_text
+from backend.decoding_policy import get_decoding_policy
+
+
+@pytest.fixture
+def transcriber(monkeypatch):
+    depths = []
+
+    def fake_transcribe_chunk(audio, queue_depth=0, language=None):
+        depths.append(queue_depth)
+        return "", None
+
+    monkeypatch.setattr(speech_to_text, "transcribe_chunk", fake_transcribe_chunk)
+    instance = speech_to_text.StreamingTranscriber()
+    instance.depths = depths
+    return instance
+
+
+def chunk_seconds(seconds):
+    return np.zeros(int(speech_to_text.sample_rate * seconds), dtype=np.float32)
+
+
+def test_empty_ring_decodes_normally(transcriber):
+    transcriber._publish(chunk_seconds(5))
+    assert transcriber.depths == [0]
+    assert get_decoding_policy().choose_preset(5, transcriber.depths[0]) != "greedy"
+
+
+def test_full_ring_decodes_greedily(transcriber):
+    ring = transcriber.ring
+    transcriber.feed(np.zeros(ring.capacity + 1000, dtype=np.float32))
+    assert ring.available() == ring.capacity and ring.dropped == 1000
+
+    transcriber._publish(chunk_seconds(speech_to_text.max_chunk_duration))
+    policy = get_decoding_policy()
+    assert transcriber.depths[-1] >= policy.overload_queue_depth
+    assert policy.choose_preset(speech_to_text.max_chunk_duration, transcriber.depths[-1]) == "greedy"
+
+
+def test_half_full_ring_counts_as_busy(transcriber):
+    transcriber.feed(np.zeros(transcriber.ring.capacity // 2, dtype=np.float32))
+    transcriber._publish(chunk_seconds(5))
+    policy = get_decoding_policy()
+    assert policy.busy_queue_depth <= transcriber.depths[-1] < policy.overload_queue_depth
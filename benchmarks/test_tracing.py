@@ -0,0 +1,54 @@
+"""traceparent handling: malformed headers start a fresh trace instead of failing the request"""
+import pytest
+
+from backend.tracing import Tracer, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class ListExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+
+def test_valid_traceparent():
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(f" 00-{TRACE_ID}-{PARENT_ID}-00 ") == (TRACE_ID, PARENT_ID, False)
+    # Later versions may append fields
+    assert parse_traceparent(f"01-{TRACE_ID}-{PARENT_ID}-01-extra") == (TRACE_ID, PARENT_ID, True)
+
+
+@pytest.mark.parametrize("header", [
+    f"00-{TRACE_ID}-{PARENT_ID}-zz",
+    f"00-{TRACE_ID}-{PARENT_ID}-1",
+    f"00-{TRACE_ID}-{PARENT_ID}-001",
+    f"00-{TRACE_ID}-{PARENT_ID}-0x",
+    f"00-{TRACE_ID}-{PARENT_ID}",
+    f"00-{TRACE_ID}-{PARENT_ID}-01-extra",
+    f"0-{TRACE_ID}-{PARENT_ID}-01",
+    f"zz-{TRACE_ID}-{PARENT_ID}-01",
+    f"ff-{TRACE_ID}-{PARENT_ID}-01",
+    f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-0x{PARENT_ID[2:]}-01",
+    f"00-{'0' * 32}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-{'0' * 16}-01",
+    "",
+    "garbage",
+    None,
+])
+def test_malformed_traceparent(header):
+    assert parse_traceparent(header) is None
+
+
+def test_malformed_traceparent_starts_new_trace():
+    exporter = ListExporter()
+    tracer = Tracer(exporter, sample_ratio=1.0)
+    with tracer.span("GET /chat", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-zz") as span:
+        pass
+    assert span.trace.trace_id != TRACE_ID
+    assert span.parent_id is None
+    assert exporter.traces == [span.trace]
@@ -0,0 +1,87 @@
+"""
+Concurrency check for NLLBTranslator: many threads translating different languages at once
+must get exactly what each request gets alone (no source or target language bleeding between
+requests through shared tokenizer state).
+
+    python -m pytest benchmarks/test_translator_concurrency.py --tiny-models
+
+Uses the same checkpoint options as the micro-benchmarks; with --tiny-models the outputs are
+nonsense but still deterministic, which is all the comparison needs. The encode() check also
+runs without any checkpoint, on a word-level NLLB tokenizer built from PROMPTS.
+"""
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.bench_e2e import PROMPTS
+
+THREADS = 8
+REPEATS = 4
+
+
+def shuffled_jobs(jobs, seed):
+    jobs = jobs * REPEATS
+    random.Random(seed).shuffle(jobs)
+    return jobs
+
+
+def run_concurrently(function, jobs):
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return list(pool.map(lambda job: function(*job), jobs))
+
+
+@pytest.fixture
+def offline_translator():
+    """An NLLBTranslator with only a tokenizer: a word-level vocabulary of PROMPTS plus NLLB's language tokens"""
+    pytest.importorskip("torch")
+    tokenizers = pytest.importorskip("tokenizers")
+    transformers = pytest.importorskip("transformers")
+    from backend.translator import NLLBTranslator
+
+    words = sorted({word for questions in PROMPTS.values() for question in questions.values()
+                    for word in question.split()})
+    vocab = {token: i for i, token in enumerate(["<s>", "<pad>", "</s>", "<unk>"] + words)}
+    backend = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="<unk>"))
+    backend.pre_tokenizer = tokenizers.pre_tokenizers.WhitespaceSplit()
+    # NllbTokenizerFast adds the language codes as special tokens
+    tokenizer = transformers.NllbTokenizerFast(tokenizer_object=backend, bos_token="<s>", eos_token="</s>",
+                                               pad_token="<pad>", unk_token="<unk>")
+
+    instance = NLLBTranslator("offline-word-level")
+    instance.tokenizer = tokenizer
+    instance.lang_token_ids = instance._language_token_ids(tokenizer)
+    return instance
+
+
+def check_encode_has_no_language_bleed(translator):
+    jobs = [(question, translator.lang_detect_map[lang])
+            for lang, questions in PROMPTS.items() for question in questions.values()]
+    expected = {job: translator.encode([job[0]], job[1])["input_ids"].tolist() for job in jobs}
+
+    jobs = shuffled_jobs(jobs, seed=0)
+    results = run_concurrently(lambda text, code: translator.encode([text], code)["input_ids"].tolist(), jobs)
+    mismatches = [job for job, result in zip(jobs, results) if result != expected[job]]
+    assert not mismatches, f"{len(mismatches)} of {len(jobs)} encodings changed under concurrency"
+
+
+def test_encode_has_no_language_bleed(translator):
+    check_encode_has_no_language_bleed(translator)
+
+
+def test_encode_has_no_language_bleed_offline(offline_translator):
+    check_encode_has_no_language_bleed(offline_translator)
+
+
+def test_translate_has_no_language_bleed(translator):
+    to_english = [(PROMPTS[lang]["chat"], translator.lang_detect_map[lang], "eng_Latn")
+                  for lang in sorted(PROMPTS) if lang != "en"]
+    from_english = [(PROMPTS["en"]["chat"], "eng_Latn", translator.lang_detect_map[lang])
+                    for lang in ("hi", "bn", "ta", "ur")]
+    jobs = to_english + from_english
+    expected = {job: translator._translate(*job) for job in jobs}
+
+    jobs = shuffled_jobs(jobs, seed=1)
+    results = run_concurrently(translator._translate, jobs)
+    mismatches = [job[1:] for job, result in zip(jobs, results) if result != expected[job]]
+    assert not mismatches, f"Translations changed under concurrency for {sorted(set(mismatches))}"
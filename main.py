@@ -1,18 +1,34 @@
-from fastapi import FastAPI
+import asyncio
+import base64
+import json
+import os
+import threading
+from fastapi import FastAPI, File, Request, UploadFile, WebSocket
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from typing import List
 import traceback  # ✅ Add this for better debugging
 
-from backend.translator import get_translator_instance, unload_translator, translate_to_user_lang
-from backend.prompt_optimizer import get_optimized_prompt_and_keywords
-from backend.gemini_chat import get_gemini_response
-from backend.api_utilities import (
-    fetch_weather, fetch_news, fetch_time,
-    fetch_quote, fetch_fun_fact, fetch_definition
+from backend.pipeline import get_pipeline
+from backend.speech_to_text import (
+    run_button_based_transcription, decode_audio_bytes, get_transcription_queue
+)
+from backend.text_to_speech import synthesize, stream_speech, prerender_phrases
+from backend.tts_engines import get_tts_engine
+from backend.metrics import (
+    render_metrics, pipeline_stage_hook, requests_in_flight, requests_total
+)
+from backend.tracing import span
+from backend.voice_session import VoiceSession, voice_session_slots, CLOSE_TRY_AGAIN_LATER
+from backend.batch_jobs import get_batch_queue
+from backend.admission import admit, run_admitted, Overloaded, RateLimited, RequestCancelled
+from backend.translator_pool import TRANSLATOR_REPLICAS, start_translator_pool, stop_translator_pool
+from backend.sessions import (
+    get_session_store, new_session_id, is_valid_session_id, add_turn, llm_history,
+    SESSION_HEADER, SESSION_COOKIE, SESSION_TTL_SECONDS
 )
-from backend.speech_to_text import run_button_based_transcription, unload_whisper
-from backend.text_to_speech import speak
 
 app = FastAPI()
 
@@ -24,8 +40,134 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Track current mode
-current_mode = {"mode": None}
+# Record per-stage latency for every pipeline run
+get_pipeline().add_hook(pipeline_stage_hook)
+
+
+known_paths = set()
+
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    # Only known routes become label values, so scanners cannot blow up metric cardinality
+    if not known_paths:
+        known_paths.update(route.path for route in app.routes)
+    path = request.url.path if request.url.path in known_paths else "other"
+    requests_in_flight.inc(path=path)
+    try:
+        # One trace per request (continues the caller's trace when a traceparent header is sent)
+        with span(f"{request.method} {path}", {"http.method": request.method, "http.route": path},
+                  traceparent=request.headers.get("traceparent")) as request_span:
+            response = await call_next(request)
+            request_span.set_attribute("http.status_code", response.status_code)
+    except BaseException:
+        requests_in_flight.dec(path=path)
+        requests_total.inc(path=path, status=500)
+        raise
+
+    # Streamed bodies (/chat/batch, /tts/stream) are still running here; count them until the last chunk
+    body = response.body_iterator
+
+    async def tracked_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            requests_in_flight.dec(path=path)
+            requests_total.inc(path=path, status=response.status_code)
+
+    response.body_iterator = tracked_body()
+    return response
+
+
+@app.middleware("http")
+async def attach_session(request: Request, call_next):
+    # Mode, language hint and history live in a per-client session (X-Session-ID header or cookie)
+    session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    is_new = not is_valid_session_id(session_id)
+    if is_new:
+        session_id = new_session_id()
+    request.state.session_id = session_id
+
+    response = await call_next(request)
+    response.headers[SESSION_HEADER] = session_id
+    if is_new:
+        response.set_cookie(SESSION_COOKIE, session_id, max_age=SESSION_TTL_SECONDS, httponly=True, samesite="lax")
+    return response
+
+
+@app.on_event("startup")
+async def prerender_tts_phrases():
+    # Opt-in because pre-rendering calls the TTS backend for every common phrase
+    if os.getenv("TTS_PRERENDER") == "1":
+        threading.Thread(target=prerender_phrases, daemon=True).start()
+
+
+@app.on_event("startup")
+async def start_translator_replicas():
+    # TRANSLATOR_REPLICAS > 0 moves translation into pinned replica processes
+    if TRANSLATOR_REPLICAS > 0:
+        start_translator_pool()  # replicas are up before any requests are served
+
+
+@app.on_event("shutdown")
+async def stop_translator_replicas():
+    stop_translator_pool()
+
+
+def encode_audio(audio):
+    # Base64 audio for JSON responses (None stays None, e.g. unsupported TTS language)
+    return base64.b64encode(audio).decode("ascii") if audio else None
+
+def server_timing(timings):
+    # Per-stage durations as a standard Server-Timing header (milliseconds)
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+
+# === Admission control ===
+
+def client_key(connection):
+    # Rate limits are per client address; session IDs are too cheap to mint
+    return connection.client.host if connection.client else "unknown"
+
+def request_deadline(request):
+    # Optional X-Deadline-Ms: how long the client is willing to wait (defaults per priority class)
+    value = request.headers.get("X-Deadline-Ms")
+    try:
+        return float(value) / 1000 if value else None
+    except ValueError:
+        return None
+
+def overloaded_response(error):
+    status = 429 if isinstance(error, RateLimited) else 503
+    return JSONResponse(status_code=status, headers={"Retry-After": str(error.retry_after)},
+                        content={"error": str(error), "retry_after": error.retry_after})
+
+def cancelled_response(error):
+    # 499 "client closed request"; nobody is usually left to read it
+    return JSONResponse(status_code=499, content={"error": str(error)})
+
+
+async def wait_for_disconnect(request):
+    # The body has been read, so the next ASGI message is the disconnect
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def run_pipeline(request, ticket, *args, **kwargs):
+    # Runs the pipeline in a worker thread under admission control; a client disconnect cancels it
+    task = asyncio.ensure_future(
+        run_in_threadpool(run_admitted, ticket, get_pipeline().run, *args, ticket=ticket, **kwargs)
+    )
+    disconnect = asyncio.ensure_future(wait_for_disconnect(request))
+    await asyncio.wait([task, disconnect], return_when=asyncio.FIRST_COMPLETED)
+    if task.done():
+        disconnect.cancel()
+        return task.result()
+    ticket.cancel()
+    # The worker thread stops at its next stage boundary; nobody reads its result
+    task.add_done_callback(lambda finished: finished.exception())
+    raise RequestCancelled("Client disconnected")
 
 
 @app.get("/")
@@ -33,84 +175,41 @@ async def read_root():
     return {"message": "Your assistant is up and running!"}
 
 
+def reset_mode(session_id):
+    # Only this client's session goes back to mode selection; shared models stay loaded
+    get_session_store().update(session_id, lambda session: session.update(mode=None))
+
+
 @app.get("/mode")
-async def select_mode():
-    unload_whisper()
-    unload_translator()
-    current_mode["mode"] = None
+async def select_mode(request: Request):
+    reset_mode(request.state.session_id)
     return {"message": "Select a mode: 'text' or 'voice'"}
 
 
 @app.post("/set-mode")
-async def set_mode(mode_request: dict):
+async def set_mode(mode_request: dict, request: Request):
     mode = mode_request.get("mode")
     if mode not in ["text", "voice"]:
         return JSONResponse(status_code=400, content={"error": "Mode must be 'text' or 'voice'"})
 
-    current_mode["mode"] = mode
-    return {"message": f"Switched to {mode} mode"}
-
-
-def get_api_data_summary(prompt: str):
-    lower_prompt = prompt.lower()
-
-    try:
-        if "weather" in lower_prompt:
-            data = fetch_weather(prompt)
-            if data:
-                return get_gemini_response(f"Summarize the following weather update: {data}")
-
-        elif "news" in lower_prompt:
-            data = fetch_news(prompt)
-            if data:
-                return get_gemini_response(f"Summarize the following news in 3-4 bullet points: {data}")
-
-        elif "time" in lower_prompt:
-            data = fetch_time()
-            if data:
-                return get_gemini_response(f"Summarize the following time and timezone info: {data}")
-
-        elif "quote" in lower_prompt:
-            data = fetch_quote()
-            if data:
-                return data  # Just return the quote directly
-
-        elif "fun fact" in lower_prompt or "fact" in lower_prompt:
-            data = fetch_fun_fact()
-            if data:
-                return data  # Just return the fact directly
-
-        elif "define" in lower_prompt or "definition" in lower_prompt:
-            word = lower_prompt.split()[-1]
-            data = fetch_definition(word)
-            if data:
-                return get_gemini_response(f"Explain the definition of '{word}' in simple words: {data}")
-
-        return None
-    except Exception as e:
-        print("API fetch or summary failed:", e)
-        return None
-
+    def select(session):
+        session["mode"] = mode
+        if "language" in mode_request:
+            session["language"] = mode_request["language"]  # optional language hint, None clears it
 
-def process_prompt_workflow(user_input: str, source_lang: str):
-    translator = get_translator_instance()
-    english_prompt = translator.translate_to_english(user_input)
+    get_session_store().update(request.state.session_id, select)
+    return {"message": f"Switched to {mode} mode", "session_id": request.state.session_id}
 
-    api_summary = get_api_data_summary(english_prompt)
-    if api_summary:
-        final_response = translate_to_user_lang(api_summary, source_lang)
-        return final_response, []
 
-    if len(english_prompt.strip()) < 300:
-        gemini_response = get_gemini_response(english_prompt)
-        final_response = translate_to_user_lang(gemini_response, source_lang)
-        return final_response, []
+@app.get("/session")
+async def get_session(request: Request):
+    return {"session_id": request.state.session_id, **get_session_store().get(request.state.session_id)}
 
-    optimized_prompt, keywords = get_optimized_prompt_and_keywords(english_prompt)
-    gemini_response = get_gemini_response(optimized_prompt)
-    final_response = translate_to_user_lang(gemini_response, source_lang)
 
-    return final_response, keywords
+@app.delete("/session")
+async def delete_session(request: Request):
+    get_session_store().delete(request.state.session_id)
+    return {"message": "Session cleared"}
 
 
 # ✅ Include speak_response toggle in request model
@@ -121,58 +220,280 @@ class ChatRequest(BaseModel):
 
 
 @app.post("/chat")
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request):
     try:
-        if current_mode["mode"] != "text":
+        session_id = http_request.state.session_id
+        store = get_session_store()
+        session = store.get(session_id)
+        if session["mode"] != "text":
             return JSONResponse(status_code=400, content={"error": "Current mode is not set to text"})
 
         user_input = request.text
         if user_input.lower() == "back":
-            unload_translator()
-            current_mode["mode"] = None
+            reset_mode(session_id)
             return {"message": "Returned to mode selection"}
 
-        translator = get_translator_instance()
-        source_lang = request.language or translator.detect_lang_code(user_input)
-        final_response, keywords = process_prompt_workflow(user_input, source_lang)
+        ticket = admit(client_key(http_request), "text", request_deadline(http_request))
+        language = request.language or session["language"]
+        result = await run_pipeline(http_request, ticket, user_input, language,
+                                    speak_response=request.speak_response, history=llm_history(session))
 
-        # ✅ Conditional TTS
-        if request.speak_response:
-            speak(final_response, source_lang)
+        def record(session):
+            if request.language:
+                session["language"] = request.language  # pinned for the session's later requests
+            add_turn(session, user_input, result)
 
-        return {"response": final_response, "keywords": keywords}
+        # Atomic read-modify-write, so concurrent requests on the same session don't lose turns
+        store.update(session_id, record)
+        headers = {"Server-Timing": server_timing(result["timings"])}
 
+        # ✅ Conditional TTS (audio is returned to the caller, not played on the server)
+        if request.speak_response:
+            return JSONResponse(headers=headers, content={
+                "response": result["response"],
+                "keywords": result["keywords"],
+                "audio": encode_audio(result["audio"]),
+                "audio_format": get_tts_engine().audio_format
+            })
+
+        return JSONResponse(headers=headers, content={"response": result["response"], "keywords": result["keywords"]})
+
+    except Overloaded as e:
+        return overloaded_response(e)
+    except RequestCancelled as e:
+        return cancelled_response(e)
     except Exception as e:
         traceback.print_exc()  # ✅ Print full traceback
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+class BatchItem(BaseModel):
+    text: str
+    id: str = None
+    language: str = None
+
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+
+
+async def stream_job_results(job, start=0, cancel_on_disconnect=False):
+    # JSON Lines, one result per item as each chunk of the job finishes, then a final status line
+    index = start
+    try:
+        while True:
+            results, finished = await run_in_threadpool(job.wait_for_results, index, 5.0)
+            for result in results:
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+            index += len(results)
+            if finished:
+                break
+        yield json.dumps({"job_id": job.id, "status": job.status, "error": job.error}) + "\n"
+    finally:
+        if cancel_on_disconnect and not job.finished:
+            get_batch_queue().cancel(job.id)  # client went away mid-stream
+
+
+def submit_batch(request: BatchRequest):
+    return get_batch_queue().submit([item.dict() for item in request.items])
+
+
+@app.post("/chat/batch")
+async def chat_batch_endpoint(request: BatchRequest, http_request: Request):
+    # Answers many independent messages at once; translation and API fetches are shared across items
+    try:
+        admit(client_key(http_request), "batch")
+        job = submit_batch(request)
+    except Overloaded as e:
+        return overloaded_response(e)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    return StreamingResponse(stream_job_results(job, cancel_on_disconnect=True),
+                             media_type="application/x-ndjson", headers={"X-Batch-Job-ID": job.id})
+
+
+@app.post("/chat/jobs")
+async def submit_chat_job(request: BatchRequest, http_request: Request):
+    # Same as /chat/batch but returns at once; poll /chat/jobs/{job_id} and fetch .../results
+    try:
+        admit(client_key(http_request), "batch")
+        job = submit_batch(request)
+    except Overloaded as e:
+        return overloaded_response(e)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return JSONResponse(status_code=202, content=job.info())
+
+
+@app.get("/chat/jobs/{job_id}")
+async def get_chat_job(job_id: str):
+    job = get_batch_queue().get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired job"})
+    return job.info()
+
+
+@app.get("/chat/jobs/{job_id}/results")
+async def get_chat_job_results(job_id: str, start: int = 0, wait: bool = False):
+    # JSON Lines of the results so far; wait=true keeps streaming until the job finishes
+    job = get_batch_queue().get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired job"})
+    if wait:
+        return StreamingResponse(stream_job_results(job, start), media_type="application/x-ndjson")
+    results, _ = job.wait_for_results(start, timeout=0)
+    body = "".join(json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+    return Response(content=body, media_type="application/x-ndjson")
+
+
+@app.delete("/chat/jobs/{job_id}")
+async def cancel_chat_job(job_id: str):
+    job = get_batch_queue().cancel(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired job"})
+    return job.info()
+
+
 @app.post("/voice-chat")
-async def voice_chat_endpoint():
+async def voice_chat_endpoint(request: Request):
     try:
-        if current_mode["mode"] != "voice":
+        session_id = request.state.session_id
+        store = get_session_store()
+        session = store.get(session_id)
+        if session["mode"] != "voice":
             return JSONResponse(status_code=400, content={"error": "Current mode is not set to voice"})
 
         transcribed_text = run_button_based_transcription()
         if not transcribed_text or transcribed_text.lower() == "back":
-            unload_whisper()
-            unload_translator()
-            current_mode["mode"] = None
+            reset_mode(session_id)
             return {"message": "Returned to mode selection"}
 
-        translator = get_translator_instance()
-        source_lang = translator.detect_lang_code(transcribed_text)
-        final_response, keywords = process_prompt_workflow(transcribed_text, source_lang)
-
-        speak(final_response, source_lang)
-        unload_whisper()
+        ticket = admit(client_key(request), "voice", request_deadline(request))
+        result = await run_pipeline(request, ticket, transcribed_text, session["language"],
+                                    speak_response=True, history=llm_history(session))
+        store.update(session_id, lambda session: add_turn(session, transcribed_text, result))
 
         return {
             "transcribed_input": transcribed_text,
-            "response": final_response,
-            "keywords": keywords
+            "response": result["response"],
+            "keywords": result["keywords"],
+            "audio": encode_audio(result["audio"]),
+            "audio_format": get_tts_engine().audio_format
         }
 
+    except Overloaded as e:
+        return overloaded_response(e)
+    except RequestCancelled as e:
+        return cancelled_response(e)
     except Exception as e:
         traceback.print_exc()  # ✅ Print full traceback
         return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.websocket("/ws/voice")
+async def voice_websocket(websocket: WebSocket):
+    # Full-duplex voice: PCM frames up; partials, the answer and audio chunks down (see VoiceSession)
+    await websocket.accept()
+    if voice_session_slots.locked():
+        await websocket.send_json({"type": "error", "error": "Too many voice sessions, try again later"})
+        await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+        return
+
+    # Browsers cannot set WebSocket headers, so the session ID may also come as a query parameter
+    session_id = (websocket.headers.get(SESSION_HEADER) or websocket.query_params.get("session_id")
+                  or websocket.cookies.get(SESSION_COOKIE))
+    if not is_valid_session_id(session_id):
+        session_id = new_session_id()
+
+    async with voice_session_slots:
+        requests_in_flight.inc(path="/ws/voice")
+        try:
+            await VoiceSession(websocket, session_id).run()
+        finally:
+            requests_in_flight.dec(path="/ws/voice")
+
+
+@app.post("/transcribe")
+async def transcribe_endpoint(file: UploadFile = File(...), language: str = None):
+    # Transcribe an uploaded WAV/MP3/Opus file; does not depend on the server's microphone or mode
+    try:
+        audio_bytes = await file.read()
+        if not audio_bytes:
+            return JSONResponse(status_code=400, content={"error": "Uploaded audio file is empty"})
+
+        try:
+            audio = await run_in_threadpool(decode_audio_bytes, audio_bytes)
+        except Exception as e:
+            return JSONResponse(status_code=400, content={"error": f"Could not decode audio: {e}"})
+
+        result = await asyncio.wrap_future(get_transcription_queue().submit(audio, language))
+        return result
+
+    except Exception as e:
+        traceback.print_exc()  # ✅ Print full traceback
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+class SpeechRequest(BaseModel):
+    text: str
+    language: str = None
+    engine: str = None
+
+
+AUDIO_MEDIA_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav"}
+
+
+@app.post("/tts")
+async def tts_endpoint(request: SpeechRequest):
+    # Returns synthesized audio bytes; repeated (text, language) pairs come straight from the cache
+    try:
+        audio = await run_in_threadpool(synthesize, request.text, request.language, request.engine)
+        audio_format = get_tts_engine(request.engine).audio_format
+        return Response(content=audio, media_type=AUDIO_MEDIA_TYPES.get(audio_format, "application/octet-stream"))
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        traceback.print_exc()  # ✅ Print full traceback
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post("/tts/stream")
+async def tts_stream_endpoint(request: SpeechRequest):
+    # JSON Lines, one synthesized sentence per line, emitted in order as soon as each is ready
+    try:
+        audio_format = get_tts_engine(request.engine).audio_format
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    chunks = stream_speech(request.text, request.language, request.engine)
+
+    async def generate():
+        index = 0
+        while True:
+            try:
+                chunk = await run_in_threadpool(next, chunks, None)
+            except Exception as e:
+                # Headers are already sent, so report the failure in-band
+                if not isinstance(e, ValueError):
+                    traceback.print_exc()
+                yield json.dumps({"index": index, "error": str(e)}, ensure_ascii=False) + "\n"
+                break
+            if chunk is None:
+                break
+            sentence, audio = chunk
+            yield json.dumps({
+                "index": index,
+                "text": sentence,
+                "audio": base64.b64encode(audio).decode("ascii"),
+                "audio_format": audio_format,
+            }, ensure_ascii=False) + "\n"
+            index += 1
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,156 @@
+"""
+Pre-fork server: loads the model weights once, then forks uvicorn workers that share them.
+
+    python serve.py --workers 4 --port 8000
+
+The parent imports the app and loads NLLB and BART on the CPU. It freezes the GC so
+collections in the workers do not touch (and copy) the parent's objects, then forks the
+workers onto one shared listening socket. The tensor data is only read after that, so
+copy-on-write keeps a single physical copy of the weights however many workers run.
+
+Limitations:
+- CPU only. CUDA cannot be used in a forked child, so run with CUDA_VISIBLE_DEVICES="".
+- The parent loads the models with one torch thread. A multi-threaded op in the parent starts
+  the OpenMP pool, and a forked child's first multi-threaded op then hangs forever (the pool's
+  threads do not exist in the child). Workers set their own thread count after the fork.
+- Whisper (CTranslate2) starts its own threads when it loads, so it is still loaded lazily in each worker.
+- Use SESSION_BACKEND=redis with more than one worker so sessions are shared.
+- /metrics reports the worker that served the scrape.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+DEFAULT_WORKERS = int(os.getenv("WEB_WORKERS", "2"))
+PRELOAD_CHOICES = ("translator", "summarizer")
+
+
+def preload_models(names):
+    # Import inside the function: the app must be imported (and models loaded) before forking
+    import main  # noqa: F401  (builds the app and loads the BART summarizer at import)
+    from backend import prompt_optimizer
+    from backend.translator import get_translator_instance
+
+    if "translator" in names:
+        translator = get_translator_instance()
+        if str(translator.device) != "cpu":
+            raise SystemExit("❌ Pre-fork workers need CPU models; run with CUDA_VISIBLE_DEVICES=\"\"")
+        translator._load_model()
+        translator.model.eval()
+    if "summarizer" in names and prompt_optimizer.summarizer is None:
+        print("⚠️ BART summarizer not loaded; workers will use the TF-IDF fallback")
+
+
+def bind_socket(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock, args, index):
+    # Runs in the forked child; never returns
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        import torch
+        torch.set_num_threads(args.torch_threads)
+    except ImportError:
+        pass
+
+    import uvicorn
+    import main
+
+    print(f"🚀 Worker {index} (pid {os.getpid()}) serving with {args.torch_threads} torch threads")
+    config = uvicorn.Config(main.app, log_level=args.log_level, timeout_keep_alive=5)
+    uvicorn.Server(config).run(sockets=[sock])
+    os._exit(0)
+
+
+class PreforkServer:
+    def __init__(self, args):
+        self.args = args
+        self.sock = None
+        self.workers = {}  # pid → worker index
+        self.stopping = False
+
+    def spawn(self, index):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(self.sock, self.args, index)
+            finally:
+                os._exit(1)
+        self.workers[pid] = index
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        # Keep the parent single-threaded so the OpenMP pool is never started before fork
+        try:
+            import torch
+            torch.set_num_threads(1)
+        except ImportError:
+            pass
+        preload_models(self.args.preload)
+        self.sock = bind_socket(self.args.host, self.args.port)
+
+        # Move everything allocated so far out of the GC's reach so workers never write to those pages
+        gc.collect()
+        gc.freeze()
+
+        for index in range(self.args.workers):
+            self.spawn(index)
+        print(f"✅ {self.args.workers} workers listening on {self.args.host}:{self.args.port}")
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index = self.workers.pop(pid, None)
+            if index is not None and not self.stopping:
+                print(f"⚠️ Worker {index} (pid {pid}) exited with status {status}; restarting")
+                time.sleep(1)
+                self.spawn(index)
+        self.sock.close()
+        return 0
+
+
+def parse_args(argv=None):
+    from backend.speech_to_text import available_cpu_cores
+
+    parser = argparse.ArgumentParser(description="Pre-fork PromptBridge server with shared model weights")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--preload", nargs="*", default=list(PRELOAD_CHOICES), choices=PRELOAD_CHOICES)
+    parser.add_argument("--torch-threads", type=int, default=None,
+                        help="intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args(argv)
+    if args.torch_threads is None:
+        args.torch_threads = max(1, available_cpu_cores() // args.workers)
+    if args.workers > 1 and os.getenv("SESSION_BACKEND", "memory") == "memory":
+        print("⚠️ In-memory sessions are per worker; set SESSION_BACKEND=redis to share them")
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(PreforkServer(parse_args()).run())